@@ -0,0 +1,602 @@
+"""
+End-to-end download benchmark for the YouTube Downloader application.
+
+Runs ``fetch_video_info`` and ``download_video`` for batches of jobs
+without touching the network:
+
+* a local HTTP server serves a progressive mp4 (with byte ranges), an HLS
+  playlist and a DASH manifest with their segments;
+* ``localbench:<kind>:<id>`` URLs are resolved by the yt-dlp extractor
+  plugin in ``benchmarks/plugins``, which points at that server.
+
+The media is real (generated with ffmpeg) when ffmpeg is available, so
+post-processing runs as it would for a user; otherwise it is random bytes
+and the post-processors that would need ffmpeg are switched off.
+
+Each batch runs in a fresh process so its peak RSS is its own. Reported
+per batch: throughput, time to first byte, per-video wall time,
+post-processing time (last byte to done) and peak RSS. Results can be
+written to JSON and two result files compared:
+
+    python benchmarks/e2e.py --json e2e.json
+    python benchmarks/e2e.py --batches 1,10 --kinds hls,dash
+    python benchmarks/e2e.py --compare before.json after.json
+"""
+
+import argparse
+import concurrent.futures
+import http.server
+import json
+import math
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN_DIR = os.path.join(ROOT, "benchmarks", "plugins")
+
+KINDS = ("progressive", "hls", "dash")
+
+# (metric, higher_is_better) checked by --compare
+COMPARED_METRICS = (
+    ("throughput_mib_s", True),
+    ("wall_s", False),
+    ("wall_per_video_s.median", False),
+    ("ttfb_s.median", False),
+    ("postprocess_s.median", False),
+    ("peak_rss_mib", False),
+)
+
+# Time differences below this are noise, whatever their relative size
+NOISE_FLOOR_S = 0.01
+
+MIB = 1024 * 1024
+
+
+# --- Media ---------------------------------------------------------------
+
+def _ffmpeg(ffmpeg_path, *args):
+    subprocess.run([ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", *args],
+                   check=True, stdin=subprocess.DEVNULL)
+
+
+def _split_fragments(path):
+    """Split a fragmented mp4 into its init section and moof+mdat chunks."""
+    with open(path, "rb") as f:
+        data = f.read()
+    boxes = []
+    offset = 0
+    while offset + 8 <= len(data):
+        size = int.from_bytes(data[offset:offset + 4], "big")
+        box_type = data[offset + 4:offset + 8]
+        if size == 1:
+            size = int.from_bytes(data[offset + 8:offset + 16], "big")
+        elif size == 0:
+            size = len(data) - offset
+        boxes.append((box_type, data[offset:offset + size]))
+        offset += size
+
+    init = b"".join(box for box_type, box in boxes[:next(
+        i for i, (box_type, _) in enumerate(boxes) if box_type == b"moof")])
+    chunks = []
+    for box_type, box in boxes:
+        if box_type == b"moof":
+            chunks.append(box)
+        elif box_type == b"mdat" and chunks:
+            chunks[-1] += box
+    return init, chunks
+
+
+def _write_hls_playlist(directory, segment_seconds, segment_count):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{math.ceil(segment_seconds)}",
+             "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD"]
+    for index in range(segment_count):
+        lines += [f"#EXTINF:{segment_seconds:.3f},", f"seg{index:03d}.ts"]
+    lines.append("#EXT-X-ENDLIST")
+    with open(os.path.join(directory, "index.m3u8"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _write_dash_manifest(directory, media, segment_seconds, chunk_count):
+    """One muxed representation, so the app's single-format selections match it."""
+    segments = "\n".join(f'          <SegmentURL media="chunk-{i}.m4s"/>' for i in range(1, chunk_count + 1))
+    bandwidth = int(media["progressive_size"] * 8 / media["duration"])
+    manifest = f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S"
+     mediaPresentationDuration="PT{media['duration']}S" profiles="urn:mpeg:dash:profile:isoff-main:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" segmentAlignment="true">
+      <Representation id="muxed" codecs="{media['vcodec']},{media['acodec']}" bandwidth="{bandwidth}"
+                      width="{media['width']}" height="{media['height']}">
+        <SegmentList timescale="1000" duration="{int(segment_seconds * 1000)}">
+          <Initialization sourceURL="init.mp4"/>
+{segments}
+        </SegmentList>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+    with open(os.path.join(directory, "manifest.mpd"), "w", encoding="utf-8") as f:
+        f.write(manifest)
+
+
+def build_media(directory, duration, segment_seconds, size_mb, ffmpeg=None):
+    """
+    Write the media the server hands out and describe it in media.json.
+
+    Args:
+        directory: Empty directory to fill
+        duration: Video length in seconds
+        segment_seconds: HLS/DASH segment length
+        size_mb: Size of the synthetic media (ignored when ffmpeg generates it)
+        ffmpeg: probe_ffmpeg() result, or None for synthetic media
+
+    Returns:
+        The media description
+    """
+    hls_dir = os.path.join(directory, "hls")
+    dash_dir = os.path.join(directory, "dash")
+    os.makedirs(hls_dir)
+    os.makedirs(dash_dir)
+    progressive = os.path.join(directory, "progressive.mp4")
+    media = {"duration": duration, "width": 640, "height": 360, "synthetic": ffmpeg is None, "thumbnail": False}
+
+    if ffmpeg is not None:
+        path = ffmpeg["path"]
+        if "libx264" in ffmpeg["encoders"]:
+            video = ["-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p"]
+            media["vcodec"] = "avc1.64001e"
+        else:
+            video = ["-c:v", "mpeg4", "-q:v", "5"]
+            media["vcodec"] = "mp4v.20.9"
+        media["acodec"] = "mp4a.40.2"
+        gop = str(int(segment_seconds * 25))
+        _ffmpeg(path, "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=25:duration={duration}",
+                "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+                *video, "-g", gop, "-keyint_min", gop, "-c:a", "aac", "-b:a", "128k",
+                "-movflags", "+faststart", "-shortest", progressive)
+        _ffmpeg(path, "-i", progressive, "-c", "copy", "-f", "hls", "-hls_time", str(segment_seconds),
+                "-hls_playlist_type", "vod", "-hls_segment_filename", os.path.join(hls_dir, "seg%03d.ts"),
+                os.path.join(hls_dir, "index.m3u8"))
+
+        fragmented = os.path.join(directory, "fragmented.mp4")
+        _ffmpeg(path, "-i", progressive, "-c", "copy", "-f", "mp4",
+                "-movflags", "+frag_keyframe+empty_moov+default_base_moof", fragmented)
+        init, chunks = _split_fragments(fragmented)
+        os.remove(fragmented)
+
+        if "mjpeg" in ffmpeg["encoders"]:
+            _ffmpeg(path, "-f", "lavfi", "-i", "testsrc2=size=640x360", "-frames:v", "1",
+                    os.path.join(directory, "thumb.jpg"))
+            media["thumbnail"] = True
+    else:
+        media["vcodec"] = "avc1.64001e"
+        media["acodec"] = "mp4a.40.2"
+        size = int(size_mb * MIB)
+        segment_count = max(1, math.ceil(duration / segment_seconds))
+        with open(progressive, "wb") as f:
+            f.write(os.urandom(size))
+        for index in range(segment_count):
+            with open(os.path.join(hls_dir, f"seg{index:03d}.ts"), "wb") as f:
+                f.write(os.urandom(size // segment_count))
+        _write_hls_playlist(hls_dir, segment_seconds, segment_count)
+        init = os.urandom(1024)
+        chunks = [os.urandom(size // segment_count) for _ in range(segment_count)]
+
+    media["progressive_size"] = os.path.getsize(progressive)
+    with open(os.path.join(dash_dir, "init.mp4"), "wb") as f:
+        f.write(init)
+    for index, chunk in enumerate(chunks, 1):
+        with open(os.path.join(dash_dir, f"chunk-{index}.m4s"), "wb") as f:
+            f.write(chunk)
+    _write_dash_manifest(dash_dir, media, segment_seconds, len(chunks))
+
+    with open(os.path.join(directory, "media.json"), "w", encoding="utf-8") as f:
+        json.dump(media, f)
+    return media
+
+
+# --- Server --------------------------------------------------------------
+
+# Request path -> file under the media directory; every id maps to the same media
+ROUTES = (
+    (re.compile(r"/media\.json"), lambda m: "media.json"),
+    (re.compile(r"/thumb\.jpg"), lambda m: "thumb.jpg"),
+    (re.compile(r"/progressive/[\w-]+\.mp4"), lambda m: "progressive.mp4"),
+    (re.compile(r"/(hls|dash)/[\w-]+/([\w.-]+)"), lambda m: os.path.join(m.group(1), m.group(2))),
+)
+
+CONTENT_TYPES = {
+    ".json": "application/json", ".jpg": "image/jpeg", ".mp4": "video/mp4", ".m4s": "video/iso.segment",
+    ".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t", ".mpd": "application/dash+xml",
+}
+
+
+class MediaRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the benchmark media, honouring single byte ranges."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _resolve(self):
+        path = self.path.split("?", 1)[0]
+        for pattern, target in ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                full_path = os.path.join(self.server.media_dir, target(match))
+                if os.path.isfile(full_path):
+                    return full_path
+        return None
+
+    def _serve(self, send_body):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream"))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if not send_body:
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining:
+                block = f.read(min(remaining, 256 * 1024))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+
+    def do_GET(self):
+        self._serve(True)
+
+    def do_HEAD(self):
+        self._serve(False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(media_dir, latency=0.0):
+    """Serve media_dir on a free localhost port from a background thread."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MediaRequestHandler)
+    server.daemon_threads = True
+    server.media_dir = media_dir
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- Batch runner (child process) ----------------------------------------
+
+def peak_rss_mib():
+    """Peak resident set size of this process (and of finished children, POSIX only)."""
+    try:
+        import resource
+    except ImportError:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+        return round(counters.PeakWorkingSetSize / MIB, 1), None
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return round(own / MIB, 1), round(children / MIB, 1)
+
+
+def _stats(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "median": round(statistics.median(ordered), 4),
+        "p95": round(ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def run_batch(jobs, kinds, output_dir, concurrency):
+    """
+    Fetch and download jobs localbench videos with the application's code.
+
+    Downloads run on a thread pool sized like the scheduler's worker pool,
+    calling download_video directly as the thread worker mode does.
+    """
+    sys.path[:0] = [ROOT, PLUGIN_DIR]
+    from core.download_config import download_config
+    from core.downloader import download_video
+    from core.ffmpeg import probe_ffmpeg
+    from core.localization import localization
+    from core.models import EntryRecord
+    from core.scheduler import DownloadJob
+    from core.video_info import fetch_video_info
+
+    class TimedJob(DownloadJob):
+        """Job that timestamps the first and last bytes the progress hook reports."""
+
+        first_byte = None
+        last_byte = None
+
+        def record_progress(self, filename, downloaded_bytes, total_bytes=None):
+            if downloaded_bytes:
+                now = time.perf_counter()
+                if self.first_byte is None:
+                    self.first_byte = now
+                self.last_byte = now
+            super().record_progress(filename, downloaded_bytes, total_bytes)
+
+    if not probe_ffmpeg()["available"]:
+        # Random bytes can't be tagged or converted; keep to what runs without ffmpeg
+        download_config.update_config({"write_metadata": False, "embed_thumbnails": False, "postprocessors": []})
+
+    selections = {
+        "resolution": "best",
+        "format": "mp4",
+        "audio": "default",
+        "subtitles": localization.get("formats.no_subtitles", "No subtitles"),
+        "sections": "",
+    }
+
+    def run_one(index):
+        kind = kinds[index % len(kinds)]
+        url = f"localbench:{kind}:v{index:04d}"
+        result = {"kind": kind, "ok": False, "error": None}
+        started = time.perf_counter()
+        try:
+            entry = EntryRecord.from_info(url, fetch_video_info(url), dict(selections))
+            fetched = time.perf_counter()
+            job = TimedJob(None, output_dir)
+            download_video(entry, output_dir, job=job)
+            finished = time.perf_counter()
+        except Exception as e:
+            result["error"] = str(e) or type(e).__name__
+            return result
+
+        result.update({
+            "ok": job.first_byte is not None,
+            "fetch_s": fetched - started,
+            "ttfb_s": job.first_byte - fetched if job.first_byte else None,
+            "postprocess_s": finished - job.last_byte if job.last_byte else None,
+            "wall_s": finished - started,
+            "bytes": sum(job.file_bytes.values()),
+        })
+        if not result["ok"]:
+            result["error"] = "no bytes downloaded"
+        return result
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(run_one, range(jobs)))
+    wall = time.perf_counter() - started
+
+    ok = [r for r in results if r["ok"]]
+    errors = {}
+    for r in results:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    total_bytes = sum(r["bytes"] for r in ok)
+    peak_rss, peak_child_rss = peak_rss_mib()
+    return {
+        "jobs": jobs,
+        "ok": len(ok),
+        "errors": errors,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "bytes": total_bytes,
+        "throughput_mib_s": round(total_bytes / MIB / wall, 2),
+        "videos_per_min": round(len(ok) * 60 / wall, 1),
+        "fetch_s": _stats([r["fetch_s"] for r in ok]),
+        "ttfb_s": _stats([r["ttfb_s"] for r in ok]),
+        "wall_per_video_s": _stats([r["wall_s"] for r in ok]),
+        "postprocess_s": _stats([r["postprocess_s"] for r in ok]),
+        "peak_rss_mib": peak_rss,
+        "peak_child_rss_mib": peak_child_rss,
+    }
+
+
+# --- Driver ----------------------------------------------------------------
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def measure_batch(server_url, jobs, kinds, concurrency, verbose=False, timeout=3600):
+    """Run one batch in a fresh interpreter and return its summary."""
+    with tempfile.TemporaryDirectory(prefix="e2e-batch-") as work_dir:
+        result_path = os.path.join(work_dir, "result.json")
+        output_dir = os.path.join(work_dir, "downloads")
+        os.makedirs(output_dir)
+        env = dict(os.environ, LOCALBENCH_URL=server_url)
+        env.pop("YTDLP_NO_PLUGINS", None)
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-batch", str(jobs), "--kinds", ",".join(kinds),
+             "--concurrency", str(concurrency), "--output-dir", output_dir, "--result", result_path],
+            cwd=ROOT, env=env, check=True, timeout=timeout,
+            stdout=None if verbose else subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL,
+        )
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def _metric(summary, name):
+    value = summary
+    for part in name.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(old, new, tolerance):
+    """
+    Print metric changes between two result files.
+
+    Returns:
+        List of regressions worse than tolerance (a fraction, 0.1 = 10%)
+    """
+    regressions = []
+    print(f"{'batch':>6}  {'metric':<24} {'old':>10} {'new':>10} {'change':>8}")
+    for batch in new["batches"]:
+        if batch not in old["batches"]:
+            continue
+        for name, higher_is_better in COMPARED_METRICS:
+            before = _metric(old["batches"][batch], name)
+            after = _metric(new["batches"][batch], name)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = ""
+            is_time = name.split(".")[0].endswith("_s")
+            if worse > tolerance and not (is_time and abs(after - before) < NOISE_FLOOR_S):
+                flag = "  REGRESSION"
+                regressions.append(f"batch {batch}: {name} {before} -> {after} ({change:+.1%})")
+            print(f"{batch:>6}  {name:<24} {before:>10} {after:>10} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batches", default="1,10,100", help="comma-separated batch sizes")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="media served, cycled through per job")
+    parser.add_argument("--concurrency", type=int, help="parallel downloads (default: max_concurrent_downloads)")
+    parser.add_argument("--duration", type=int, default=10, help="video length in seconds")
+    parser.add_argument("--segment-seconds", type=float, default=2.0)
+    parser.add_argument("--size-mb", type=float, default=4.0, help="size of synthetic media (no ffmpeg)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every request")
+    parser.add_argument("--synthetic", action="store_true", help="serve random bytes even if ffmpeg is available")
+    parser.add_argument("--json", metavar="PATH", help="write the results to a JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression for --compare")
+    parser.add_argument("--verbose", action="store_true", help="show yt-dlp output of the batches")
+    # Internal: run one batch in this process (see measure_batch)
+    parser.add_argument("--run-batch", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    kinds = [kind for kind in args.kinds.split(",") if kind]
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(sorted(unknown))}")
+
+    if args.run_batch is not None:
+        summary = run_batch(args.run_batch, kinds, args.output_dir, args.concurrency)
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        return 0
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            new = json.load(f)
+        regressions = compare(old, new, args.tolerance)
+        for regression in regressions:
+            print(f"[FAIL] {regression}")
+        return 1 if regressions else 0
+
+    sys.path.insert(0, ROOT)
+    import yt_dlp.version
+    from core.download_config import download_config
+    from core.ffmpeg import probe_ffmpeg
+
+    ffmpeg = probe_ffmpeg()
+    use_ffmpeg = ffmpeg["available"] and not args.synthetic
+    concurrency = args.concurrency or download_config.get_config()["max_concurrent_downloads"]
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "yt_dlp": yt_dlp.version.__version__,
+        "ffmpeg": ffmpeg["version"] if use_ffmpeg else None,
+        "kinds": kinds,
+        "batches": {},
+    }
+
+    media_dir = tempfile.mkdtemp(prefix="e2e-media-")
+    server = None
+    try:
+        results["media"] = build_media(media_dir, args.duration, args.segment_seconds, args.size_mb,
+                                       ffmpeg if use_ffmpeg else None)
+        server = start_server(media_dir, args.latency_ms / 1000)
+        server_url = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"media: {'synthetic' if not use_ffmpeg else 'ffmpeg ' + str(ffmpeg['version'])}, "
+              f"{results['media']['progressive_size'] / MIB:.1f} MiB per video, kinds {', '.join(kinds)}")
+
+        for jobs in (int(size) for size in args.batches.split(",") if size):
+            summary = measure_batch(server_url, jobs, kinds, concurrency, verbose=args.verbose)
+            results["batches"][str(jobs)] = summary
+            ttfb = summary["ttfb_s"] or {}
+            per_video = summary["wall_per_video_s"] or {}
+            postprocess = summary["postprocess_s"] or {}
+            print(f"batch {jobs:>4}: {summary['ok']}/{jobs} ok in {summary['wall_s']} s, "
+                  f"{summary['throughput_mib_s']} MiB/s, ttfb {ttfb.get('median')} s, "
+                  f"video {per_video.get('median')} s, post-processing {postprocess.get('median')} s, "
+                  f"peak RSS {summary['peak_rss_mib']} MiB")
+            for error, count in summary["errors"].items():
+                print(f"  {count} x {error}")
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(media_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failed = sum(summary["jobs"] - summary["ok"] for summary in results["batches"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Micro-benchmarks for the per-entry option pipeline of the YouTube Downloader application.
+
+Times the functions every queued entry goes through - the
+``core.video_info`` option extractors, the language name lookups and
+``create_ydl_format_string`` - on generated info dicts with 50 to 2,000
+formats and 0 to 200 caption languages, and records the memory each call
+allocates (tracemalloc peak).
+
+Two kinds of checks gate changes:
+
+* a time budget per call at the largest input;
+* a scaling limit: going from the smallest to the largest input may cost
+  at most ``--scaling-slack`` times the growth in input size, which
+  catches accidental quadratic loops and per-item file reads.
+
+    python benchmarks/micro.py
+    python benchmarks/micro.py --budget-scale 2 --json micro.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORMAT_COUNTS = (50, 200, 2000)
+CAPTION_COUNTS = (0, 50, 200)
+
+HEIGHTS = (144, 240, 360, 480, 720, 1080, 1440, 2160)
+
+# Microseconds per call at the largest input
+BUDGETS_US = {
+    "extract_resolution_options": 1500,
+    "extract_format_options": 1500,
+    "extract_audio_language_options": 1500,
+    "extract_subtitle_options": 400,
+    "get_language_display_name": 400,
+    "find_language_code_by_name": 400,
+    "create_ydl_format_string": 20,
+    "EntryRecord.load_info": 10000,
+}
+
+
+def make_info(format_count, caption_count, seed=0):
+    """
+    Build an extract_info-like dict.
+
+    Formats cycle through storyboards, audio-only tracks in several
+    languages, video-only and muxed streams in every height, ordered
+    worst to best like yt-dlp's. Captions use real language codes, as
+    manual subtitles and as automatic captions.
+    """
+    sys.path.insert(0, ROOT)
+    from core.utils import load_audio_locale_names, load_language_names
+
+    rng = random.Random(seed)
+    codes = sorted(load_language_names()) + sorted(load_audio_locale_names())
+    audio_languages = codes[:12]
+
+    formats = []
+    for index in range(format_count):
+        height = HEIGHTS[index % len(HEIGHTS)]
+        kind = index % 4
+        fmt = {"format_id": str(index), "tbr": rng.uniform(50, 8000), "filesize": rng.randint(10 ** 5, 10 ** 9)}
+        if kind == 0:
+            fmt.update(ext="mhtml", vcodec="none", acodec="none", format_note="storyboard")
+        elif kind == 1:
+            fmt.update(ext=rng.choice(("m4a", "webm")), vcodec="none", acodec=rng.choice(("mp4a.40.2", "opus")),
+                       language=rng.choice(audio_languages))
+        elif kind == 2:
+            fmt.update(ext=rng.choice(("mp4", "webm")), vcodec=rng.choice(("avc1.640028", "vp9", "av01.0.08M.08")),
+                       acodec="none", height=height, width=height * 16 // 9)
+        else:
+            fmt.update(ext="mp4", vcodec="avc1.42001E", acodec="mp4a.40.2", height=height, width=height * 16 // 9,
+                       language=rng.choice(audio_languages))
+        formats.append(fmt)
+    formats.sort(key=lambda f: f["tbr"])
+
+    captions = {
+        code: [{"ext": ext, "url": f"https://example.invalid/{code}.{ext}"} for ext in ("vtt", "srt", "ttml")]
+        for code in codes[:caption_count]
+    }
+    return {
+        "id": "bench",
+        "title": "Micro benchmark",
+        "duration": 600,
+        "language": audio_languages[0],
+        "formats": formats,
+        "subtitles": captions,
+        "automatic_captions": dict(captions),
+    }
+
+
+def _cases():
+    """(name, input axis, factory) where factory(info) returns the call to time."""
+    from core.downloader import create_ydl_format_string
+    from core.models import EntryRecord
+    from core.utils import find_language_code_by_name, get_language_display_name
+    from core.video_info import (
+        extract_audio_language_options,
+        extract_format_options,
+        extract_resolution_options,
+        extract_subtitle_options,
+    )
+
+    def display_names(info):
+        codes = list(info["subtitles"])
+        return lambda: [get_language_display_name(code) for code in codes]
+
+    def code_lookups(info):
+        names = extract_subtitle_options(info)[1:]
+        return lambda: [find_language_code_by_name(name) for name in names]
+
+    return (
+        ("extract_resolution_options", "formats", lambda info: lambda: extract_resolution_options(info["formats"])),
+        ("extract_format_options", "formats", lambda info: lambda: extract_format_options(info["formats"])),
+        ("extract_audio_language_options", "formats",
+         lambda info: lambda: extract_audio_language_options(info["formats"], info)),
+        ("extract_subtitle_options", "captions", lambda info: lambda: extract_subtitle_options(info)),
+        ("get_language_display_name", "captions", display_names),
+        ("find_language_code_by_name", "captions", code_lookups),
+        ("create_ydl_format_string", None,
+         lambda info: lambda: create_ydl_format_string("720p", "mp4", "en")),
+        ("EntryRecord.load_info", "both",
+         lambda info: lambda: EntryRecord("https://example.invalid/watch").load_info(info)),
+    )
+
+
+def _inputs(axis):
+    """(label, size, info) for each input a case runs on."""
+    if axis == "formats":
+        return [(f"{n} formats", n, make_info(n, 50)) for n in FORMAT_COUNTS]
+    if axis == "captions":
+        return [(f"{n} captions", n, make_info(200, n)) for n in CAPTION_COUNTS]
+    if axis == "both":
+        return [(f"{f} formats, {c} captions", f, make_info(f, c)) for f, c in zip(FORMAT_COUNTS, CAPTION_COUNTS)]
+    return [("fixed", 1, make_info(50, 0))]
+
+
+def time_call(fn, repeat=5):
+    """Best per-call time in microseconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def allocated_kib(fn):
+    """Peak memory allocated while the call runs, in KiB."""
+    tracemalloc.start()
+    try:
+        fn()  # Let caches and interned strings settle first
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn()
+        return (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run(repeat, budget_scale, scaling_slack):
+    """Run every case and return (results, failures)."""
+    sys.path.insert(0, ROOT)
+    from core.ffmpeg import probe_ffmpeg
+    from core.localization import localization
+
+    # Catalog and ffmpeg probe loads are one-off costs, not per-entry ones
+    localization.get("formats.best")
+    probe_ffmpeg()
+
+    results = []
+    failures = []
+    for name, axis, factory in _cases():
+        runs = []
+        for label, size, info in _inputs(axis):
+            fn = factory(info)
+            runs.append({
+                "input": label,
+                "size": size,
+                "us_per_call": round(time_call(fn, repeat), 2),
+                "alloc_kib": round(allocated_kib(fn), 1),
+            })
+        results.append({"case": name, "runs": runs})
+
+        largest = runs[-1]
+        budget = BUDGETS_US[name] * budget_scale
+        if largest["us_per_call"] > budget:
+            failures.append(f"{name}: {largest['us_per_call']} us with {largest['input']} exceeds {budget:g} us")
+
+        sized = [r for r in runs if r["size"]]
+        if len(sized) > 1 and sized[0]["us_per_call"]:
+            growth = sized[-1]["size"] / sized[0]["size"]
+            cost = sized[-1]["us_per_call"] / sized[0]["us_per_call"]
+            if cost > growth * scaling_slack:
+                failures.append(f"{name}: {cost:.0f}x slower for {growth:.0f}x the input "
+                                f"({sized[0]['input']} -> {sized[-1]['input']})")
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every time budget (slow machines)")
+    parser.add_argument("--scaling-slack", type=float, default=3.0,
+                        help="allowed cost growth relative to input growth")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    results, failures = run(args.repeat, args.budget_scale, args.scaling_slack)
+    for result in results:
+        print(result["case"])
+        for r in result["runs"]:
+            print(f"  {r['input']:<26} {r['us_per_call']:>10.2f} us  {r['alloc_kib']:>9.1f} KiB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "failures": failures}, f, indent=2)
+
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+yt-dlp extractor for the offline end-to-end benchmark (benchmarks/e2e.py).
+
+Handles ``localbench:<kind>:<id>`` URLs, where kind is progressive, hls
+or dash, by pointing at the media server whose address the benchmark puts
+in the LOCALBENCH_URL environment variable. Every id resolves to the same
+media, so batches of any size need only one copy on disk.
+"""
+
+import os
+
+from yt_dlp.extractor.common import InfoExtractor
+
+
+class LocalBenchIE(InfoExtractor):
+    IE_NAME = "localbench"
+    IE_DESC = False  # Not a real site; keep it out of --list-extractors
+    _VALID_URL = r"localbench:(?P<kind>progressive|hls|dash):(?P<id>[\w-]+)"
+
+    def _real_extract(self, url):
+        kind, video_id = self._match_valid_url(url).group("kind", "id")
+        base = os.environ["LOCALBENCH_URL"].rstrip("/")
+        manifest = self._download_json(f"{base}/media.json", video_id, note="Downloading media description")
+
+        if kind == "progressive":
+            formats = [{
+                "format_id": "progressive",
+                "url": f"{base}/progressive/{video_id}.mp4",
+                "ext": "mp4",
+                "vcodec": manifest["vcodec"],
+                "acodec": manifest["acodec"],
+                "width": manifest["width"],
+                "height": manifest["height"],
+                "filesize": manifest["progressive_size"],
+            }]
+        elif kind == "hls":
+            formats = self._extract_m3u8_formats(
+                f"{base}/hls/{video_id}/index.m3u8", video_id, "mp4", m3u8_id="hls")
+        else:
+            formats = self._extract_mpd_formats(
+                f"{base}/dash/{video_id}/manifest.mpd", video_id, mpd_id="dash")
+
+        for fmt in formats:
+            fmt.setdefault("height", manifest["height"])
+
+        info = {
+            "id": video_id,
+            "title": f"Local bench {kind} {video_id}",
+            "duration": manifest["duration"],
+            "formats": formats,
+        }
+        if manifest.get("thumbnail"):
+            info["thumbnail"] = f"{base}/thumb.jpg"
+        return info
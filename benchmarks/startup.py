@@ -0,0 +1,153 @@
+"""
+Startup benchmark for the YouTube Downloader application.
+
+Measures what the GUI pays before its window appears:
+
+* import cost of ``ui.main_window`` from ``python -X importtime``, with a
+  check that the deferred heavy dependencies (yt-dlp, requests) are not
+  pulled in on the way;
+* wall time from process start to the window being drawn
+  (``main.py --exit-when-shown``), when a display is available.
+
+Exits non-zero when a budget is exceeded so it can gate changes:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --import-budget-ms 400 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of the startup path
+DEFERRED_MODULES = ("yt_dlp", "requests", "core.postprocessors")
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+        (total_us, modules) where modules maps name -> (self_us, cumulative_us)
+    """
+    total = 0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative_us))
+        # Top-level imports (one space of indent) add up to the total
+        if depth == 1:
+            total += int(cumulative_us)
+    return total, modules
+
+
+def measure_imports(module, runs):
+    """Import module in fresh interpreters and return the median result."""
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+        total, modules = parse_importtime(result.stderr)
+        totals.append(total)
+
+    slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:15]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "runs_ms": [round(total / 1000, 1) for total in totals],
+        "deferred_loaded": [name for name in DEFERRED_MODULES if name in modules],
+        "slowest": [{"module": name, "cumulative_ms": round(cum / 1000, 1)} for name, (_, cum) in slowest],
+    }
+
+
+def has_display():
+    """Whether a GUI window can be opened here."""
+    if sys.platform.startswith("win") or sys.platform == "darwin":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def measure_window(runs, timeout=60):
+    """Time launches until the window is drawn; the first run is the cold one."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "main.py", "--exit-when-shown"],
+            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        try:
+            for line in process.stdout:
+                if line.strip() == "ready":
+                    times.append(time.perf_counter() - started)
+                    break
+            process.wait(timeout=timeout)
+        finally:
+            if process.poll() is None:
+                process.kill()
+    if not times:
+        raise RuntimeError("the window never reported ready")
+    return {
+        "cold_ms": round(times[0] * 1000, 1),
+        "warm_median_ms": round(statistics.median(times[1:] or times) * 1000, 1),
+        "runs_ms": [round(t * 1000, 1) for t in times],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="ui.main_window", help="module imported before the window appears")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=500)
+    parser.add_argument("--window-budget-ms", type=float, default=2500)
+    parser.add_argument("--no-window", action="store_true", help="skip the launch-to-window measurement")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    failures = []
+    results = {"imports": measure_imports(args.module, args.runs)}
+    imports = results["imports"]
+    print(f"import {args.module}: {imports['median_ms']} ms median (budget {args.import_budget_ms} ms)")
+    for item in imports["slowest"][:5]:
+        print(f"  {item['cumulative_ms']:>8} ms  {item['module']}")
+    if imports["median_ms"] > args.import_budget_ms:
+        failures.append(f"import time {imports['median_ms']} ms exceeds {args.import_budget_ms} ms")
+    if imports["deferred_loaded"]:
+        failures.append(f"deferred modules imported at startup: {', '.join(imports['deferred_loaded'])}")
+
+    if not args.no_window and has_display():
+        results["window"] = measure_window(args.runs)
+        window = results["window"]
+        print(f"window shown: cold {window['cold_ms']} ms, warm {window['warm_median_ms']} ms median "
+              f"(budget {args.window_budget_ms} ms)")
+        if window["warm_median_ms"] > args.window_budget_ms:
+            failures.append(f"window time {window['warm_median_ms']} ms exceeds {args.window_budget_ms} ms")
+
+    results["failures"] = failures
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
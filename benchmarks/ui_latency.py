@@ -0,0 +1,157 @@
+"""
+UI latency benchmark for the YouTube Downloader application.
+
+Opens the real window, adds a batch of ``localbench:`` videos at once
+through the bulk import path (rows are created a few per frame),
+downloads them all from the media server of ``benchmarks/e2e.py`` and
+reads the main-loop watchdog (``ui/watchdog.py``) at the end: tick lag,
+stalls, pending update depth and the slowest update per origin
+(progress, thumbnail, controls...).
+
+Needs a display. Fails when the main loop stalls more often than allowed
+or an update runs longer than its budget:
+
+    python benchmarks/ui_latency.py --videos 100
+    python benchmarks/ui_latency.py --videos 200 --max-stalls 2 --json ui.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from e2e import KINDS, PLUGIN_DIR, ROOT, build_media, start_server
+from startup import has_display
+
+
+def run_window(urls, output_dir, stall_threshold, timeout):
+    """Add urls to a new window, download them all and return the watchdog figures."""
+    sys.path[:0] = [ROOT, PLUGIN_DIR]
+    from core.download_config import download_config
+    from core.ffmpeg import probe_ffmpeg
+    from ui.main_window import MainWindow
+    from ui.watchdog import ui_watchdog
+
+    if not probe_ffmpeg()["available"]:
+        # Random bytes can't be tagged or converted; keep to what runs without ffmpeg
+        download_config.update_config({"write_metadata": False, "embed_thumbnails": False, "postprocessors": []})
+    ui_watchdog.stall_threshold = stall_threshold
+
+    app = MainWindow()
+    app.output_dir = output_dir
+    started = time.perf_counter()
+    state = {"entries": None, "downloading": False, "timed_out": False}
+
+    def poll():
+        # Rows are created a few per frame; wait for the whole batch
+        if app._pending_rows:
+            app.root.after(200, poll)
+            return
+        if state["entries"] is None:
+            state["entries"] = list(app.download_queue)
+        # Entries whose info failed to load remove themselves from the queue
+        entries = [entry for entry in state["entries"] if entry in app.download_queue]
+        if not state["downloading"] and all(entry.download_btn is not None for entry in entries):
+            state["downloading"] = True
+            app._download_all()
+        done = state["downloading"] and all(
+            entry.record.job is None or entry.record.job.state in ("finished", "failed", "cancelled")
+            for entry in entries
+        )
+        state["timed_out"] = time.perf_counter() - started > timeout
+        if done or state["timed_out"]:
+            state["loaded"] = len(entries)
+            state["finished"] = sum(1 for entry in entries
+                                    if entry.record.job is not None and entry.record.job.state == "finished")
+            app.root.destroy()
+        else:
+            app.root.after(200, poll)
+
+    # Same path as a bulk paste once the links are validated
+    app.root.after(100, app._queue_rows, urls)
+    app.root.after(300, poll)
+    app.run()
+
+    result = ui_watchdog.snapshot()
+    result.update({
+        "videos": len(urls),
+        "loaded": state.get("loaded", 0),
+        "finished": state.get("finished", 0),
+        "wall_s": round(time.perf_counter() - started, 2),
+        "timed_out": state["timed_out"],
+    })
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--videos", type=int, default=100, help="videos added at once")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="media served, cycled through per video")
+    parser.add_argument("--duration", type=int, default=10, help="video length in seconds")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="size of synthetic media (no ffmpeg)")
+    parser.add_argument("--stall-threshold-ms", type=float, default=250, help="tick lag counted as a stall")
+    parser.add_argument("--max-stalls", type=int, default=0)
+    parser.add_argument("--callback-budget-ms", type=float, default=100, help="longest allowed single UI update")
+    parser.add_argument("--timeout", type=float, default=900)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    if not has_display():
+        print("[FAIL] no display available")
+        return 1
+
+    kinds = [kind for kind in args.kinds.split(",") if kind]
+    urls = [f"localbench:{kinds[index % len(kinds)]}:ui{index:04d}" for index in range(args.videos)]
+
+    sys.path.insert(0, ROOT)
+    from core.ffmpeg import probe_ffmpeg
+
+    ffmpeg = probe_ffmpeg()
+    media_dir = tempfile.mkdtemp(prefix="ui-media-")
+    output_dir = tempfile.mkdtemp(prefix="ui-downloads-")
+    server = None
+    try:
+        build_media(media_dir, args.duration, 2.0, args.size_mb, ffmpeg if ffmpeg["available"] else None)
+        server = start_server(media_dir)
+        os.environ["LOCALBENCH_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+        os.environ.pop("YTDLP_NO_PLUGINS", None)
+        result = run_window(urls, output_dir, args.stall_threshold_ms / 1000, args.timeout)
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(media_dir, ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print(f"{result['finished']}/{result['videos']} downloaded in {result['wall_s']} s; "
+          f"{result['ticks']} ticks, max lag {result['tick_lag_max_s'] * 1000:.0f} ms, "
+          f"{result['stalls']} stalls, up to {result['pending_max']} updates pending")
+    for origin, stats in sorted(result["callbacks"].items()):
+        print(f"  {origin:<10} {stats['count']:>7} updates, run max {stats['run_max_s'] * 1000:>7.1f} ms, "
+              f"waited max {stats['delay_max_s'] * 1000:>7.1f} ms")
+
+    failures = []
+    if result["timed_out"]:
+        failures.append(f"batch did not finish within {args.timeout:g} s")
+    if result["stalls"] > args.max_stalls:
+        failures.append(f"{result['stalls']} main-loop stalls over {args.stall_threshold_ms:g} ms "
+                        f"(allowed {args.max_stalls})")
+    for origin, stats in sorted(result["callbacks"].items()):
+        if stats["run_max_s"] * 1000 > args.callback_budget_ms:
+            failures.append(f"{origin} update ran {stats['run_max_s'] * 1000:.0f} ms "
+                            f"(budget {args.callback_budget_ms:g} ms)")
+
+    result["failures"] = failures
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
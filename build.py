@@ -4,14 +4,41 @@ Build script for 0xDownloader application.
 This script creates a standalone executable using PyInstaller.
 """
 
+import argparse
+import importlib.util
 import os
 import sys
 import shutil
+import statistics
 import subprocess
+import time
 from pathlib import Path
 from datetime import datetime
 
 
+# Build profiles:
+#   onefile - a single self-extracting executable (unpacked to a temp folder
+#             and UPX-decompressed on every launch)
+#   fast    - onedir bundle without UPX, trimmed modules and optimized
+#             bytecode, for the quickest startup
+PROFILES = ("onefile", "fast")
+
+# Modules the app never uses, left out of the fast-start bundle
+FAST_EXCLUDES = [
+    # Standard library
+    'unittest', 'doctest', 'pdb', 'pydoc', 'pydoc_data', 'lib2to3', 'distutils',
+    'ensurepip', 'venv', 'idlelib', 'turtle', 'turtledemo', 'tkinter.test',
+    'test', 'xmlrpc', 'curses', 'tkinter.tix', 'setuptools', 'pip',
+    # Heavy packages that Pillow and yt-dlp hooks can drag in
+    'numpy', 'matplotlib', 'IPython', 'PyQt5', 'PyQt6', 'PySide2', 'PySide6',
+    'PIL.ImageQt', 'PIL.ImageShow',
+    # Optional yt-dlp backends the app doesn't enable
+    'curl_cffi', 'secretstorage', 'xattr',
+]
+
+EXE_NAME = "0xDownloader"
+
+
 def check_dependencies():
     """Check if required dependencies are installed."""
     print("Checking dependencies...")
@@ -60,9 +87,35 @@ def clean_build_directories():
         print(f"[OK] Removed {spec_file}")
 
 
-def create_build_spec():
+def compile_locales():
+    """Precompile the translation catalogs so they ship with the build."""
+    print("\nCompiling translation catalogs...")
+    
+    from core.localization import LocalizationManager, compile_catalog
+    
+    for language_code in LocalizationManager().get_available_languages():
+        json_path = os.path.join("locales", f"{language_code}.json")
+        catalog = compile_catalog(json_path)
+        print(f"[OK] {json_path}: {len(catalog)} strings")
+
+
+def get_pyinstaller_version():
+    """Get the installed PyInstaller version as a tuple of ints."""
+    import PyInstaller
+    return tuple(int(part) for part in PyInstaller.__version__.split(".")[:2] if part.isdigit())
+
+
+def get_executable_path(profile):
+    """Path of the built executable for a profile."""
+    exe_file = EXE_NAME + (".exe" if sys.platform.startswith("win") else "")
+    if profile == "fast":
+        return Path("dist") / EXE_NAME / exe_file
+    return Path("dist") / exe_file
+
+
+def create_build_spec(profile="onefile"):
     """Create PyInstaller spec file with proper configuration."""
-    print("\nCreating build specification...")
+    print(f"\nCreating build specification ({profile} profile)...")
     
     # Prepare data files
     datas = [
@@ -81,6 +134,26 @@ def create_build_spec():
     else:
         print(f"[INFO] No icon file found ({icon_file})")
     
+    fast = profile == "fast"
+    extra_hiddenimports = []
+    analysis_options = ""
+    if fast:
+        # yt-dlp's generated lazy extractor index avoids importing every
+        # extractor at startup; it only exists in builds from a source
+        # checkout (devscripts/make_lazy_extractors.py)
+        if importlib.util.find_spec("yt_dlp.extractor.lazy_extractors"):
+            extra_hiddenimports.append('yt_dlp.extractor.lazy_extractors')
+            print("[INFO] Using yt-dlp lazy extractors")
+        else:
+            print("[INFO] yt-dlp lazy extractors not available (run devscripts/make_lazy_extractors.py in a yt-dlp checkout)")
+        
+        # Level 1 strips asserts but keeps docstrings, which some
+        # dependencies read at runtime
+        if get_pyinstaller_version() >= (6, 6):
+            analysis_options = "\n    optimize=1,"
+        else:
+            print("[INFO] PyInstaller < 6.6 cannot precompile optimized bytecode; skipping")
+    
     spec_content = f'''# -*- mode: python ; coding: utf-8 -*-
 
 block_cipher = None
@@ -108,7 +181,7 @@ hiddenimports = [
     'pathlib',
     'io',
     'subprocess',
-]
+] + {extra_hiddenimports}
 
 a = Analysis(
     ['main.py'],
@@ -119,15 +192,25 @@ a = Analysis(
     hookspath=[],
     hooksconfig={{}},
     runtime_hooks=[],
-    excludes=[],
+    excludes={FAST_EXCLUDES if fast else []},
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
-    noarchive=False,
+    noarchive=False,{analysis_options}
 )
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+{_fast_exe_spec(icon_path) if fast else _onefile_exe_spec(icon_path)}'''
+    
+    with open("0xDownloader.spec", "w", encoding="utf-8") as f:
+        f.write(spec_content)
+    
+    print("[OK] Build specification created")
 
+
+def _onefile_exe_spec(icon_path):
+    """EXE section bundling everything into one self-extracting file."""
+    return f'''
 exe = EXE(
     pyz,
     a.scripts,
@@ -151,11 +234,40 @@ exe = EXE(
     icon={repr(icon_path)},  # Icon path
 )
 '''
-    
-    with open("0xDownloader.spec", "w", encoding="utf-8") as f:
-        f.write(spec_content)
-    
-    print("[OK] Build specification created")
+
+
+def _fast_exe_spec(icon_path):
+    """EXE and COLLECT sections for an uncompressed onedir bundle."""
+    return f'''
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='0xDownloader',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,  # Set to True for debugging
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon={repr(icon_path)},  # Icon path
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=False,
+    name='0xDownloader',
+)
+'''
 
 
 def build_executable():
@@ -188,34 +300,80 @@ def build_executable():
         return False
 
 
-def verify_build():
+def verify_build(profile="onefile"):
     """Verify that the build was successful."""
     print("\nVerifying build...")
     
-    exe_path = Path("dist") / "0xDownloader.exe"
+    exe_path = get_executable_path(profile)
     
     if exe_path.exists():
-        size_mb = exe_path.stat().st_size / (1024 * 1024)
+        if profile == "fast":
+            size = sum(path.stat().st_size for path in exe_path.parent.rglob("*") if path.is_file())
+        else:
+            size = exe_path.stat().st_size
         print(f"[OK] Executable created: {exe_path}")
-        print(f"File size: {size_mb:.1f} MB")
+        print(f"{'Bundle' if profile == 'fast' else 'File'} size: {size / (1024 * 1024):.1f} MB")
         return True
     else:
         print("[ERROR] Executable not found!")
         return False
 
 
-def create_distribution_info():
+def measure_startup(profile="onefile", runs=5, timeout=120):
+    """
+    Launch the built app until its window is drawn and report the times.
+    
+    The app is started with --exit-when-shown, which quits as soon as the
+    main window has been laid out. The first launch after a build is the
+    cold one (files not yet in the OS cache, onefile bundle not yet
+    unpacked); the rest are warm.
+    
+    Returns:
+        dict with cold_s and warm_s (median), or None if it couldn't run
+    """
+    print("\nMeasuring startup time...")
+    
+    exe_path = get_executable_path(profile)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            result = subprocess.run([str(exe_path), "--exit-when-shown"], timeout=timeout,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"[ERROR] Could not measure startup: {e}")
+            return None
+        if result.returncode != 0:
+            print(f"[ERROR] App exited with code {result.returncode} (no display?)")
+            return None
+        times.append(time.perf_counter() - started)
+    
+    timings = {
+        "cold_s": times[0],
+        "warm_s": statistics.median(times[1:] or times),
+    }
+    print(f"[OK] Cold launch: {timings['cold_s']:.2f} s")
+    print(f"[OK] Warm launch: {timings['warm_s']:.2f} s (median of {max(len(times) - 1, 1)})")
+    return timings
+
+
+def create_distribution_info(profile="onefile"):
     """Create distribution information file."""
     print("\nCreating distribution info...")
     
     # Get current date in a cross-platform way
     current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    if profile == "fast":
+        contents = "- 0xDownloader/: Application folder (keep its files together)\n- 0xDownloader/0xDownloader.exe: Main application executable"
+    else:
+        contents = "- 0xDownloader.exe: Main application executable"
+    
     info_content = f"""0xDownloader - Distribution Package
 Generated on: {current_date}
 
 Contents:
-- 0xDownloader.exe: Main application executable
+{contents}
 - README.md: Documentation and usage instructions
 
 System Requirements:
@@ -236,8 +394,20 @@ For support, visit: https://oscarrc.me
     print("[OK] Distribution info created")
 
 
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Build the 0xDownloader executable")
+    parser.add_argument("--profile", choices=PROFILES, default="onefile",
+                        help="onefile: single executable; fast: onedir bundle tuned for startup time")
+    parser.add_argument("--measure-runs", type=int, default=5,
+                        help="launches used to measure startup time (0 to skip)")
+    return parser.parse_args(argv)
+
+
 def main():
     """Main build process."""
+    args = parse_args()
+    
     print("0xDownloader - Build Script")
     print("=" * 50)
     
@@ -253,8 +423,9 @@ def main():
         # Step 2: Clean previous builds
         clean_build_directories()
         
-        # Step 3: Create build specification
-        create_build_spec()
+        # Step 3: Compile translation catalogs and create build specification
+        compile_locales()
+        create_build_spec(args.profile)
         
         # Step 4: Build executable
         if not build_executable():
@@ -262,15 +433,19 @@ def main():
             sys.exit(1)
         
         # Step 5: Verify build
-        if not verify_build():
+        if not verify_build(args.profile):
             print("[ERROR] Build verification failed.")
             sys.exit(1)
         
-        # Step 6: Create distribution info
-        create_distribution_info()
+        # Step 6: Measure cold and warm startup
+        if args.measure_runs > 0:
+            measure_startup(args.profile, runs=args.measure_runs)
+        
+        # Step 7: Create distribution info
+        create_distribution_info(args.profile)
         
         print("\n[SUCCESS] Build completed successfully!")
-        print("Executable location: dist/0xDownloader.exe")
+        print(f"Executable location: {get_executable_path(args.profile)}")
         print("Documentation: dist/README.txt")
         print("\nYou can now distribute the contents of the 'dist' folder.")
         
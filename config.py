@@ -26,6 +26,16 @@ def _get_windows_downloads_dir() -> str:
 
 DEFAULT_OUTPUT_DIR = _get_windows_downloads_dir()
 
+# Per-user cache (ffmpeg capability probe and other derived data)
+def _get_cache_dir() -> str:
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return os.path.join(base, "0xDownloader", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return os.path.join(base, "0xDownloader")
+
+CACHE_DIR = _get_cache_dir()
+
 # UI Configuration
 THUMBNAIL_HEIGHT = 110
 THUMBNAIL_WIDTH = int(THUMBNAIL_HEIGHT * 16 / 9)  # Maintain 16:9 aspect ratio
@@ -34,11 +44,21 @@ THUMBNAIL_WIDTH = int(THUMBNAIL_HEIGHT * 16 / 9)  # Maintain 16:9 aspect ratio
 VIDEO_LIST_WIDTH = 980
 VIDEO_LIST_HEIGHT = 550
 
+# Bulk import: rows are created in per-frame batches so the window stays responsive
+ROW_FRAME_BUDGET_MS = 12       # Main-loop time spent creating rows per frame
+ROW_FRAME_INTERVAL_MS = 16     # Delay between two batches (lets Tk redraw)
+IMPORT_CHUNK = 200             # Validated URLs handed to the UI at a time
+INFO_FETCH_WORKERS = 6         # Concurrent video info fetches
+
 # Localization
 LOCALES_DIR = "locales"
 LANGUAGE_FILE = "locales/lang.json"
 LOCALES_FILE = "locales/locales.json"
 
+# Local JSON-RPC API (single-instance handoff and daemon mode)
+RPC_HOST = "127.0.0.1"
+RPC_PORT = 47813
+
 # Links
 OSCAR_WEBSITE = "https://oscarrc.me"
 KO_FI_LINK = "https://ko-fi.com/oscarrc"
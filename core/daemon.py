@@ -0,0 +1,297 @@
+"""
+Headless download service for the YouTube Downloader application.
+
+Runs the same core pipeline as the GUI (fetch info, estimate, schedule,
+download) without Tk, and exposes it through the local JSON-RPC API.
+"""
+
+import collections
+import itertools
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DEFAULT_OUTPUT_DIR, RPC_HOST, RPC_PORT
+from core.localization import localization
+
+
+class EventLog:
+    """Bounded, sequenced log of job events that clients can follow."""
+
+    def __init__(self, maxlen=10000):
+        self._events = collections.deque(maxlen=maxlen)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def publish(self, event):
+        with self._cond:
+            self._seq += 1
+            event["seq"] = self._seq
+            event["time"] = time.time()
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def since(self, seq, timeout=0):
+        """Events after seq, waiting up to timeout seconds for new ones."""
+        with self._cond:
+            if timeout and self._seq <= seq:
+                self._cond.wait(timeout)
+            return [event for event in self._events if event["seq"] > seq]
+
+    def stream(self, seq=0):
+        """Yield events after seq forever (until the consumer stops)."""
+        while True:
+            events = self.since(seq, timeout=15)
+            if not events:
+                # Keep-alive so clients can detect a dead connection
+                yield {"type": "heartbeat", "seq": seq}
+            for event in events:
+                seq = event["seq"]
+                yield event
+
+
+class DownloadService:
+    """Queue of downloads driven by URLs and plain option values."""
+
+    PUBLIC_FIELDS = ("id", "url", "title", "state", "percent", "status", "error", "output_dir", "estimated_size")
+
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR):
+        self.output_dir = output_dir
+        self.events = EventLog()
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._info_executor = ThreadPoolExecutor(max_workers=4)
+
+    def _public(self, record):
+        return {key: record.get(key) for key in self.PUBLIC_FIELDS}
+
+    def _update(self, record, **changes):
+        with self._lock:
+            record.update(changes)
+            event = {"type": "job", **self._public(record)}
+        self.events.publish(event)
+
+    def _get(self, job_id):
+        with self._lock:
+            record = self._jobs.get(int(job_id))
+        if record is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        return record
+
+    def enqueue(self, url, output_dir=None, format="mp4", resolution="best", audio="default",
+                subtitles=None, sections=""):
+        """
+        Queue a URL for download.
+
+        Args:
+            url: Video URL
+            output_dir: Destination folder inside the service's folder (absolute
+                or relative to it); defaults to the service's folder
+            format: Output container or audio-only format (mp4, webm, mp3, m4a...)
+            resolution: "best" or a height such as "720p"
+            audio: Audio language name/code or "default"
+            subtitles: Subtitle language name/code, or None for no subtitles
+            sections: Optional clip selection ("1:00-3:00, Intro")
+
+        Returns:
+            The new job id
+        """
+        from core.utils import is_valid_url, resolve_inside
+
+        if not is_valid_url(url):
+            raise ValueError("invalid_url")
+        # Clients can't have files written outside the service's folder
+        output_dir = resolve_inside(self.output_dir, output_dir)
+        if output_dir is None:
+            raise ValueError("invalid_output_dir")
+
+        record = {
+            "id": next(self._ids),
+            "url": url.strip(),
+            "title": None,
+            "state": "fetching",
+            "percent": 0,
+            "status": None,
+            "error": None,
+            "output_dir": output_dir,
+            "estimated_size": None,
+            "selections": {
+                "resolution": resolution,
+                "format": format,
+                "audio": audio,
+                "subtitles": subtitles or localization.get("formats.no_subtitles", "No subtitles"),
+                "sections": sections or "",
+            },
+            "job": None,
+        }
+        with self._lock:
+            self._jobs[record["id"]] = record
+        self.events.publish({"type": "job", **self._public(record)})
+        self._info_executor.submit(self._prepare, record)
+        return record["id"]
+
+    def _prepare(self, record):
+        """Fetch info, estimate the size and hand the job to the scheduler."""
+        try:
+            from core.downloader import estimate_download_size
+            from core.models import EntryRecord
+            from core.scheduler import download_scheduler
+
+            entry = EntryRecord.fetch(record["url"], record["selections"])
+        except Exception as e:
+            self._update(record, state="failed", error=str(e))
+            return
+
+        estimated_size = estimate_download_size(entry, record["selections"])
+        self._update(record, title=entry.title, estimated_size=estimated_size)
+
+        # Submitted and recorded under the lock, so a cancel either marks the
+        # record cancelled before this point or finds the job
+        with self._lock:
+            if record["state"] == "cancelled":
+                return
+            try:
+                record["job"] = download_scheduler.submit(
+                    lambda job: self._run(record, entry, job), record["output_dir"], estimated_size
+                )
+            except Exception as e:
+                error = str(e)
+            else:
+                error = None
+        if error is not None:
+            self._update(record, state="failed", error=error)
+            return
+        with self._lock:
+            # The job may already have started on a free worker
+            still_fetching = record["state"] == "fetching"
+        if still_fetching:
+            self._update(record, state="queued")
+
+    def _run(self, record, entry, job):
+        from core.workers import run_download
+
+        self._update(record, state="running")
+        last_percent = [None]
+
+        def progress_callback(percent, status_text):
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self._update(record, percent=percent, status=status_text)
+
+        def status_callback(status_text):
+            self._update(record, status=status_text)
+
+        try:
+            run_download(entry, record["output_dir"], progress_callback, status_callback, job)
+        except Exception as e:
+            if str(e) in ("cancelled", "paused"):
+                self._update(record, state=str(e))
+            elif str(e) == "deferred":
+                self._update(record, state="queued")  # Runs again once its retry is due
+            else:
+                self._update(record, state="failed", error=str(e))
+            raise
+        self._update(record, state="finished", percent=100)
+
+    def status(self, job_id):
+        """Get a job's public state."""
+        return self._public(self._get(job_id))
+
+    def list(self):
+        """Get all jobs' public state."""
+        with self._lock:
+            return [self._public(record) for record in self._jobs.values()]
+
+    def cancel(self, job_id):
+        """Cancel a job and delete its partial files."""
+        from core.downloader import cancel_download
+
+        record = self._get(job_id)
+        with self._lock:
+            job = record["job"]
+            # Checked and set together: _prepare submits only while still fetching
+            event = None
+            if job is None and record["state"] == "fetching":
+                record["state"] = "cancelled"
+                event = {"type": "job", **self._public(record)}
+        if job is None:
+            if event is not None:
+                self.events.publish(event)
+            return self.status(job_id)
+        cancel_download(job)
+        if job.state == "cancelled":
+            self._update(record, state="cancelled")
+        return self.status(job_id)
+
+    def pause(self, job_id):
+        """Pause a queued or running job."""
+        from core.scheduler import download_scheduler
+
+        record = self._get(job_id)
+        if record["job"] is not None:
+            download_scheduler.pause(record["job"])
+            if record["job"].state == "paused":
+                self._update(record, state="paused")
+        return self.status(job_id)
+
+    def resume(self, job_id):
+        """Resume a paused job."""
+        from core.scheduler import download_scheduler
+
+        record = self._get(job_id)
+        if record["job"] is not None and record["job"].state == "paused":
+            download_scheduler.resume(record["job"])
+            self._update(record, state="queued")
+        return self.status(job_id)
+
+    def wait_events(self, since=0, timeout=30):
+        """Long-poll for job events after the given sequence number."""
+        return self.events.since(int(since), timeout=min(float(timeout), 60))
+
+    def get_methods(self):
+        """JSON-RPC method table."""
+        return {
+            "ping": lambda: {"mode": "daemon"},
+            "enqueue": self.enqueue,
+            "status": self.status,
+            "list": self.list,
+            "cancel": self.cancel,
+            "pause": self.pause,
+            "resume": self.resume,
+            "events": self.wait_events,
+            "show": lambda: None,
+        }
+
+
+def run_daemon(output_dir=DEFAULT_OUTPUT_DIR, urls=()):
+    """
+    Run the headless service until interrupted.
+
+    Returns:
+        Process exit code
+    """
+    from core.metrics import metrics_recorder
+    from core.rpc import start_server
+
+    service = DownloadService(output_dir)
+    server = start_server(service.get_methods(), service.events.stream, metrics_text=metrics_recorder.prometheus_text)
+    if server is None:
+        print(f"[ERROR] Another instance is already listening on {RPC_HOST}:{RPC_PORT}")
+        return 1
+
+    for url in urls:
+        try:
+            service.enqueue(url)
+        except ValueError as e:
+            print(f"[ERROR] Could not queue {url}: {e}")
+
+    print(f"0xDownloader daemon listening on http://{RPC_HOST}:{RPC_PORT}/ (output: {output_dir})")
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    while not stop.is_set():
+        stop.wait(1)
+    server.shutdown()
+    return 0
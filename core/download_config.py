@@ -2,7 +2,6 @@
 Download configuration and settings for the YouTube Downloader application.
 """
 
-import os
 from pathlib import Path
 
 
@@ -21,6 +20,28 @@ class DownloadConfig:
             "fragment_retries": 3,
             "concurrent_fragment_downloads": 4,
             
+            # Scheduling settings
+            "max_concurrent_downloads": 4,
+            "worker_mode": "thread",  # "thread" or "process" (isolated worker processes)
+            "queue_policy": "sjf",  # "sjf" (shortest job first) or "fifo"
+            "sjf_aging_seconds": 300,  # Waiting this long halves a job's effective size
+            "free_space_margin": 1.1,  # Multiplier on estimated size when admitting a job
+            "min_free_space": 100 * 1024 * 1024,  # Bytes always left free on the target disk
+            
+            # Staging (see core.staging): download and post-process in a scratch
+            # directory on a fast local disk, then move finished files to the
+            # output folder in the background; off unless a directory is set
+            "staging_dir": None,
+            "staging_max_bytes": 20 * 1024 ** 3,  # Scratch bytes reserved or waiting to move
+            "staging_move_workers": 2,
+            
+            # yt-dlp write options by storage kind of the directory written to
+            "write_tuning": {
+                "local": {"buffersize": 64 * 1024, "noresizebuffer": False, "http_chunk_size": None},
+                # Fixed large blocks: fewer, bigger writes over SMB/NFS
+                "network": {"buffersize": 1024 * 1024, "noresizebuffer": True, "http_chunk_size": 10 * 1024 * 1024},
+            },
+            
             # Quality settings
             "prefer_free_formats": True,
             "write_metadata": True,
@@ -36,20 +57,32 @@ class DownloadConfig:
             "write_description": False,
             "write_annotations": False,
             
+            # Partial downloads: cut on the nearest keyframes (stream copy)
+            # instead of re-encoding around the exact cut points
+            "force_keyframes_at_cuts": False,
+            
+            # Metrics (see core.metrics): JSONL log of every download attempt
+            # and a Prometheus textfile, both off unless a path is set
+            "metrics_log": None,
+            "metrics_textfile": None,
+            
+            # Integrity (see core.integrity): digests computed while files are
+            # written, e.g. ["sha256"] or ["xxh64"] (needs the xxhash package),
+            # kept in the metrics record and in <file>.<algorithm> sidecars
+            "integrity_digests": [],
+            "integrity_sidecars": True,
+            
             # Subtitle settings
             "write_automatic_sub": True,
             "subtitle_format": "srt",
             
-            # Post-processing
+            # Post-processing (tags and cover art are written in place by
+            # core.postprocessors.MetadataEmbedPP after these run)
             "postprocessors": [
                 {
                     'key': 'FFmpegThumbnailsConvertor',
                     'format': 'jpg',
                 },
-                {
-                    'key': 'EmbedThumbnail',
-                    'already_have_thumbnail': False,
-                }
             ]
         }
     
@@ -70,12 +103,13 @@ class DownloadConfig:
         """Validate the current configuration."""
         errors = []
         
-        # Check FFmpeg paths
-        ffmpeg_path, ffprobe_path = self.get_ffmpeg_paths()
-        if not os.path.exists(ffmpeg_path):
-            errors.append(f"FFmpeg not found at: {ffmpeg_path}")
-        if not os.path.exists(ffprobe_path):
-            errors.append(f"FFprobe not found at: {ffprobe_path}")
+        # Check FFmpeg (probed once and cached per binary)
+        from core.ffmpeg import probe_ffmpeg
+        capabilities = probe_ffmpeg()
+        if not capabilities["available"]:
+            errors.append(f"FFmpeg not found at: {capabilities['path']}")
+        if not capabilities["ffprobe_available"]:
+            errors.append(f"FFprobe not found at: {capabilities['ffprobe_path']}")
         
         # Check numeric values
         if not isinstance(self.config["socket_timeout"], (int, float)) or self.config["socket_timeout"] <= 0:
@@ -87,6 +121,9 @@ class DownloadConfig:
         if not isinstance(self.config["concurrent_fragment_downloads"], int) or self.config["concurrent_fragment_downloads"] <= 0:
             errors.append("concurrent_fragment_downloads must be a positive integer")
         
+        from core.integrity import validate_algorithms
+        errors.extend(validate_algorithms(self.config["integrity_digests"]))
+        
         return len(errors) == 0, errors
 
 
@@ -2,38 +2,69 @@
 Download logic and progress tracking for the YouTube Downloader application.
 """
 
+import glob
 import os
-import sys
-import yt_dlp
-from pathlib import Path
+import re
+import threading
 from core.utils import find_language_code_by_name
 from core.localization import localization
 from core.download_config import download_config
 
 
 def get_ffmpeg_path():
-    """Get the path to the local ffmpeg executable."""
-    # Get the directory where the script is located
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        base_path = Path(sys._MEIPASS)
-    else:
-        # Running as script
-        base_path = Path(__file__).parent.parent
+    """Get the paths of the ffmpeg and ffprobe executables (resolved once)."""
+    from core.ffmpeg import find_ffmpeg
+    return find_ffmpeg()
+
+
+# Audio-only targets: FFmpegExtractAudio codec (or "source>codec" mapping) and
+# the source filters whose streams can be copied into the target container
+# without transcoding. Ogg takes Opus as well as Vorbis: Opus streams (YouTube's
+# webm audio) are copied into an Ogg .opus file instead of being re-encoded.
+AUDIO_TARGETS = {
+    "mp3": ("mp3", ["[acodec^=mp3]"]),
+    "aac": ("aac", ["[acodec^=mp4a]"]),
+    "m4a": ("m4a", ["[ext=m4a]", "[acodec^=mp4a]"]),
+    "ogg": ("webm>opus/opus>opus/vorbis", ["[acodec=opus]", "[acodec=vorbis]"]),
+    "wav": ("wav", []),
+    "flac": ("flac", ["[acodec=flac]"]),
+}
+
+
+def is_audio_format(selected_format):
+    """Check whether the selected output format is an audio-only target."""
+    return selected_format in AUDIO_TARGETS
+
+
+def create_audio_format_string(selected_format, selected_audio):
+    """Create yt-dlp format string for an audio-only download.
     
-    ffmpeg_path = base_path / "ffmpeg" / "ffmpeg.exe"
-    ffprobe_path = base_path / "ffmpeg" / "ffprobe.exe"
+    Audio-only streams whose codec already matches the target are preferred
+    so post-processing is a stream copy; any other audio-only stream is
+    transcoded. Muxed formats are only used when no audio-only stream exists.
+    Without an encoder for the target (ogg without libvorbis) only streams
+    that can be copied are selected.
+    """
+    from core.ffmpeg import can_transcode_audio
     
-    # Check if ffmpeg exists
-    if ffmpeg_path.exists() and ffprobe_path.exists():
-        return str(ffmpeg_path), str(ffprobe_path)
-    else:
-        # Fallback to system ffmpeg
-        return "ffmpeg", "ffprobe"
+    _, copy_filters = AUDIO_TARGETS[selected_format]
+    transcode = can_transcode_audio(selected_format)
+    filters = copy_filters + [""] if transcode else copy_filters
+    
+    alternatives = []
+    if selected_audio != "default":
+        alternatives.extend(f"bestaudio{f}[language={selected_audio}]" for f in filters)
+    alternatives.extend(f"bestaudio{f}" for f in filters)
+    if transcode:
+        alternatives.append("best")
+    return "/".join(alternatives)
 
 
 def create_ydl_format_string(selected_resolution, selected_format, selected_audio):
     """Create yt-dlp format string based on user selections."""
+    if is_audio_format(selected_format):
+        return create_audio_format_string(selected_format, selected_audio)
+    
     if selected_resolution.startswith("best"):
         # For "best" resolution, use format and audio-specific best
         if selected_audio == "default":
@@ -51,21 +82,181 @@ def create_ydl_format_string(selected_resolution, selected_format, selected_audi
     return ydl_format
 
 
-def download_video(entry, output_dir, progress_callback=None, status_callback=None, completion_callback=None):
+def parse_download_sections(text):
+    """
+    Parse a clip selection into yt-dlp chapter patterns and time ranges.
+    
+    The text is a comma-separated list where each item is either a time
+    range ("1:00-3:30", "90-", "-2:00") or part of a chapter title
+    ("Intro"). Returns (chapter_patterns, ranges) or None when empty.
+    """
+    if not text or not text.strip():
+        return None
+    
+    from yt_dlp.utils import parse_duration
+    
+    chapters = []
+    ranges = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        start_text, sep, end_text = item.partition("-")
+        if sep and re.fullmatch(r"[\d:.hms ]*", start_text + end_text):
+            start = parse_duration(start_text.strip()) if start_text.strip() else 0
+            end = parse_duration(end_text.strip()) if end_text.strip() else float("inf")
+            if start is None or end is None or end <= start:
+                raise Exception("invalid_sections")
+            ranges.append((start, end))
+        else:
+            chapters.append(re.compile(re.escape(item), re.IGNORECASE))
+    
+    if not chapters and not ranges:
+        return None
+    return chapters, ranges
+
+
+def _resolve_audio_code(selected_audio_display):
+    """Map an audio display name back to its language/locale code."""
+    if selected_audio_display == "default":
+        return "default"
+    return find_language_code_by_name(selected_audio_display)
+
+
+def get_format_size(fmt, duration=None):
+    """Get a format's size in bytes from filesize, filesize_approx or bitrate."""
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    tbr = fmt.get("tbr")
+    if not size and tbr and duration:
+        size = tbr * 1000 / 8 * duration
+    return size
+
+
+def _pick_best(formats, *predicates):
+    """Return the best format (yt-dlp orders worst to best) matching the first satisfiable predicate."""
+    for predicate in predicates:
+        matches = [f for f in formats if predicate(f)]
+        if matches:
+            return matches[-1]
+    return None
+
+
+def _sections_fraction(sections, duration, chapters):
+    """Fraction of the video covered by a parsed clip selection."""
+    if not sections or not duration:
+        return 1.0
+    chapter_patterns, ranges = sections
+    covered = 0.0
+    for start, end in ranges:
+        covered += max(0.0, min(end, duration) - max(start, 0))
+    for title, start_time, end_time in chapters or ():
+        if any(pattern.search(title) for pattern in chapter_patterns):
+            covered += max(0.0, end_time - start_time)
+    return min(1.0, covered / duration) if covered else 1.0
+
+
+def estimate_download_size(entry, selections):
+    """
+    Estimate the bytes a download will write from an entry's format summaries.
+    
+    Mirrors the format selection in create_ydl_format_string. Returns None
+    when the formats carry no size or bitrate information.
+    """
+    formats = entry.formats
+    duration = entry.duration
+    selected_format = selections["format"]
+    selected_audio = _resolve_audio_code(selections["audio"])
+    
+    def has_audio(f):
+        return f.get("acodec") not in (None, "none")
+    
+    def has_video(f):
+        return f.get("vcodec") not in (None, "none")
+    
+    def language_ok(f):
+        return selected_audio == "default" or f.get("language") == selected_audio
+    
+    if is_audio_format(selected_format):
+        audio_only = [f for f in formats if has_audio(f) and not has_video(f)]
+        chosen = _pick_best(audio_only, language_ok, lambda f: True) or _pick_best(formats, has_audio)
+    else:
+        muxed = [f for f in formats if has_audio(f) and has_video(f)]
+        resolution = selections["resolution"]
+        height = None if resolution.startswith("best") else int(resolution.replace("p", ""))
+        
+        def height_ok(f):
+            return height is None or (f.get("height") or 0) <= height
+        
+        chosen = _pick_best(
+            muxed,
+            lambda f: height_ok(f) and f.get("ext") == selected_format and language_ok(f),
+            lambda f: height_ok(f) and f.get("ext") == selected_format,
+            height_ok,
+            lambda f: f.get("ext") == selected_format,
+            lambda f: True,
+        )
+    
+    if not chosen:
+        return None
+    size = get_format_size(chosen, duration)
+    if not size:
+        return None
+    
+    try:
+        sections = parse_download_sections(selections.get("sections"))
+    except Exception:
+        sections = None
+    return int(size * _sections_fraction(sections, duration, entry.chapters))
+
+
+def download_video(entry, output_dir, progress_callback=None, status_callback=None, completion_callback=None, job=None):
     """
     Download a video with the specified options using enhanced yt-dlp configuration.
     
     Args:
-        entry: Video entry dictionary with user selections
+        entry: EntryRecord with url and selections; the attempt's timings
+            and transfer figures go to entry.metrics
         output_dir: Output directory for the download
         progress_callback: Function to call with progress updates (percent, status)
         status_callback: Function to call with status updates
         completion_callback: Function to call when download completes
+        job: Scheduler job to report written bytes to and to check for
+            cancel/pause requests, if scheduled
+    
+    Raises:
+        Exception("cancelled") or Exception("paused") when the job was stopped
     """
+    # yt-dlp is imported on first download so the window can appear without it
+    import yt_dlp
+    from core.ffmpeg import VIDEO_MUXERS, has_muxer
+    from core.integrity import DownloadDigests
+    from core.postprocessors import MetadataEmbedPP, SubtitlesConvertorPP
+    from core.retry import classify_error, retry_engine
+    from core.sessions import session_pool
+    from core.staging import write_options
+    
+    def check_stop():
+        """Unwind yt-dlp at the next hook once cancel or pause is requested."""
+        if job is not None and job.should_stop():
+            raise yt_dlp.utils.DownloadCancelled()
+    
+    metrics = entry.metrics
+    metrics.start_attempt(job)
+    
     def progress_hook(d):
         """Enhanced progress hook for yt-dlp with better status reporting."""
+        check_stop()
+        metrics.on_progress(d)
+        if digests is not None:
+            digests.on_progress(d)
+        if job is not None:
+            job.record_file(d.get('tmpfilename'))
+            if d.get('downloaded_bytes') is not None:
+                job.record_progress(d.get('filename'), d['downloaded_bytes'],
+                                    d.get('total_bytes') or d.get('total_bytes_estimate'))
+        
         if d['status'] == 'downloading':
-            downloading_text = f"⏳ {localization.get('video.downloading', 'Downloading...')}"
+            downloading_text = localization.status("downloading")
             if 'total_bytes' in d and d['total_bytes']:
                 percent = int(d['downloaded_bytes'] * 100 / d['total_bytes'])
                 if progress_callback:
@@ -75,27 +266,34 @@ def download_video(entry, output_dir, progress_callback=None, status_callback=No
                 if progress_callback:
                     progress_callback(percent, downloading_text)
         elif d['status'] == 'finished':
-            completed_text = f"✅ {localization.get('video.completed', 'Completed')}"
+            completed_text = localization.status("completed")
             if progress_callback:
                 progress_callback(100, completed_text)
             if completion_callback:
                 completion_callback()
         elif d['status'] == 'error':
-            error_text = f"❌ {localization.get('video.error', 'Error')}: {d.get('error', 'Unknown error')}"
+            error_text = f"{localization.status('error')}: {d.get('error', 'Unknown error')}"
             if status_callback:
                 status_callback(error_text)
     
-    # Get the selected options
-    selected_resolution = entry["res_var"].get()
-    selected_format = entry["format_var"].get()
-    selected_audio_display = entry["audio_var"].get()
-    subtitle_lang = entry["subs_var"].get()
+    def postprocessor_hook(d):
+        """Stop between post-processing steps and track the files they write."""
+        metrics.on_postprocessor(d)
+        if digests is not None:
+            digests.on_postprocessor(d)
+        check_stop()
+        if job is not None and d.get('status') == 'finished':
+            job.record_file((d.get('info_dict') or {}).get('filepath'))
+    
+    # Selected options, snapshotted when the job was queued
+    selections = entry.selections
+    selected_resolution = selections["resolution"]
+    selected_format = selections["format"]
+    subtitle_lang = selections["subtitles"]
+    sections_text = selections["sections"]
     
     # Extract audio locale/language code from display name using unified resolver
-    if selected_audio_display == "default":
-        selected_audio = "default"
-    else:
-        selected_audio = find_language_code_by_name(selected_audio_display)
+    selected_audio = _resolve_audio_code(selections["audio"])
     
     # Create yt-dlp format string
     ydl_format = create_ydl_format_string(selected_resolution, selected_format, selected_audio)
@@ -103,6 +301,15 @@ def download_video(entry, output_dir, progress_callback=None, status_callback=No
     # Get configuration
     config = download_config.get_config()
     ffmpeg_path, ffprobe_path = get_ffmpeg_path()
+    retry_sleep = retry_engine.sleep_function(entry.url, job.should_stop if job is not None else None)
+    
+    # Hash files while they are written, unless post-processing rewrites them
+    # anyway (tags, cover art, audio extraction): then only the final file is hashed
+    digests = None
+    if config["integrity_digests"]:
+        rewrites = config["write_metadata"] or config["embed_thumbnails"] or is_audio_format(selected_format)
+        digests = DownloadDigests(config["integrity_digests"], sidecars=config["integrity_sidecars"],
+                                  stream=not rewrites)
     
     # Enhanced yt-dlp options following best practices
     ydl_opts = {
@@ -110,6 +317,7 @@ def download_video(entry, output_dir, progress_callback=None, status_callback=No
         "format": ydl_format,
         "outtmpl": os.path.join(output_dir, config["output_template"]),
         "progress_hooks": [progress_hook],
+        "postprocessor_hooks": [postprocessor_hook],
         
         # FFmpeg integration
         "ffmpeg_location": ffmpeg_path,
@@ -118,7 +326,12 @@ def download_video(entry, output_dir, progress_callback=None, status_callback=No
         "socket_timeout": config["socket_timeout"],
         "retries": config["retries"],
         "fragment_retries": config["fragment_retries"],
-        "retry_sleep_functions": {"http": lambda n: min(4 ** n, 60)},
+        # Short jittered backoff; an open circuit breaker ends the attempt instead
+        "retry_sleep_functions": {
+            "http": metrics.retry_counter(retry_sleep),
+            "fragment": metrics.retry_counter(retry_sleep),
+            "extractor": metrics.retry_counter(retry_sleep),
+        },
         
         # Quality and format options
         "prefer_free_formats": config["prefer_free_formats"],
@@ -154,6 +367,19 @@ def download_video(entry, output_dir, progress_callback=None, status_callback=No
         "playlist_items": None,
     }
     
+    # Buffer and chunk sizes suited to the disk written to (local or network)
+    ydl_opts.update(write_options(output_dir))
+    
+    # Only fetch the selected clip/chapters. yt-dlp requests just the covering
+    # fragments for HLS/DASH and seeks with byte ranges on progressive files
+    sections = parse_download_sections(sections_text)
+    if sections:
+        chapters, ranges = sections
+        ydl_opts.update({
+            "download_ranges": yt_dlp.utils.download_range_func(chapters, ranges),
+            "force_keyframes_at_cuts": config["force_keyframes_at_cuts"],
+        })
+    
     # Add subtitle options if selected
     no_subtitles_text = localization.get("formats.no_subtitles", "No subtitles")
     if subtitle_lang != no_subtitles_text:
@@ -161,45 +387,100 @@ def download_video(entry, output_dir, progress_callback=None, status_callback=No
         ydl_opts.update({
             "writesubtitles": True,
             "subtitleslangs": [subtitle_code],
-            "subtitlesformat": "best",
+            # Prefer text formats the in-process converter can read
+            "subtitlesformat": "vtt/srt/best",
             "writeautomaticsub": config["write_automatic_sub"],
         })
-        
-        # Add subtitle post-processor
+    
+    # Extract audio (stream copy when the codec already matches the target)
+    if is_audio_format(selected_format):
         ydl_opts["postprocessors"].append({
-            'key': 'FFmpegSubtitlesConvertor',
-            'format': config["subtitle_format"],
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': AUDIO_TARGETS[selected_format][0],
         })
     
-    # Add post-processing for audio/video merging if needed
-    if selected_format in ['mp4', 'mkv', 'webm']:
+    # Add post-processing for audio/video merging if needed (and possible)
+    elif selected_format in VIDEO_MUXERS and has_muxer(VIDEO_MUXERS[selected_format]):
         ydl_opts["postprocessors"].append({
             'key': 'FFmpegVideoConvertor',
             'preferedformat': selected_format,
         })
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        # Reuse a warm session (open connections, extractor and player caches)
+        with session_pool.session(ydl_opts) as ydl:
+            # Convert subtitles in-process instead of spawning ffmpeg per track
+            if ydl_opts.get("writesubtitles"):
+                ydl.add_post_processor(
+                    SubtitlesConvertorPP(ydl, format=config["subtitle_format"]),
+                    when="before_dl"
+                )
+            
+            # Write tags and cover art in place once the final file exists
+            if config["write_metadata"] or config["embed_thumbnails"]:
+                ydl.add_post_processor(
+                    MetadataEmbedPP(
+                        ydl,
+                        add_metadata=config["write_metadata"],
+                        embed_thumbnail=config["embed_thumbnails"]
+                    ),
+                    when="post_process"
+                )
+            
             # Add error handling for specific download errors
             try:
-                ydl.download([entry["url"]])
+                check_stop()
+                ydl.download([entry.url])
+                if digests is not None:
+                    metrics.digests = digests.finish()
+            except yt_dlp.utils.DownloadCancelled:
+                if job is not None and job.cancelled:
+                    cleanup_job_files(job)
+                    raise Exception("cancelled")
+                raise Exception("paused")
             except yt_dlp.utils.DownloadError as e:
-                error_msg = str(e).lower()
-                if "sign in" in error_msg or "private" in error_msg:
-                    raise Exception("access_denied")
-                elif "unavailable" in error_msg or "not found" in error_msg:
-                    raise Exception("video_not_found")
-                elif "network" in error_msg or "connection" in error_msg:
-                    raise Exception("network_error")
-                else:
-                    raise Exception("download_error")
+                # Retried (or not) by core.workers.run_download according to the code
+                raise Exception(classify_error(e))
     except Exception as e:
-        if status_callback:
-            error_text = f"❌ {localization.get('video.error', 'Error')}: {str(e)}"
+        if status_callback and str(e) not in ("cancelled", "paused"):
+            error_text = f"{localization.status('error')}: {str(e)}"
             status_callback(error_text)
         raise e
 
 
+def cancel_download(job):
+    """Cancel a scheduled download and remove its partial files."""
+    from core.scheduler import download_scheduler
+    
+    # Running jobs clean up after themselves once they unwind; a paused or
+    # queued one (which may be waiting to retry) can have partial files and
+    # a parked staging directory left for us to remove here
+    was_waiting = job.state in ("paused", "queued")
+    if not download_scheduler.cancel(job) and was_waiting:
+        threading.Thread(target=cleanup_job_files, args=(job,), daemon=True).start()
+
+
+def cleanup_job_files(job):
+    """Delete the partial, fragment and intermediate files a stopped job left behind."""
+    from core.staging import staging_area
+    
+    # A paused staged job also holds a scratch directory and its reservation
+    staging_area.discard(job)
+    candidates = set()
+    for path in job.files:
+        candidates.update((path, path + ".part", path + ".ytdl"))
+        candidates.update(glob.glob(glob.escape(path) + "*-Frag*"))
+    
+    for path in candidates:
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+        except OSError:
+            pass
+    job.files.clear()
+    job.file_bytes.clear()
+
+
 def get_download_config():
     """Get download configuration with best practices."""
     ffmpeg_path, ffprobe_path = get_ffmpeg_path()
@@ -220,30 +501,15 @@ def get_download_config():
 
 
 def validate_ffmpeg():
-    """Validate that ffmpeg is working correctly."""
-    ffmpeg_path, ffprobe_path = get_ffmpeg_path()
+    """Validate that ffmpeg is working correctly (uses the cached probe)."""
+    from core.ffmpeg import probe_ffmpeg
     
-    try:
-        import subprocess
-        # Test ffmpeg
-        result = subprocess.run([ffmpeg_path, "-version"], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode != 0:
-            return False, "FFmpeg test failed"
-        
-        # Test ffprobe
-        result = subprocess.run([ffprobe_path, "-version"], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode != 0:
-            return False, "FFprobe test failed"
-            
-        return True, "FFmpeg and FFprobe are working correctly"
-    except subprocess.TimeoutExpired:
-        return False, "FFmpeg validation timed out"
-    except FileNotFoundError:
-        return False, "FFmpeg not found in system PATH"
-    except Exception as e:
-        return False, f"FFmpeg validation error: {str(e)}"
+    capabilities = probe_ffmpeg()
+    if not capabilities["available"]:
+        return False, f"FFmpeg not found or not working: {capabilities['path']}"
+    if not capabilities["ffprobe_available"]:
+        return False, f"FFprobe not found at: {capabilities['ffprobe_path']}"
+    return True, f"FFmpeg {capabilities['version']} and FFprobe are working correctly"
 
 
 def get_supported_formats():
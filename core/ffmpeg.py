@@ -0,0 +1,214 @@
+"""
+FFmpeg discovery and capability probe for the YouTube Downloader application.
+
+The ffmpeg binary is located once per process and probed once per binary:
+version, muxers, encoders and thread support are read from ffmpeg's own
+listings and cached on disk keyed by the binary's path, mtime and size, so
+later launches reuse the result without spawning ffmpeg again.
+"""
+
+import functools
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from config import CACHE_DIR
+
+
+# Bumped whenever the cached probe layout changes
+PROBE_VERSION = 1
+PROBE_FILE = "ffmpeg_probe.json"
+
+# (encoder, muxer) each audio-only target needs when transcoding. Ogg needs
+# no encoder for the Opus and Vorbis sources it copies (YouTube's usual audio)
+AUDIO_REQUIREMENTS = {
+    "mp3": ("libmp3lame", "mp3"),
+    "aac": ("aac", "adts"),
+    "m4a": ("aac", "ipod"),
+    "ogg": (None, "ogg"),
+    "wav": ("pcm_s16le", "wav"),
+    "flac": ("flac", "flac"),
+}
+
+# Encoders targets without a required one use for sources they can't copy
+AUDIO_FALLBACK_ENCODERS = {
+    "ogg": "libvorbis",
+}
+
+# (encoder, muxer) for subtitle formats converted through ffmpeg
+SUBTITLE_REQUIREMENTS = {
+    "srt": ("srt", "srt"),
+    "vtt": ("webvtt", "webvtt"),
+    "ass": ("ass", "ass"),
+    "ssa": ("ssa", "ass"),
+}
+
+# Muxer behind each video container yt-dlp converts to
+VIDEO_MUXERS = {"mp4": "mp4", "mkv": "matroska", "webm": "webm"}
+
+_probe = None
+_probe_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def find_ffmpeg():
+    """
+    Locate ffmpeg and ffprobe once per process.
+
+    The copies bundled next to the application win; otherwise the ones on
+    PATH are used.
+
+    Returns:
+        (ffmpeg_path, ffprobe_path); bare command names if nothing was found
+    """
+    if getattr(sys, 'frozen', False):
+        base_path = Path(sys._MEIPASS)
+    else:
+        base_path = Path(__file__).parent.parent
+
+    suffix = ".exe" if os.name == "nt" else ""
+    ffmpeg_path = base_path / "ffmpeg" / f"ffmpeg{suffix}"
+    ffprobe_path = base_path / "ffmpeg" / f"ffprobe{suffix}"
+    if ffmpeg_path.exists() and ffprobe_path.exists():
+        return str(ffmpeg_path), str(ffprobe_path)
+
+    return shutil.which("ffmpeg") or "ffmpeg", shutil.which("ffprobe") or "ffprobe"
+
+
+def _run(path, *args):
+    """Run ffmpeg with a listing option and return its stdout."""
+    # Don't flash a console window from the windowed (no console) build
+    flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    result = subprocess.run(
+        [path, "-hide_banner", *args],
+        capture_output=True, text=True, errors="replace", timeout=15, creationflags=flags
+    )
+    if result.returncode != 0:
+        raise OSError(f"ffmpeg {args[0]} exited with code {result.returncode}")
+    return result.stdout
+
+
+def _parse_listing(output, flags_pattern):
+    """Names from a -muxers/-encoders listing (rows after the "--" separator)."""
+    names = set()
+    rows = output.split("--", 1)[-1].splitlines()
+    for row in rows:
+        match = re.match(rf"\s*({flags_pattern})\s+(\S+)", row)
+        if match:
+            names.update(match.group(2).split(","))
+    return sorted(names)
+
+
+def _run_probe(ffmpeg_path):
+    version_output = _run(ffmpeg_path, "-version")
+    version = re.search(r"ffmpeg version (\S+)", version_output)
+    configuration = re.search(r"configuration:(.*)", version_output)
+    configuration = configuration.group(1) if configuration else ""
+
+    return {
+        "available": True,
+        "version": version.group(1) if version else None,
+        "muxers": _parse_listing(_run(ffmpeg_path, "-muxers"), r"D?E[d ]?|\.E"),
+        "encoders": _parse_listing(_run(ffmpeg_path, "-encoders"), r"[VAS][F.][S.][X.][B.][D.]"),
+        "threads": "--disable-pthreads" not in configuration or "--enable-w32threads" in configuration,
+    }
+
+
+def _load_cached(stamp):
+    try:
+        with open(os.path.join(CACHE_DIR, PROBE_FILE), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("stamp") == stamp:
+            return cached["capabilities"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _save_cached(stamp, capabilities):
+    path = os.path.join(CACHE_DIR, PROBE_FILE)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"stamp": stamp, "capabilities": capabilities}, f)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass  # The probe just runs again next launch
+
+
+def probe_ffmpeg(refresh=False):
+    """
+    Get what the ffmpeg build can do, probing it at most once per binary.
+
+    Args:
+        refresh: Ignore the in-memory and on-disk results and probe again
+
+    Returns:
+        dict with path, ffprobe_path, available, version, muxers, encoders
+        and threads. available is False (with empty lists) when ffmpeg is
+        missing or broken.
+    """
+    global _probe
+    if _probe is not None and not refresh:
+        return _probe
+
+    with _probe_lock:
+        if _probe is not None and not refresh:
+            return _probe
+
+        ffmpeg_path, ffprobe_path = find_ffmpeg()
+        capabilities = {"available": False, "version": None, "muxers": [], "encoders": [], "threads": False}
+        try:
+            stat = os.stat(ffmpeg_path)
+        except OSError:
+            stat = None
+
+        if stat is not None:
+            stamp = [PROBE_VERSION, os.path.abspath(ffmpeg_path), stat.st_mtime_ns, stat.st_size]
+            cached = None if refresh else _load_cached(stamp)
+            if cached is not None:
+                capabilities = cached
+            else:
+                try:
+                    capabilities = _run_probe(ffmpeg_path)
+                    _save_cached(stamp, capabilities)
+                except (OSError, subprocess.SubprocessError):
+                    pass
+
+        capabilities = dict(capabilities, path=ffmpeg_path, ffprobe_path=ffprobe_path)
+        capabilities["ffprobe_available"] = os.path.isfile(ffprobe_path)
+        _probe = capabilities
+        return _probe
+
+
+def has_encoder(name):
+    """Check whether ffmpeg was built with an encoder."""
+    return name in probe_ffmpeg()["encoders"]
+
+
+def has_muxer(name):
+    """Check whether ffmpeg can write a container format."""
+    return name in probe_ffmpeg()["muxers"]
+
+
+def supports_audio_format(selected_format):
+    """Check whether ffmpeg can produce an audio-only target (mp3, flac...)."""
+    encoder, muxer = AUDIO_REQUIREMENTS[selected_format]
+    return (encoder is None or has_encoder(encoder)) and has_muxer(muxer)
+
+
+def can_transcode_audio(selected_format):
+    """Check whether ffmpeg can convert any source to an audio target, not just copy matching ones."""
+    encoder = AUDIO_REQUIREMENTS[selected_format][0] or AUDIO_FALLBACK_ENCODERS[selected_format]
+    return has_encoder(encoder)
+
+
+def supports_subtitle_format(subtitle_format):
+    """Check whether ffmpeg can convert subtitles to the given format."""
+    requirement = SUBTITLE_REQUIREMENTS.get(subtitle_format)
+    return requirement is not None and has_encoder(requirement[0]) and has_muxer(requirement[1])
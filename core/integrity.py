@@ -0,0 +1,254 @@
+"""
+Streaming integrity digests for the YouTube Downloader application.
+
+Files are hashed while yt-dlp writes them instead of being read back once
+the download is done. yt-dlp appends to its ``.part`` file sequentially
+and reports progress after each block, so every progress event hashes the
+bytes appended since the previous one, while they are still in the page
+cache. A restarted transfer (the file shrinks, or the byte count goes
+back) starts the digests over.
+
+Post-processing is followed through the post-processor hook. A step that
+only renames or moves the file keeps it byte-identical (same size and
+modification time), so the streamed digests carry over. A step that
+rewrites it (merging, remuxing, tagging in place) changes bytes the
+digests have already consumed, and a digest can't be patched afterwards,
+so such files are not streamed at all: when the caller knows a rewrite
+is coming (``stream=False``, e.g. tags or cover art are embedded, or
+the audio is extracted) and for the format files of a merge, only the
+final file is hashed, once, right after post-processing while it is
+still cached. A streamed file that turns out to have changed anyway is
+hashed again the same way.
+
+Digests are stored in the job's metrics record and, optionally, in one
+sidecar per algorithm next to the file (``video.mp4.sha256``) in the
+format ``sha256sum -c`` / ``xxhsum -c`` read.
+"""
+
+import hashlib
+import os
+import threading
+
+try:
+    import xxhash
+except ImportError:  # Optional: only needed for the xxHash algorithms
+    xxhash = None
+
+
+# Bytes read per read() call
+BLOCK_SIZE = 1024 * 1024
+
+# Minimum growth (bytes) before a progress event triggers hashing
+STREAM_CHUNK = 4 * 1024 * 1024
+
+# xxHash algorithms (from the optional xxhash package)
+XXHASH_ALGORITHMS = ("xxh32", "xxh64", "xxh3_64", "xxh3_128", "xxh128")
+
+
+def available_algorithms():
+    """Names accepted in the integrity_digests setting."""
+    names = set(hashlib.algorithms_available)
+    if xxhash is not None:
+        names.update(XXHASH_ALGORITHMS)
+    return names
+
+
+def new_digest(name):
+    """
+    Create a hash object (update/hexdigest) for an algorithm name.
+
+    Raises:
+        ValueError if the algorithm is unknown or its package is missing
+    """
+    name = name.lower()
+    if name in XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(f"{name} needs the xxhash package (pip install xxhash)")
+        return getattr(xxhash, name)()
+    try:
+        digest = hashlib.new(name)
+    except ValueError:
+        raise ValueError(f"unknown digest algorithm: {name}")
+    if digest.digest_size == 0:  # shake_* need a length
+        raise ValueError(f"unsupported digest algorithm: {name}")
+    return digest
+
+
+def validate_algorithms(names):
+    """Error messages for the algorithm names that can't be used."""
+    errors = []
+    for name in names:
+        try:
+            new_digest(name)
+        except ValueError as e:
+            errors.append(str(e))
+    return errors
+
+
+def _signature(path):
+    """(size, mtime_ns) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def hash_file(path, algorithms):
+    """Hash a whole file in one pass; returns {algorithm: hexdigest}."""
+    digests = {name: new_digest(name) for name in algorithms}
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                break
+            for digest in digests.values():
+                digest.update(block)
+    return {name: digest.hexdigest() for name, digest in digests.items()}
+
+
+class StreamingHasher:
+    """Digests of one file that is being appended to."""
+
+    def __init__(self, algorithms):
+        self.algorithms = tuple(algorithms)
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.reported = 0           # Last byte count the downloader reported
+        self.signature = None       # (size, mtime_ns) once the file is complete
+        self._digests = {name: new_digest(name) for name in self.algorithms}
+
+    def update(self, path):
+        """Hash the bytes appended to path since the last call."""
+        # Reopened every time: an open handle would block yt-dlp's rename on Windows
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.offset:
+                self.reset()    # Truncated: the transfer started over
+            f.seek(self.offset)
+            while self.offset < size:
+                block = f.read(min(BLOCK_SIZE, size - self.offset))
+                if not block:
+                    break
+                for digest in self._digests.values():
+                    digest.update(block)
+                self.offset += len(block)
+
+    def finish(self, path):
+        """Hash the rest of the completed file and remember its signature."""
+        self.update(path)
+        self.signature = _signature(path)
+        return self.hexdigests()
+
+    def hexdigests(self):
+        return {name: digest.hexdigest() for name, digest in self._digests.items()}
+
+
+class DownloadDigests:
+    """
+    Integrity digests of the files of one download attempt.
+
+    Fed by yt-dlp's progress and post-processor hooks (possibly from
+    fragment threads, hence the lock); finish() returns the digests of
+    the final files.
+    """
+
+    def __init__(self, algorithms, sidecars=True, stream=True):
+        self.algorithms = tuple(name.lower() for name in algorithms)
+        self.sidecars = sidecars
+        self.stream = stream        # False when post-processing will rewrite the files
+        self._lock = threading.Lock()
+        self._hashers = {}          # downloaded filename -> StreamingHasher
+        self._finals = {}           # video id -> final file path
+        self.results = {}           # final path -> {algorithm: hexdigest}
+
+    def on_progress(self, d):
+        """Hash newly written bytes from a yt-dlp progress hook dict."""
+        filename = d.get("filename")
+        status = d.get("status")
+        if not filename or status not in ("downloading", "finished"):
+            return
+        downloaded = d.get("downloaded_bytes") or 0
+        info = d.get("info_dict") or {}
+        with self._lock:
+            if status == "finished":
+                self._finals[info.get("id")] = filename
+            # Rewritten or merged later: streaming would only hash intermediate bytes
+            if not self.stream or info.get("requested_formats"):
+                return
+            hasher = self._hashers.get(filename)
+            if hasher is None:
+                hasher = self._hashers[filename] = StreamingHasher(self.algorithms)
+            if status == "downloading":
+                if downloaded < hasher.reported:
+                    hasher.reset()  # Byte count went back: restarted from scratch
+                if downloaded - hasher.offset < STREAM_CHUNK:
+                    hasher.reported = downloaded
+                    return
+                hasher.reported = downloaded
+                path = d.get("tmpfilename") or filename
+            else:
+                # The .part file has been renamed by now
+                path = filename
+            try:
+                if status == "finished":
+                    hasher.finish(path)
+                elif os.path.exists(path):
+                    hasher.update(path)
+            except OSError:
+                hasher.reset()  # Hashed again from the final file if needed
+
+    def on_postprocessor(self, d):
+        """Follow the file a post-processor step leaves behind."""
+        if d.get("status") != "finished":
+            return
+        info = d.get("info_dict") or {}
+        if info.get("filepath"):
+            with self._lock:
+                self._finals[info.get("id")] = info["filepath"]
+
+    def finish(self):
+        """
+        Digests of the final files, writing sidecars if enabled.
+
+        A file identical to a streamed one (renamed or moved only) reuses
+        its digests; any other final file is hashed here, in one pass.
+
+        Returns:
+            {final path: {algorithm: hexdigest}}
+        """
+        with self._lock:
+            finals = set(self._finals.values())
+            streamed = {hasher.signature: hasher for hasher in self._hashers.values()
+                        if hasher.signature is not None}
+        for path in finals:
+            signature = _signature(path)
+            if signature is None:
+                continue
+            hasher = streamed.get(signature)
+            try:
+                digests = hasher.hexdigests() if hasher is not None else hash_file(path, self.algorithms)
+            except OSError:
+                continue
+            self.results[path] = digests
+            if self.sidecars:
+                write_sidecars(path, digests)
+        return dict(self.results)
+
+
+def sidecar_path(path, algorithm):
+    return f"{path}.{algorithm}"
+
+
+def write_sidecars(path, digests):
+    """Write <path>.<algorithm> files in the sha256sum/xxhsum check format."""
+    name = os.path.basename(path)
+    for algorithm, hexdigest in digests.items():
+        try:
+            with open(sidecar_path(path, algorithm), "w", encoding="utf-8", newline="\n") as f:
+                f.write(f"{hexdigest}  {name}\n")
+        except OSError:
+            pass  # Sidecars must never fail a download
+
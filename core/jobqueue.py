@@ -0,0 +1,335 @@
+"""
+Shared job queue and distributed workers for the YouTube Downloader application.
+
+Several ingest machines drain one queue: either a SQLite file on shared
+storage or a queue server (``--serve-queue``) that exposes the same
+SQLite queue over the local JSON-RPC protocol. Jobs are claimed with
+time-limited leases that workers renew with heartbeats; a job whose
+lease expires (worker died or lost the share) is handed to another worker.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from core.localization import localization
+from core.metrics import PHASES
+from core.retry import RETRY_POLICIES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+"""
+
+
+def is_retryable(error):
+    """Whether a failed job goes back to the queue: a lost lease, or an error core.retry retries."""
+    if error == "lease_lost":
+        return True
+    policy = RETRY_POLICIES.get(error)
+    return policy is not None and policy.attempts > 1
+
+
+class SharedJobQueue:
+    """
+    SQLite-backed job queue with leases.
+
+    Uses the rollback journal rather than WAL because WAL does not work on
+    network filesystems; every claim runs in a BEGIN IMMEDIATE transaction
+    so two nodes can never lease the same job.
+    """
+
+    def __init__(self, path, lease_seconds=60):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def add(self, url, options=None, max_attempts=3):
+        """Add a job and return its id."""
+        conn = self._connect()
+        cursor = conn.execute(
+            "INSERT INTO jobs (url, options, max_attempts, created) VALUES (?, ?, ?, ?)",
+            (url, json.dumps(options or {}), max_attempts, time.time()),
+        )
+        return cursor.lastrowid
+
+    def claim(self, worker_id):
+        """
+        Lease the oldest runnable job.
+
+        Returns:
+            dict with id, url and options, or None when nothing is runnable
+        """
+        now = time.time()
+        conn = self._transaction()
+        try:
+            # An expired lease on the last attempt has nothing left to retry
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_expires = NULL, "
+                "error = 'lease_lost', finished = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = conn.execute(
+                "SELECT id, url, options FROM jobs "
+                "WHERE (state = 'queued' OR (state = 'leased' AND lease_expires < ?)) "
+                "AND attempts < max_attempts ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, started = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {"id": row["id"], "url": row["url"], "options": json.loads(row["options"])}
+
+    def heartbeat(self, job_id, worker_id):
+        """Extend a lease. Returns False if the worker no longer owns the job."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND state = 'leased'",
+            (time.time() + self.lease_seconds, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result):
+        """Mark a leased job finished with its result record."""
+        self._connect().execute(
+            "UPDATE jobs SET state = 'finished', finished = ?, result = ?, error = NULL "
+            "WHERE id = ? AND lease_owner = ?",
+            (time.time(), json.dumps(result), job_id, worker_id),
+        )
+
+    def fail(self, job_id, worker_id, error, retry=True):
+        """Re-queue a failed job (while attempts remain) or mark it failed."""
+        conn = self._transaction()
+        try:
+            conn.execute(
+                "UPDATE jobs SET state = CASE WHEN ? AND attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+                "lease_owner = NULL, lease_expires = NULL, error = ?, finished = ? "
+                "WHERE id = ? AND lease_owner = ?",
+                (1 if retry else 0, error, time.time(), job_id, worker_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def summary(self):
+        """Aggregate job counts by state and per-node results."""
+        conn = self._connect()
+        states = {row["state"]: row["count"] for row in conn.execute(
+            "SELECT state, COUNT(*) AS count FROM jobs GROUP BY state"
+        )}
+        nodes = {}
+        for row in conn.execute("SELECT result FROM jobs WHERE state = 'finished'"):
+            result = json.loads(row["result"] or "{}")
+            node = nodes.setdefault(result.get("node", "?"), {"jobs": 0, "bytes": 0, "seconds": 0.0, "phases": {}})
+            node["jobs"] += 1
+            node["bytes"] += result.get("bytes", 0)
+            node["seconds"] += result.get("seconds", 0.0)
+            # Where each node's wall time went (seconds summed over its jobs)
+            for phase, seconds in (result.get("phases") or {}).items():
+                if seconds is not None:
+                    node["phases"][phase] = round(node["phases"].get(phase, 0.0) + seconds, 3)
+        return {"states": states, "nodes": nodes}
+
+    def get_methods(self):
+        """JSON-RPC method table for serving this queue to other nodes."""
+        return {
+            "ping": lambda: {"mode": "queue"},
+            "add": self.add,
+            "claim": self.claim,
+            "heartbeat": self.heartbeat,
+            "complete": self.complete,
+            "fail": self.fail,
+            "summary": self.summary,
+        }
+
+
+class RemoteJobQueue:
+    """Client for a queue served by another node with --serve-queue."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def _call(self, method, **params):
+        from core.rpc import call
+        return call(method, params, host=self.host, port=self.port, timeout=30)
+
+    def add(self, url, options=None, max_attempts=3):
+        return self._call("add", url=url, options=options, max_attempts=max_attempts)
+
+    def claim(self, worker_id):
+        return self._call("claim", worker_id=worker_id)
+
+    def heartbeat(self, job_id, worker_id):
+        return self._call("heartbeat", job_id=job_id, worker_id=worker_id)
+
+    def complete(self, job_id, worker_id, result):
+        return self._call("complete", job_id=job_id, worker_id=worker_id, result=result)
+
+    def fail(self, job_id, worker_id, error, retry=True):
+        return self._call("fail", job_id=job_id, worker_id=worker_id, error=error, retry=retry)
+
+    def summary(self):
+        return self._call("summary")
+
+
+def open_queue(location, lease_seconds=60):
+    """Open a queue from a SQLite path or an http://host:port queue server address."""
+    if location.startswith("http://"):
+        host, _, port = location[len("http://"):].rstrip("/").partition(":")
+        return RemoteJobQueue(host, int(port))
+    return SharedJobQueue(location, lease_seconds=lease_seconds)
+
+
+class QueueWorker:
+    """Claims jobs from a shared queue and downloads them with a per-node concurrency limit."""
+
+    def __init__(self, queue, output_dir, concurrency=2, worker_id=None, lease_seconds=60, poll_interval=5):
+        self.queue = queue
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _selections(self, options):
+        return {
+            "resolution": options.get("resolution", "best"),
+            "format": options.get("format", "mp4"),
+            "audio": options.get("audio", "default"),
+            "subtitles": options.get("subtitles") or localization.get("formats.no_subtitles", "No subtitles"),
+            "sections": options.get("sections", ""),
+        }
+
+    def _run_job(self, claimed):
+        from core.models import EntryRecord
+        from core.scheduler import DownloadJob
+        from core.utils import resolve_inside
+        from core.workers import run_download
+
+        options = claimed.get("options") or {}
+        # Whoever added the job only picks a folder inside this node's output folder
+        output_dir = resolve_inside(self.output_dir, options.get("output_dir"))
+        if output_dir is None:
+            try:
+                self.queue.fail(claimed["id"], self.worker_id, "invalid_output_dir", retry=False)
+            except Exception:
+                pass
+            return
+        job = DownloadJob(None, output_dir)
+        with self._lock:
+            self._active[claimed["id"]] = job
+
+        started = time.time()
+        try:
+            entry = EntryRecord.fetch(claimed["url"], self._selections(options))
+            run_download(entry, output_dir, job=job)
+            if job.pending_move is not None:
+                # Report the files once they are in the output folder
+                job.pending_move.result()
+            files = sorted(path for path in job.files if os.path.isfile(path))
+            self.queue.complete(claimed["id"], self.worker_id, {
+                "node": self.worker_id,
+                "title": entry.title,
+                "files": files,
+                "bytes": sum(os.path.getsize(path) for path in files),
+                "seconds": round(time.time() - started, 3),
+                "phases": {phase: entry.metrics.to_dict().get(f"{phase}_s") for phase in PHASES},
+            })
+        except Exception as e:
+            error = "lease_lost" if job.cancelled else str(e)
+            try:
+                self.queue.fail(claimed["id"], self.worker_id, error, retry=is_retryable(error))
+            except Exception:
+                pass  # The lease will expire and the job will be re-queued
+        finally:
+            with self._lock:
+                self._active.pop(claimed["id"], None)
+
+    def _slot_loop(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.queue.claim(self.worker_id)
+            except Exception:
+                claimed = None
+            if claimed is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._run_job(claimed)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                active = list(self._active.items())
+            for job_id, job in active:
+                try:
+                    owned = self.queue.heartbeat(job_id, self.worker_id)
+                except Exception:
+                    continue  # Transient; the lease still has time left
+                if not owned:
+                    # Another node took the job over; stop duplicate work
+                    job.request_cancel()
+
+    def run(self):
+        """Run until stop() is called and the running jobs have been handed back."""
+        threads = [threading.Thread(target=self._slot_loop, daemon=True) for _ in range(self.concurrency)]
+        threads.append(threading.Thread(target=self._heartbeat_loop, daemon=True))
+        for thread in threads:
+            thread.start()
+        while not self._stop.is_set():
+            self._stop.wait(1)
+        with self._lock:
+            for job in self._active.values():
+                job.request_cancel()
+        # Cancelled jobs unwind and fail back to the queue before we return
+        for thread in threads:
+            thread.join()
+
+    def stop(self):
+        """Stop claiming jobs and cancel the running ones, which go back to the queue."""
+        self._stop.set()
@@ -3,20 +3,82 @@ Localization and internationalization support for the YouTube Downloader applica
 """
 
 import json
+import marshal
 import os
 import sys
 import locale
 from typing import Dict, Any
 
 
+# Bumped whenever the compiled catalog layout changes
+CATALOG_VERSION = 1
+
+# Status strings used on hot paths (progress hooks), prebuilt per language:
+# name -> (icon, translation key, default)
+STATUS_STRINGS = {
+    "downloading": ("⏳", "video.downloading", "Downloading..."),
+    "queued": ("⏳", "video.queued", "Queued"),
+    "completed": ("✅", "video.completed", "Completed"),
+    "paused": ("⏸", "video.paused", "Paused"),
+    "error": ("❌", "video.error", "Error"),
+    "invalid_sections": ("❌", "video.invalid_sections", "Invalid clip range"),
+    "insufficient_space": ("❌", "video.insufficient_space", "Not enough disk space"),
+    "retrying": ("🔁", "video.retrying", "Retrying"),
+    "throttled": ("⏳", "video.throttled_wait", "Waiting - the site is throttling downloads"),
+}
+
+
+def flatten_translations(tree: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
+    """Flatten nested translations into interned dotted-key -> string entries."""
+    flat = {}
+    for key, value in tree.items():
+        full_key = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_translations(value, f"{full_key}."))
+        else:
+            flat[sys.intern(full_key)] = sys.intern(value) if isinstance(value, str) else value
+    return flat
+
+
+def compile_catalog(json_path: str) -> Dict[str, str]:
+    """
+    Load a locale JSON file as a flat catalog, using the compiled cache.
+
+    The cache (``<lang>.catalog`` next to the JSON) is rebuilt when the
+    JSON changes; failing to write it (read-only install) is not an error.
+    """
+    cache_path = os.path.splitext(json_path)[0] + ".catalog"
+    stat = os.stat(json_path)
+    stamp = (CATALOG_VERSION, stat.st_mtime_ns, stat.st_size)
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_stamp, catalog = marshal.load(f)
+        if tuple(cached_stamp) == stamp:
+            return {sys.intern(k): sys.intern(v) if isinstance(v, str) else v for k, v in catalog.items()}
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        catalog = flatten_translations(json.load(f))
+    try:
+        with open(cache_path, "wb") as f:
+            marshal.dump((stamp, catalog), f)
+    except OSError:
+        pass
+    return catalog
+
+
 class LocalizationManager:
     """Manages application localization and translations."""
     
     def __init__(self, locales_dir: str = "locales"):
         self.locales_dir = self._get_resource_path(locales_dir)
         self.current_language = self._detect_system_language()
-        self.translations = {}
-        self._load_translations()
+        # Catalogs are loaded on first lookup so importing this module stays cheap
+        self._catalogs = None
+        self._strings = {}
+        self._statuses = {}
     
     def _get_resource_path(self, relative_path: str) -> str:
         """Get the absolute path to a resource, works both in dev and PyInstaller."""
@@ -40,28 +102,37 @@ class LocalizationManager:
         except:
             return 'en'  # Fallback to English
     
-    def _load_translations(self):
-        """Load translations for the current language."""
-        try:
-            lang_file = os.path.join(self.locales_dir, f"{self.current_language}.json")
-            with open(lang_file, 'r', encoding='utf-8') as f:
-                self.translations = json.load(f)
-        except FileNotFoundError:
+    def _load_catalogs(self):
+        """Load every available language into memory (flat, interned tables)."""
+        catalogs = {}
+        for language_code in self.get_available_languages():
+            try:
+                catalogs[language_code] = compile_catalog(
+                    os.path.join(self.locales_dir, f"{language_code}.json")
+                )
+            except (OSError, ValueError):
+                pass
+        self._catalogs = catalogs
+        if self.current_language not in catalogs:
             # Fallback to English if current language file not found
-            if self.current_language != 'en':
-                try:
-                    en_file = os.path.join(self.locales_dir, "en.json")
-                    with open(en_file, 'r', encoding='utf-8') as f:
-                        self.translations = json.load(f)
-                    self.current_language = 'en'
-                except FileNotFoundError:
-                    self.translations = {}
+            self.current_language = 'en'
+        self._activate()
+    
+    def _activate(self):
+        """Point lookups at the current language and prebuild its status strings."""
+        self._strings = self._catalogs.get(self.current_language, {})
+        self._statuses = {
+            name: sys.intern(f"{icon} {self._strings.get(key, default)}")
+            for name, (icon, key, default) in STATUS_STRINGS.items()
+        }
     
     def set_language(self, language_code: str):
-        """Set the current language and reload translations."""
-        if language_code in ['en', 'es']:
+        """Set the current language (all catalogs are already in memory)."""
+        if self._catalogs is None:
+            self._load_catalogs()
+        if language_code in self._catalogs:
             self.current_language = language_code
-            self._load_translations()
+            self._activate()
     
     def get(self, key: str, default: str = None) -> str:
         """
@@ -74,15 +145,23 @@ class LocalizationManager:
         Returns:
             Translated string or default value
         """
-        keys = key.split('.')
-        value = self.translations
-        
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
+        if self._catalogs is None:
+            self._load_catalogs()
+        value = self._strings.get(key)
+        if value is None:
             return default or key
+        return value
+    
+    def status(self, name: str) -> str:
+        """
+        Get a prebuilt status string with its icon (e.g. "⏳ Downloading...").
+        
+        Args:
+            name: One of STATUS_STRINGS (downloading, queued, completed, ...)
+        """
+        if self._catalogs is None:
+            self._load_catalogs()
+        return self._statuses[name]
     
     def get_available_languages(self) -> Dict[str, str]:
         """Get available languages with their display names."""
@@ -0,0 +1,200 @@
+"""
+In-place tag and cover art writing for the YouTube Downloader application.
+
+Uses mutagen to update only the tag header/atoms of MP4, M4A, MP3, FLAC
+and Ogg files instead of remuxing the whole media file through ffmpeg.
+Matroska/WebM is not supported by mutagen, so callers fall back to ffmpeg.
+"""
+
+import base64
+import os
+from typing import Dict, Optional
+
+
+# Extensions mutagen can tag in place
+IN_PLACE_FORMATS = ("mp4", "m4a", "m4v", "mov", "mp3", "flac", "ogg", "opus", "oga")
+
+
+def build_tags(info: dict) -> Dict[str, str]:
+    """Build a generic tag dictionary from a yt-dlp info dict."""
+    tags = {}
+
+    def first(*keys):
+        for key in keys:
+            value = info.get(key)
+            if value:
+                return str(value)
+        return None
+
+    tags["title"] = first("track", "title")
+    tags["artist"] = first("artist", "creator", "uploader", "uploader_id")
+    tags["album"] = first("album")
+    tags["genre"] = first("genre")
+    tags["description"] = first("description")
+    tags["url"] = first("webpage_url")
+
+    upload_date = first("release_date", "upload_date")
+    if upload_date and len(upload_date) == 8 and upload_date.isdigit():
+        upload_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:]}"
+    tags["date"] = upload_date
+
+    return {key: value for key, value in tags.items() if value}
+
+
+def _read_cover(cover_path: Optional[str]):
+    if not cover_path or not os.path.exists(cover_path):
+        return None, None
+    with open(cover_path, "rb") as f:
+        data = f.read()
+    mime = "image/png" if data[:8] == b"\x89PNG\r\n\x1a\n" else "image/jpeg"
+    return data, mime
+
+
+def _write_mp4(filepath, tags, cover, mime):
+    from mutagen.mp4 import MP4, MP4Cover
+
+    audio = MP4(filepath)
+    if audio.tags is None:
+        audio.add_tags()
+    mapping = {
+        "title": "\xa9nam",
+        "artist": "\xa9ART",
+        "album": "\xa9alb",
+        "genre": "\xa9gen",
+        "date": "\xa9day",
+        "description": "desc",
+        "url": "\xa9cmt",
+    }
+    for key, atom in mapping.items():
+        if key in tags:
+            audio.tags[atom] = [tags[key]]
+    if cover:
+        image_format = MP4Cover.FORMAT_PNG if mime == "image/png" else MP4Cover.FORMAT_JPEG
+        audio.tags["covr"] = [MP4Cover(cover, imageformat=image_format)]
+    audio.save()
+
+
+def _write_mp3(filepath, tags, cover, mime):
+    from mutagen.id3 import ID3, ID3NoHeaderError, APIC, COMM, TALB, TCON, TDRC, TIT2, TPE1, WXXX
+
+    try:
+        id3 = ID3(filepath)
+    except ID3NoHeaderError:
+        id3 = ID3()
+    frames = {
+        "title": lambda v: TIT2(encoding=3, text=v),
+        "artist": lambda v: TPE1(encoding=3, text=v),
+        "album": lambda v: TALB(encoding=3, text=v),
+        "genre": lambda v: TCON(encoding=3, text=v),
+        "date": lambda v: TDRC(encoding=3, text=v),
+        "description": lambda v: COMM(encoding=3, lang="eng", desc="", text=v),
+        "url": lambda v: WXXX(encoding=3, desc="", url=v),
+    }
+    for key, make_frame in frames.items():
+        if key in tags:
+            id3.add(make_frame(tags[key]))
+    if cover:
+        id3.delall("APIC")
+        id3.add(APIC(encoding=3, mime=mime, type=3, desc="Cover", data=cover))
+    id3.save(filepath)
+
+
+def _vorbis_comments(tags):
+    mapping = {
+        "title": "TITLE",
+        "artist": "ARTIST",
+        "album": "ALBUM",
+        "genre": "GENRE",
+        "date": "DATE",
+        "description": "DESCRIPTION",
+        "url": "PURL",
+    }
+    return {field: [tags[key]] for key, field in mapping.items() if key in tags}
+
+
+def _make_picture(cover, mime):
+    from mutagen.flac import Picture
+
+    picture = Picture()
+    picture.type = 3
+    picture.mime = mime
+    picture.desc = "Cover"
+    picture.data = cover
+    return picture
+
+
+def _write_flac(filepath, tags, cover, mime):
+    from mutagen.flac import FLAC
+
+    audio = FLAC(filepath)
+    for field, value in _vorbis_comments(tags).items():
+        audio[field] = value
+    if cover:
+        audio.clear_pictures()
+        audio.add_picture(_make_picture(cover, mime))
+    audio.save()
+
+
+def _write_ogg(filepath, tags, cover, mime):
+    import mutagen
+
+    audio = mutagen.File(filepath)
+    if audio is None:
+        raise ValueError("Unrecognized Ogg stream")
+    for field, value in _vorbis_comments(tags).items():
+        audio[field] = value
+    if cover:
+        picture = _make_picture(cover, mime)
+        audio["METADATA_BLOCK_PICTURE"] = [base64.b64encode(picture.write()).decode("ascii")]
+    audio.save()
+
+
+_WRITERS = {
+    "mp4": _write_mp4,
+    "m4a": _write_mp4,
+    "m4v": _write_mp4,
+    "mov": _write_mp4,
+    "mp3": _write_mp3,
+    "flac": _write_flac,
+    "ogg": _write_ogg,
+    "opus": _write_ogg,
+    "oga": _write_ogg,
+}
+
+
+def supports_in_place(filepath: str) -> bool:
+    """Check whether tags for this file can be written in place."""
+    ext = os.path.splitext(filepath)[1].lstrip(".").lower()
+    if ext not in IN_PLACE_FORMATS:
+        return False
+    try:
+        import mutagen  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_metadata(filepath: str, tags: Dict[str, str], cover_path: Optional[str] = None) -> bool:
+    """
+    Write tags and cover art into a media file in place.
+
+    Args:
+        filepath: Media file to update
+        tags: Generic tags as returned by build_tags
+        cover_path: Optional JPEG/PNG cover image
+
+    Returns:
+        True if the file was updated in place, False if the caller
+        should fall back to ffmpeg
+    """
+    if not supports_in_place(filepath):
+        return False
+
+    ext = os.path.splitext(filepath)[1].lstrip(".").lower()
+    cover, mime = _read_cover(cover_path)
+    try:
+        _WRITERS[ext](filepath, tags, cover, mime)
+        return True
+    except Exception:
+        # Unexpected container layout; let ffmpeg handle it
+        return False
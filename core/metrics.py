@@ -0,0 +1,306 @@
+"""
+Per-job download metrics for the YouTube Downloader application.
+
+Every download attempt records where its wall time went (info extraction,
+queue wait, time to first byte, transfer, each post-processor) along with
+average and peak throughput, retries, fragments, the bytes left on disk
+and the integrity digests of the files (core.integrity). Finished
+attempts are appended to a JSONL log and aggregated into Prometheus text
+exposition, served at GET /metrics by the local API and optionally
+written to a file for node_exporter's textfile collector.
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+
+from core import profiling
+from core.download_config import download_config
+
+
+METRIC_PREFIX = "oxdownloader"
+
+# Phases summed in the Prometheus output (seconds fields of a record)
+PHASES = ("extraction", "queue_wait", "ttfb", "transfer", "postprocess", "total")
+
+
+class JobMetrics:
+    """
+    Timings and transfer statistics of one queued video.
+
+    Extraction is timed once per entry; the download fields are reset when
+    an attempt starts, so a paused and resumed job reports each attempt.
+    Progress hooks may fire from yt-dlp's fragment threads, hence the lock.
+    Phase changes are also reported to the profiler (--profile), which
+    tags samples with the metrics id.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url=None):
+        self.id = next(self._ids)
+        self.url = url
+        self.title = None
+        self.extraction_s = None
+        self._lock = threading.Lock()
+        self.reset_attempt()
+
+    def reset_attempt(self):
+        """Clear the per-attempt fields."""
+        self.queue_wait_s = None
+        self.started = None
+        self.first_byte = None
+        self.last_byte = None
+        self.finished = None
+        self.peak_speed = 0.0
+        self.retries = 0
+        self.postprocessors = {}
+        self.bytes_on_disk = 0
+        self.outcome = None
+        self.error = None
+        self._file_bytes = {}
+        self._fragments = {}
+        self._pp_started = {}
+        self._remote_stats = None
+        self.digests = {}
+
+    @contextlib.contextmanager
+    def extraction(self):
+        """Time the info fetch run inside the with-block."""
+        started = time.monotonic()
+        profiling.enter(self.id, "extraction", self.url)
+        try:
+            yield
+        finally:
+            self.extraction_s = time.monotonic() - started
+            profiling.leave(self.id)
+
+    def start_attempt(self, job=None):
+        """Start timing a download attempt; queue wait is read from a scheduler job."""
+        self.reset_attempt()
+        self.started = time.monotonic()
+        profiling.enter(self.id, "download", self.title or self.url)
+        submitted_at = getattr(job, "submitted_at", None)
+        started_at = getattr(job, "started_at", None)
+        if submitted_at is not None and started_at is not None:
+            self.queue_wait_s = max(0.0, started_at - submitted_at)
+
+    def on_progress(self, d):
+        """Update from a yt-dlp progress hook dict."""
+        now = time.monotonic()
+        filename = d.get("filename")
+        with self._lock:
+            if d.get("downloaded_bytes"):
+                if self.first_byte is None:
+                    self.first_byte = now
+                self.last_byte = now
+                self._file_bytes[filename] = d["downloaded_bytes"]
+            if d.get("speed") and d["speed"] > self.peak_speed:
+                self.peak_speed = d["speed"]
+            if d.get("fragment_count"):
+                self._fragments[filename] = d["fragment_count"]
+
+    def on_postprocessor(self, d):
+        """Update from a yt-dlp postprocessor hook dict."""
+        name = d.get("postprocessor")
+        now = time.monotonic()
+        with self._lock:
+            if d.get("status") == "started":
+                self._pp_started[name] = now
+            elif d.get("status") == "finished" and name in self._pp_started:
+                elapsed = now - self._pp_started.pop(name)
+                self.postprocessors[name] = self.postprocessors.get(name, 0.0) + elapsed
+        if d.get("status") == "started":
+            profiling.enter(self.id, f"postprocess:{name}")
+        elif d.get("status") == "finished":
+            profiling.enter(self.id, "postprocess")
+
+    def retry_counter(self, sleep_func=None):
+        """Wrap a yt-dlp retry_sleep_functions entry so every retry is counted."""
+        def sleep(n):
+            with self._lock:
+                self.retries += 1
+            return sleep_func(n) if sleep_func else 0
+        return sleep
+
+    def download_stats(self):
+        """Transfer and post-processing figures of the current attempt."""
+        if self._remote_stats is not None:
+            return dict(self._remote_stats)
+        with self._lock:
+            downloaded = sum(self._file_bytes.values())
+            ttfb = self.first_byte - self.started if self.first_byte and self.started else None
+            transfer = self.last_byte - self.first_byte if self.first_byte else None
+            average = downloaded / transfer if transfer else None
+            return {
+                "ttfb_s": ttfb,
+                "transfer_s": transfer,
+                "postprocess_s": sum(self.postprocessors.values()),
+                "postprocessors": dict(self.postprocessors),
+                "bytes_downloaded": downloaded,
+                "avg_bytes_per_s": average,
+                "peak_bytes_per_s": max(self.peak_speed, average or 0.0) or None,
+                "fragments": sum(self._fragments.values()),
+                "retries": self.retries,
+                "digests": dict(self.digests),
+            }
+
+    def merge_download_stats(self, stats):
+        """Adopt the figures measured by a worker process for this attempt."""
+        self._remote_stats = dict(stats)
+
+    def relocate(self, final_path):
+        """Rename the digested files to where they end up (staged downloads)."""
+        self.digests = {final_path(path): digests for path, digests in self.digests.items()}
+        if self._remote_stats is not None and self._remote_stats.get("digests"):
+            self._remote_stats["digests"] = {
+                final_path(path): digests for path, digests in self._remote_stats["digests"].items()
+            }
+
+    def finish_attempt(self, outcome, error=None, files=()):
+        """Close the attempt: outcome is finished, failed, cancelled or paused."""
+        self.finished = time.monotonic()
+        profiling.leave(self.id, attempt_done=True)
+        self.outcome = outcome
+        self.error = error
+        self.bytes_on_disk = sum(os.path.getsize(path) for path in set(files) if path and os.path.isfile(path))
+
+    def to_dict(self):
+        """One JSON-serialisable record for the attempt."""
+        record = {
+            "time": time.time(),
+            "node": socket.gethostname(),
+            "job_id": self.id,
+            "url": self.url,
+            "title": self.title,
+            "outcome": self.outcome,
+            "error": self.error,
+            "extraction_s": self.extraction_s,
+            "queue_wait_s": self.queue_wait_s,
+            "total_s": self.finished - self.started if self.finished and self.started else None,
+            "bytes_on_disk": self.bytes_on_disk,
+        }
+        record.update(self.download_stats())
+        return record
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class MetricsRecorder:
+    """Aggregates finished attempts and writes the JSONL log and Prometheus textfile."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outcomes = {}
+        self._phases = {phase: [0.0, 0] for phase in PHASES}
+        self._postprocessors = {}
+        self._counters = {"bytes_downloaded": 0, "bytes_on_disk": 0, "retries": 0, "fragments": 0}
+        self._peak_speed = 0.0
+        self._collectors = []
+
+    def add_collector(self, collector):
+        """Append the Prometheus text returned by collector() to every exposition."""
+        self._collectors.append(collector)
+
+    def record(self, metrics):
+        """
+        Record a finished attempt.
+
+        Returns:
+            The attempt's record (as written to the JSONL log)
+        """
+        record = metrics.to_dict()
+        config = download_config.get_config()
+        with self._lock:
+            self._outcomes[record["outcome"]] = self._outcomes.get(record["outcome"], 0) + 1
+            for phase in PHASES:
+                value = record.get(f"{phase}_s")
+                if value is not None:
+                    self._phases[phase][0] += value
+                    self._phases[phase][1] += 1
+            for name, seconds in record["postprocessors"].items():
+                totals = self._postprocessors.setdefault(name, [0.0, 0])
+                totals[0] += seconds
+                totals[1] += 1
+            for counter in self._counters:
+                self._counters[counter] += record.get(counter) or 0
+            self._peak_speed = max(self._peak_speed, record.get("peak_bytes_per_s") or 0.0)
+
+            # Appended under the lock so concurrent jobs don't interleave lines
+            if config["metrics_log"]:
+                try:
+                    with open(config["metrics_log"], "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+                except OSError:
+                    pass  # Metrics must never fail a download
+
+        if config["metrics_textfile"]:
+            self.write_textfile(config["metrics_textfile"])
+        return record
+
+    def prometheus_text(self):
+        """Aggregated metrics in the Prometheus text exposition format."""
+        p = METRIC_PREFIX
+        with self._lock:
+            lines = [
+                f"# HELP {p}_jobs_total Download attempts by outcome.",
+                f"# TYPE {p}_jobs_total counter",
+            ]
+            lines += [f'{p}_jobs_total{{outcome="{_escape_label(outcome)}"}} {count}'
+                      for outcome, count in sorted(self._outcomes.items(), key=lambda item: str(item[0]))]
+
+            lines += [
+                f"# HELP {p}_phase_seconds Time spent in each phase of a job.",
+                f"# TYPE {p}_phase_seconds summary",
+            ]
+            for phase, (total, count) in self._phases.items():
+                lines.append(f'{p}_phase_seconds_sum{{phase="{phase}"}} {total:.6f}')
+                lines.append(f'{p}_phase_seconds_count{{phase="{phase}"}} {count}')
+
+            lines += [
+                f"# HELP {p}_postprocessor_seconds Time spent in each yt-dlp post-processor.",
+                f"# TYPE {p}_postprocessor_seconds summary",
+            ]
+            for name, (total, count) in sorted(self._postprocessors.items()):
+                label = _escape_label(name)
+                lines.append(f'{p}_postprocessor_seconds_sum{{postprocessor="{label}"}} {total:.6f}')
+                lines.append(f'{p}_postprocessor_seconds_count{{postprocessor="{label}"}} {count}')
+
+            for counter, help_text in (
+                ("bytes_downloaded", "Bytes received from servers."),
+                ("bytes_on_disk", "Bytes of finished files left on disk."),
+                ("retries", "HTTP and fragment retries."),
+                ("fragments", "HLS/DASH fragments downloaded."),
+            ):
+                lines += [
+                    f"# HELP {p}_{counter}_total {help_text}",
+                    f"# TYPE {p}_{counter}_total counter",
+                    f"{p}_{counter}_total {self._counters[counter]}",
+                ]
+
+            lines += [
+                f"# HELP {p}_peak_throughput_bytes_per_second Highest transfer speed seen.",
+                f"# TYPE {p}_peak_throughput_bytes_per_second gauge",
+                f"{p}_peak_throughput_bytes_per_second {self._peak_speed:.1f}",
+            ]
+        text = "\n".join(lines) + "\n"
+        return text + "".join(collector() for collector in self._collectors)
+
+    def write_textfile(self, path):
+        """Write the Prometheus text atomically (scrapers never see a partial file)."""
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+
+
+# Global recorder (fed by core.workers.run_download)
+metrics_recorder = MetricsRecorder()
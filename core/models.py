@@ -0,0 +1,107 @@
+"""
+Queue entry model for the YouTube Downloader application.
+
+``extract_info`` results can run to megabytes (hundreds of formats with
+fragment lists and HTTP headers, automatic captions in every language).
+Entries keep only what the UI and the downloader read, in slotted
+records, and the raw info is dropped once the record is built.
+"""
+
+from core.metrics import JobMetrics
+
+
+class FormatSummary:
+    """The fields of a yt-dlp format that option lists and size estimates use."""
+
+    __slots__ = ("format_id", "ext", "vcodec", "acodec", "height", "language",
+                 "filesize", "filesize_approx", "tbr")
+
+    def __init__(self, fmt):
+        for field in self.__slots__:
+            setattr(self, field, fmt.get(field))
+
+    def get(self, field, default=None):
+        """Dict-style access so format helpers work on summaries and raw formats alike."""
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+
+class EntryRecord:
+    """
+    Model state of one queued video, separate from its widgets.
+
+    Attributes:
+        url: Video URL
+        title, thumbnail, duration: From the extracted info
+        formats: FormatSummary list (worst to best, as yt-dlp orders them)
+        chapters: (title, start_time, end_time) tuples
+        options: Choices offered to the user: resolution, format, audio
+            and subtitles lists
+        selections: Snapshot of the chosen options when the job was queued
+        job: Scheduler job while a download is queued, running or paused
+        metrics: JobMetrics of the fetch and the latest download attempt
+    """
+
+    __slots__ = ("url", "title", "thumbnail", "duration", "formats", "chapters",
+                 "options", "selections", "job", "metrics")
+
+    def __init__(self, url, selections=None):
+        self.url = url
+        self.title = None
+        self.thumbnail = None
+        self.duration = None
+        self.formats = ()
+        self.chapters = ()
+        self.options = None
+        self.selections = selections
+        self.job = None
+        self.metrics = JobMetrics(url)
+
+    def load_info(self, info):
+        """Keep the needed parts of an extract_info result (the caller drops the rest)."""
+        from core.video_info import (
+            extract_audio_language_options,
+            extract_format_options,
+            extract_resolution_options,
+            extract_subtitle_options,
+        )
+
+        formats = info.get("formats") or []
+        self.title = info.get("title")
+        self.metrics.title = self.title
+        self.thumbnail = info.get("thumbnail")
+        self.duration = info.get("duration")
+        self.formats = tuple(FormatSummary(f) for f in formats)
+        self.chapters = tuple(
+            (c.get("title") or "", c.get("start_time") or 0, c.get("end_time") or 0)
+            for c in info.get("chapters") or []
+        )
+        self.options = {
+            "resolution": extract_resolution_options(formats),
+            "format": extract_format_options(formats),
+            "audio": extract_audio_language_options(formats, info),
+            "subtitles": extract_subtitle_options(info),
+        }
+        return self
+
+    @classmethod
+    def from_info(cls, url, info, selections=None):
+        """Build a record from an extract_info result."""
+        return cls(url, selections).load_info(info)
+
+    @classmethod
+    def fetch(cls, url, selections=None):
+        """Fetch a video's info and build its record, timing the extraction."""
+        from core.video_info import fetch_video_info
+
+        record = cls(url, selections)
+        with record.metrics.extraction():
+            info = fetch_video_info(url)
+        return record.load_info(info)
+
+    def __getstate__(self):
+        # Only what a download needs crosses to worker processes
+        return {"url": self.url, "selections": self.selections}
+
+    def __setstate__(self, state):
+        self.__init__(state["url"], state["selections"])
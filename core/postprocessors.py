@@ -0,0 +1,112 @@
+"""
+Custom yt-dlp post-processors for the YouTube Downloader application.
+"""
+
+import os
+
+from yt_dlp.postprocessor import (
+    EmbedThumbnailPP,
+    FFmpegMetadataPP,
+    FFmpegSubtitlesConvertorPP,
+    PostProcessor,
+)
+from yt_dlp.utils import PostProcessingError, replace_extension
+
+from core.ffmpeg import supports_subtitle_format
+from core.metadata import build_tags, write_metadata
+from core.subtitles import can_convert, convert_subtitle_file
+
+
+class SubtitlesConvertorPP(PostProcessor):
+    """Convert downloaded subtitles in-process instead of running ffmpeg per track."""
+
+    def __init__(self, downloader=None, format=None):
+        super().__init__(downloader)
+        self.format = format
+
+    def run(self, info):
+        subs = info.get("requested_subtitles")
+        new_ext = self.format
+        if not subs or not new_ext:
+            return [], info
+
+        old_files = []
+        fallback = {}
+        for lang, sub in subs.items():
+            old_file = sub.get("filepath", "")
+            if not os.path.exists(old_file):
+                self.report_warning(f"Skipping embedding {lang} subtitle because the file is missing")
+                continue
+            ext = sub["ext"]
+            if ext == new_ext:
+                continue
+            if not can_convert(ext, new_ext):
+                # Formats we cannot parse (json3, ttml...) still go through ffmpeg
+                fallback[lang] = sub
+                continue
+
+            new_file = replace_extension(old_file, new_ext)
+            self.to_screen(f"Converting subtitles {old_file} to {new_ext}")
+            convert_subtitle_file(old_file, new_file, new_ext)
+            old_files.append(old_file)
+
+            with open(new_file, encoding="utf-8") as f:
+                subs[lang] = {"ext": new_ext, "data": f.read(), "filepath": new_file}
+
+            files_to_move = info.get("__files_to_move", {})
+            if old_file in files_to_move:
+                files_to_move[new_file] = replace_extension(files_to_move[old_file], new_ext)
+
+        if fallback and not supports_subtitle_format(new_ext):
+            self.report_warning(f"ffmpeg cannot write {new_ext} subtitles; keeping {', '.join(fallback)} as downloaded")
+        elif fallback:
+            converter = FFmpegSubtitlesConvertorPP(self._downloader, format=new_ext)
+            rest = {lang: sub for lang, sub in subs.items() if lang not in fallback}
+            info["requested_subtitles"] = fallback
+            files, info = converter.run(info)
+            info["requested_subtitles"].update(rest)
+            old_files.extend(files)
+
+        return old_files, info
+
+
+class MetadataEmbedPP(PostProcessor):
+    """Write tags and cover art in place, falling back to ffmpeg when the container needs it."""
+
+    def __init__(self, downloader=None, add_metadata=True, embed_thumbnail=True):
+        super().__init__(downloader)
+        self.add_metadata = add_metadata
+        self.embed_thumbnail = embed_thumbnail
+
+    def _thumbnail_path(self, info):
+        for thumbnail in reversed(info.get("thumbnails") or []):
+            if thumbnail.get("filepath"):
+                return thumbnail["filepath"]
+        return None
+
+    def run(self, info):
+        filepath = info.get("filepath")
+        if not filepath or not os.path.exists(filepath):
+            return [], info
+
+        thumbnail_path = self._thumbnail_path(info) if self.embed_thumbnail else None
+        tags = build_tags(info) if self.add_metadata else {}
+
+        if write_metadata(filepath, tags, thumbnail_path):
+            self.to_screen(f"Updated tags in place for \"{filepath}\"")
+            return [thumbnail_path] if thumbnail_path else [], info
+
+        # Container cannot be edited in place (e.g. WebM/MKV); remux with ffmpeg
+        files_to_delete = []
+        if self.add_metadata:
+            files, info = FFmpegMetadataPP(self._downloader, add_metadata=True).run(info)
+            files_to_delete.extend(files)
+        if thumbnail_path:
+            try:
+                files, info = EmbedThumbnailPP(self._downloader, already_have_thumbnail=False).run(info)
+                files_to_delete.extend(files)
+            except PostProcessingError as e:
+                # Containers such as WAV or WebM cannot carry cover art
+                self.report_warning(str(e))
+                files_to_delete.append(thumbnail_path)
+        return files_to_delete, info
@@ -0,0 +1,319 @@
+"""
+Profiling mode (--profile) for the YouTube Downloader application.
+
+A sampling thread records the Python stack of every thread at a fixed
+interval. Samples are attributed to the job and phase the thread is
+working on (extraction, download, each post-processor), as reported by
+the job's JobMetrics, or to the Tk main loop. Per job, tracemalloc
+snapshots are taken when the download attempt starts and ends, and in
+"cprofile" mode every phase also gets a deterministic cProfile.
+
+Output, written to one directory per session:
+
+* ``job-<id>.speedscope.json``: one sampled profile per phase
+  (open in https://www.speedscope.app);
+* ``ui-main-thread.speedscope.json`` and ``threads.speedscope.json`` for
+  the Tk main thread and threads no job claimed (fragment downloaders,
+  thumbnail loaders...);
+* ``job-<id>-<phase>.pstats`` (cprofile mode), for pstats/snakeviz;
+* ``job-<id>-start.tracemalloc``/``-end.tracemalloc`` snapshots
+  (``tracemalloc.Snapshot.load``) and ``job-<id>-memory.txt`` with the
+  largest allocation differences, written when the session ends (diffing
+  while tracemalloc still traces every allocation is far too slow).
+
+Samples cover wall time, so waits on the network and on ffmpeg show up
+as time in the blocking call. Identical stacks are merged as they are
+sampled (one entry per distinct stack, with the summed time), so memory
+stays bounded however long the session runs; the speedscope files are
+therefore aggregated profiles without a timeline. Threads that are not
+working on a job are skipped while they sit idle (waiting on a lock,
+queue or socket, or in the Tk main loop).
+"""
+
+import cProfile
+import collections
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# Seconds between stack samples
+DEFAULT_INTERVAL = 0.005
+
+# Frames kept per tracemalloc trace
+TRACEMALLOC_FRAMES = 10
+
+MAIN_THREAD_TAG = ("ui", "main-thread")
+
+# (file path suffix, function) of innermost frames where a thread sits idle
+IDLE_FRAMES = (
+    ("/threading.py", "wait"),
+    ("/threading.py", "_wait_for_tstate_lock"),
+    ("/queue.py", "get"),
+    ("/selectors.py", "select"),
+    ("/socketserver.py", "serve_forever"),
+    ("/concurrent/futures/thread.py", "_worker"),
+    ("/tkinter/__init__.py", "mainloop"),
+)
+
+# The profiler's own bookkeeping (samples, snapshots, cProfile), left out of reports
+_OWN_FILES = (tracemalloc.__file__, cProfile.__file__, __file__)
+
+_profiler = None
+
+
+class SessionProfiler:
+    """Samples all threads and writes per-job profiles into a directory."""
+
+    def __init__(self, directory, mode="sample", interval=DEFAULT_INTERVAL, memory=True):
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        self.memory = memory
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._tags = {}             # thread ident -> (job_id, phase)
+        self._labels = {}           # job_id -> label (title or URL)
+        self._frames = []           # speedscope shared frames
+        self._frame_index = {}      # (name, file, line) -> index
+        self._samples = {}          # (job_id, phase) -> Counter(stack tuple -> seconds)
+        self._idle_codes = {}       # code object -> innermost frame is an idle wait
+        self._thread_names = {}
+        self._cprofiles = {}        # thread ident -> (job_id, phase, Profile)
+        self._snapshots = {}        # job_id -> start snapshot
+        self._memory_reports = []   # (job_id, start path, end path) diffed by stop()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._thread.start()
+
+    # --- Sampling ---------------------------------------------------------
+
+    def _frame(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self._frames)
+            self._frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _is_idle(self, code):
+        idle = self._idle_codes.get(code)
+        if idle is None:
+            filename = code.co_filename.replace("\\", "/")
+            idle = self._idle_codes[code] = any(
+                code.co_name == name and filename.endswith(suffix) for suffix, name in IDLE_FRAMES
+            )
+        return idle
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight = now - last
+            last = now
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident == own_ident:
+                        continue
+                    key = self._tags.get(ident)
+                    if key is None:
+                        if ident not in self._thread_names:
+                            self._thread_names.update((t.ident, t.name) for t in threading.enumerate())
+                        key = ("thread", self._thread_names.get(ident, str(ident)))
+                    # Jobs keep their waits (network, ffmpeg); other threads only their work
+                    if key[0] in ("ui", "thread") and self._is_idle(frame.f_code):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(self._frame(frame.f_code))
+                        frame = frame.f_back
+                    stack.reverse()
+                    counts = self._samples.get(key)
+                    if counts is None:
+                        counts = self._samples[key] = collections.Counter()
+                    counts[tuple(stack)] += weight
+            del frames
+
+    # --- Tagging ------------------------------------------------------------
+
+    def enter(self, job_id, phase, label=None):
+        """Attribute the calling thread's work to a job phase from now on."""
+        ident = threading.get_ident()
+        self._finish_cprofile(ident)
+        with self._lock:
+            self._tags[ident] = (job_id, phase)
+            if label:
+                self._labels[job_id] = label
+        if self.memory and phase == "download" and tracemalloc.is_tracing():
+            self._snapshots[job_id] = tracemalloc.take_snapshot()
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return  # Python 3.12+ allows one cProfile at a time; samples still cover this phase
+            self._cprofiles[ident] = (job_id, phase, profile)
+
+    def leave(self, job_id, attempt_done=False):
+        """Stop attributing the calling thread to the job and write the job's files."""
+        ident = threading.get_ident()
+        self._finish_cprofile(ident)
+        with self._lock:
+            if self._tags.get(ident, (None,))[0] == job_id:
+                del self._tags[ident]
+        if attempt_done and job_id in self._snapshots:
+            self._write_memory(job_id, self._snapshots.pop(job_id))
+        self._write_job(job_id)
+
+    def tag_thread(self, tag):
+        """Tag the calling thread permanently (e.g. the Tk main thread)."""
+        with self._lock:
+            self._tags[threading.get_ident()] = tag
+
+    def _finish_cprofile(self, ident):
+        entry = self._cprofiles.pop(ident, None)
+        if entry is None:
+            return
+        job_id, phase, profile = entry
+        profile.disable()
+        path = self._unique_path(f"job-{job_id}-{_slug(phase)}", ".pstats")
+        profile.dump_stats(path)
+
+    # --- Output -------------------------------------------------------------
+
+    def _unique_path(self, stem, suffix):
+        path = os.path.join(self.directory, stem + suffix)
+        attempt = 2
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{stem}-{attempt}{suffix}")
+            attempt += 1
+        return path
+
+    def _speedscope(self, name, keys):
+        """Speedscope document with one sampled profile per key (call with the lock held)."""
+        profiles = []
+        for key in keys:
+            counts = self._samples[key]
+            profiles.append({
+                "type": "sampled",
+                "name": str(key[1]),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(counts.values()),
+                "samples": [list(stack) for stack in counts],
+                "weights": list(counts.values()),
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "0xDownloader",
+            "shared": {"frames": list(self._frames)},
+            "profiles": profiles,
+        }
+
+    def _write(self, filename, name, keys):
+        with self._lock:
+            keys = [key for key in keys if key in self._samples]
+            if not keys:
+                return
+            document = self._speedscope(name, keys)
+        path = os.path.join(self.directory, filename)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(document, f)
+        os.replace(path + ".tmp", path)
+
+    def _write_job(self, job_id):
+        with self._lock:
+            keys = [key for key in self._samples if key[0] == job_id]
+            label = self._labels.get(job_id, "")
+        self._write(f"job-{job_id}.speedscope.json", f"job {job_id} {label}".strip(), keys)
+
+    def _write_memory(self, job_id, start):
+        start_path = self._unique_path(f"job-{job_id}-start", ".tracemalloc")
+        end_path = self._unique_path(f"job-{job_id}-end", ".tracemalloc")
+        start.dump(start_path)
+        tracemalloc.take_snapshot().dump(end_path)
+        self._memory_reports.append((job_id, start_path, end_path))
+
+    def _write_memory_report(self, job_id, start_path, end_path):
+        start = tracemalloc.Snapshot.load(start_path)
+        end = tracemalloc.Snapshot.load(end_path)
+        lines = [f"job {job_id} {self._labels.get(job_id, '')}".rstrip(), "Largest allocation changes during the attempt:"]
+        stats = [stat for stat in end.compare_to(start, "lineno") if stat.traceback[0].filename not in _OWN_FILES]
+        lines += [str(stat) for stat in stats[:25]]
+        with open(self._unique_path(f"job-{job_id}-memory", ".txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def stop(self):
+        """Stop sampling and write everything that is still pending."""
+        self._stop.set()
+        self._thread.join()
+        for ident in list(self._cprofiles):
+            self._finish_cprofile(ident)
+        with self._lock:
+            jobs = {key[0] for key in self._samples if key[0] not in ("ui", "thread")}
+            threads = [key for key in self._samples if key[0] == "thread"]
+        for job_id in jobs:
+            self._write_job(job_id)
+        self._write("ui-main-thread.speedscope.json", "Tk main thread", [MAIN_THREAD_TAG])
+        self._write("threads.speedscope.json", "Threads not attributed to a job", threads)
+        if tracemalloc.is_tracing() and self.memory:
+            tracemalloc.stop()
+        for report in self._memory_reports:
+            self._write_memory_report(*report)
+
+
+def _slug(text):
+    return re.sub(r"[^\w.-]+", "_", str(text)).strip("_") or "phase"
+
+
+def default_directory(output_dir):
+    """Profile directory for this session, next to the downloads."""
+    return os.path.join(output_dir, "0xDownloader-profiles", time.strftime("%Y%m%d-%H%M%S"))
+
+
+def start(directory, mode="sample", interval=DEFAULT_INTERVAL, memory=True):
+    """Start the session profiler (once per process)."""
+    global _profiler
+    if _profiler is None:
+        _profiler = SessionProfiler(directory, mode, interval, memory)
+        _profiler.start()
+    return _profiler
+
+
+def stop():
+    """Stop the session profiler and flush its files; returns the directory or None."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    profiler.stop()
+    return profiler.directory
+
+
+def enter(job_id, phase, label=None):
+    """Tag the calling thread with a job phase (no-op unless profiling)."""
+    if _profiler is not None:
+        _profiler.enter(job_id, phase, label)
+
+
+def leave(job_id, attempt_done=False):
+    """Untag the calling thread from a job (no-op unless profiling)."""
+    if _profiler is not None:
+        _profiler.leave(job_id, attempt_done)
+
+
+def tag_main_thread():
+    """Attribute the calling (Tk main) thread's samples to the UI profile."""
+    if _profiler is not None:
+        _profiler.tag_thread(MAIN_THREAD_TAG)
@@ -0,0 +1,427 @@
+"""
+Retry policy and per-host circuit breakers for the YouTube Downloader application.
+
+Failures are classified once, from the HTTP status yt-dlp attached to the
+error or from its message, into the error codes the rest of the
+application reports (throttled, access_denied, video_not_found,
+network_error, download_error). Each code has a retry policy: permanent
+errors (private, removed, members-only videos) fail on the first attempt
+so they free their worker slot, while throttling and network errors are
+retried after an exponential backoff with jitter, so concurrent jobs
+don't retry in lockstep.
+
+Throttling (HTTP 429, 403 on media URLs, bot checks) is a property of the
+site rather than of one job, so it is counted per host. After
+``BREAKER_THRESHOLD`` throttled attempts within ``BREAKER_WINDOW`` seconds
+the host's breaker opens: every job for that host waits out the cooldown
+instead of adding to the load, and yt-dlp's own fragment and HTTP retries
+give up on the attempt. Then a single probe attempt is let through
+(half-open). If it succeeds the breaker closes; if not it reopens with a
+doubled cooldown.
+
+Only short waits happen inside an attempt: yt-dlp's own retries sleep a
+few seconds at most, in steps that notice cancel and pause. Longer waits
+(backoffs and open breakers) are taken by RetryEngine.call between
+attempts. A scheduled download hands them back to the scheduler
+(``defer``), which frees the worker slot and runs the job again once the
+wait is over.
+"""
+
+import collections
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from core.metrics import METRIC_PREFIX, metrics_recorder
+
+
+class RetryPolicy:
+    """How often and how patiently one error code is retried."""
+
+    __slots__ = ("attempts", "base_delay", "max_delay", "trips_breaker")
+
+    def __init__(self, attempts, base_delay=0.0, max_delay=0.0, trips_breaker=False):
+        self.attempts = attempts            # Attempts in total, including the first
+        self.base_delay = base_delay        # Seconds before the first retry (before jitter)
+        self.max_delay = max_delay
+        self.trips_breaker = trips_breaker  # Counts toward the host's circuit breaker
+
+    def backoff(self, retry):
+        """Seconds to wait before the given retry (1-based): equal jitter on an exponential delay."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+# Policy per error code; codes not listed (cancelled, insufficient_space...) are never retried
+RETRY_POLICIES = {
+    "throttled": RetryPolicy(4, 30.0, 600.0, trips_breaker=True),
+    "network_error": RetryPolicy(4, 2.0, 60.0),
+    "download_error": RetryPolicy(2, 5.0, 60.0),
+    "worker_crashed": RetryPolicy(2, 1.0, 10.0),
+    "access_denied": RetryPolicy(1),
+    "video_not_found": RetryPolicy(1),
+}
+
+# Backoff of yt-dlp's own HTTP and fragment retries (slept inside the attempt)
+TRANSFER_RETRY_POLICY = RetryPolicy(0, 1.0, 8.0)
+
+# Waits at least this long (seconds) are handed to the caller's defer()
+DEFER_MIN_DELAY = 5.0
+
+# Throttled attempts within the window that open a host's breaker
+BREAKER_THRESHOLD = 3
+BREAKER_WINDOW = 60.0
+
+# Seconds a breaker stays open; doubled each time a probe fails
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 600.0
+
+# Longest single wait before re-checking cancel/pause requests
+_POLL_INTERVAL = 0.5
+
+_HTTP_STATUS_RE = re.compile(r"http error (\d{3})")
+
+# (error code, message fragments), checked in order; first match wins
+_MESSAGE_RULES = (
+    ("throttled", ("too many requests", "rate limit", "rate-limit", "not a bot", "ratelimit")),
+    ("access_denied", ("sign in", "log in", "login", "private video", "members-only", "members only",
+                       "confirm your age", "age-restricted", "access denied", "premium")),
+    ("video_not_found", ("video unavailable", "unavailable", "not found", "has been removed",
+                         "does not exist", "unsupported url")),
+    ("network_error", ("timed out", "timeout", "network", "connection", "temporary failure",
+                       "name resolution", "getaddrinfo", "reset by peer", "incompleteread",
+                       "incomplete read", "ssl", "unreachable")),
+)
+
+_HOST_ALIASES = {"youtu.be": "youtube.com"}
+
+
+def host_key(url):
+    """Host a URL's requests are throttled under (www./m./music. prefixes dropped)."""
+    host = (urlsplit(url).hostname or "") if "://" in str(url) else ""
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return _HOST_ALIASES.get(host, host) or "unknown"
+
+
+def _http_status(error):
+    """HTTP status behind a yt-dlp error, if any."""
+    exc_info = getattr(error, "exc_info", None)
+    cause = exc_info[1] if exc_info else getattr(error, "cause", None)
+    status = getattr(cause, "status", None) or getattr(cause, "code", None)
+    if isinstance(status, int):
+        return status
+    match = _HTTP_STATUS_RE.search(str(error).lower())
+    return int(match.group(1)) if match else None
+
+
+def classify_error(error, default="download_error"):
+    """
+    Error code for a failed extraction or download.
+
+    Args:
+        error: The exception (usually a yt_dlp.utils.DownloadError)
+        default: Code for errors no rule recognises
+    """
+    status = _http_status(error)
+    if status in (429, 403):
+        return "throttled"
+    if status == 401:
+        return "access_denied"
+    if status in (404, 410):
+        return "video_not_found"
+    if status is not None and 500 <= status < 600:
+        return "network_error"
+    message = str(error).lower()
+    for code, fragments in _MESSAGE_RULES:
+        if any(fragment in message for fragment in fragments):
+            return code
+    return default
+
+
+class CircuitBreaker:
+    """Closed, open or half-open state of one host."""
+
+    __slots__ = ("failures", "state", "open_until", "cooldown", "probing", "trips")
+
+    def __init__(self):
+        self.failures = collections.deque()     # Times of recent throttled attempts
+        self.state = "closed"
+        self.open_until = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self.probing = False
+        self.trips = 0
+
+    def _open(self, now):
+        self.state = "open"
+        self.open_until = now + self.cooldown * random.uniform(1.0, 1.2)
+        self.probing = False
+        self.trips += 1
+
+    def wait_time(self, now):
+        """Seconds to wait before an attempt may start (0: go ahead, and probe if half-open)."""
+        if self.state == "open":
+            if now < self.open_until:
+                return self.open_until - now
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.probing:
+                return _POLL_INTERVAL   # Until the probe reports
+            self.probing = True
+        return 0.0
+
+    def remaining(self, now):
+        """Seconds the breaker stays open (0 unless open)."""
+        return max(0.0, self.open_until - now) if self.state == "open" else 0.0
+
+    def record_failure(self, now, counted):
+        if self.state == "half_open":
+            if counted:
+                self.cooldown = min(BREAKER_MAX_COOLDOWN, self.cooldown * 2)
+                self._open(now)
+            else:
+                self.probing = False    # Inconclusive probe; let another one through
+            return
+        if not counted:
+            return
+        self.failures.append(now)
+        while self.failures and now - self.failures[0] > BREAKER_WINDOW:
+            self.failures.popleft()
+        if self.state == "closed" and len(self.failures) >= BREAKER_THRESHOLD:
+            self._open(now)
+
+    def record_success(self):
+        if self.state == "half_open":
+            self.state = "closed"
+            self.cooldown = BREAKER_COOLDOWN
+            self.failures.clear()
+        self.probing = False
+
+    def release_probe(self):
+        self.probing = False
+
+
+class RetryEngine:
+    """Shared retry decisions and circuit breakers for every extraction and download."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._breakers = {}         # host -> CircuitBreaker
+        self._retries = {}          # error code -> retries scheduled
+        self._fast_failures = {}    # error code -> attempts failed without retry
+        self._breaker_wait = 0.0    # Seconds attempts spent waiting for open breakers
+
+    def _breaker(self, host):
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker()
+        return breaker
+
+    def wait_for_host(self, host, should_stop=None, on_wait=None):
+        """
+        Block while the host's breaker is open.
+
+        Returns:
+            False if should_stop() became true while waiting, else True
+        """
+        started = None
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._breaker(host).wait_time(now)
+                if wait <= 0:
+                    break
+                if started is None:
+                    started = now
+                    if on_wait:
+                        on_wait(wait)
+                if should_stop is not None and should_stop():
+                    self._breaker_wait += now - started
+                    return False
+                self._cond.wait(min(wait, _POLL_INTERVAL))
+            if started is not None:
+                self._breaker_wait += time.monotonic() - started
+        return True
+
+    def host_wait(self, host):
+        """Seconds before an attempt for host may start; 0 lets it start now (as the probe if half-open)."""
+        with self._cond:
+            return self._breaker(host).wait_time(time.monotonic())
+
+    def record_success(self, host):
+        with self._cond:
+            self._breaker(host).record_success()
+            self._cond.notify_all()
+
+    def record_failure(self, host, code, attempt):
+        """
+        Account for a failed attempt.
+
+        Returns:
+            Seconds to wait before retrying, or None if the error is not retried
+        """
+        policy = RETRY_POLICIES.get(code)
+        now = time.monotonic()
+        with self._cond:
+            breaker = self._breaker(host)
+            breaker.record_failure(now, policy is not None and policy.trips_breaker)
+            self._cond.notify_all()
+            if policy is None or attempt >= policy.attempts:
+                if policy is not None and policy.attempts == 1:
+                    self._fast_failures[code] = self._fast_failures.get(code, 0) + 1
+                return None
+            self._retries[code] = self._retries.get(code, 0) + 1
+            # No point retrying before the breaker lets attempts through again
+            return max(policy.backoff(attempt), breaker.remaining(now))
+
+    def abandon(self, host):
+        """An attempt ended without a verdict (cancelled or paused)."""
+        with self._cond:
+            self._breaker(host).release_probe()
+            self._cond.notify_all()
+
+    def call(self, url, attempt, should_stop=None, on_retry=None, on_wait=None, defer=None, attempts=0):
+        """
+        Run attempt() until it succeeds or its error is not worth retrying.
+
+        attempt raises Exception(error code) on failure, like download_video.
+        Before each try the URL's host breaker is waited out; failures are
+        retried per RETRY_POLICIES after a jittered backoff.
+
+        Args:
+            url: URL the attempts go to (its host selects the breaker)
+            should_stop: Callable; true ends waits and backoffs early
+            on_retry: Called with (error code, seconds) before a backoff
+            on_wait: Called with seconds when the host's breaker holds an attempt
+            defer: Optional callable(seconds, attempts) that takes over waits of
+                DEFER_MIN_DELAY or more (and every breaker wait) instead of
+                blocking here; it raises, and the caller calls again later
+                with the attempts made so far
+            attempts: Attempts already made before an earlier defer()
+
+        Raises:
+            The last attempt's exception, whatever defer() raises, or
+            Exception("stopped") if should_stop() became true while waiting
+        """
+        host = host_key(url)
+        number = attempts
+        while True:
+            number += 1
+            if defer is not None:
+                wait = self.host_wait(host)
+                if wait > 0:
+                    if on_wait:
+                        on_wait(wait)
+                    defer(max(wait, DEFER_MIN_DELAY), number - 1)
+            elif not self.wait_for_host(host, should_stop, on_wait):
+                raise Exception("stopped")
+            try:
+                result = attempt()
+            except Exception as e:
+                code = str(e)
+                if code in ("cancelled", "paused"):
+                    self.abandon(host)
+                    raise
+                delay = self.record_failure(host, code, number)
+                if delay is None:
+                    raise
+                if on_retry:
+                    on_retry(code, delay)
+                if defer is not None and delay >= DEFER_MIN_DELAY:
+                    defer(delay, number)
+                if not _sleep(delay, should_stop):
+                    raise Exception("stopped")
+                continue
+            self.record_success(host)
+            return result
+
+    def sleep_function(self, url, should_stop=None):
+        """
+        retry_sleep_functions entry for yt-dlp's own retries.
+
+        The short jittered backoff is slept here, in steps that check
+        should_stop, and yt-dlp is told to sleep 0. While the host's breaker
+        is open the attempt is abandoned as throttled instead, so call()
+        waits the breaker out between attempts.
+        """
+        host = host_key(url)
+
+        def sleep(n):
+            with self._cond:
+                if self._breaker(host).remaining(time.monotonic()):
+                    raise Exception("throttled")
+            _sleep(TRANSFER_RETRY_POLICY.backoff(n + 1), should_stop)
+            return 0
+        return sleep
+
+    def snapshot(self):
+        """Breaker states and retry counters as a JSON-serialisable dict."""
+        now = time.monotonic()
+        with self._cond:
+            return {
+                "breakers": {
+                    host: {"state": breaker.state, "open_for_s": breaker.remaining(now), "trips": breaker.trips}
+                    for host, breaker in self._breakers.items()
+                },
+                "retries": dict(self._retries),
+                "fast_failures": dict(self._fast_failures),
+                "breaker_wait_s": self._breaker_wait,
+            }
+
+    def prometheus_text(self):
+        """Retry and circuit breaker metrics in the Prometheus text exposition format."""
+        p = METRIC_PREFIX
+        states = {"closed": 0, "half_open": 1, "open": 2}
+        with self._cond:
+            lines = [
+                f"# HELP {p}_retries_total Attempts retried, by error code.",
+                f"# TYPE {p}_retries_total counter",
+            ]
+            lines += [f'{p}_retries_total{{code="{code}"}} {count}'
+                      for code, count in sorted(self._retries.items())]
+            lines += [
+                f"# HELP {p}_fast_failures_total Permanent errors failed without retrying.",
+                f"# TYPE {p}_fast_failures_total counter",
+            ]
+            lines += [f'{p}_fast_failures_total{{code="{code}"}} {count}'
+                      for code, count in sorted(self._fast_failures.items())]
+            lines += [
+                f"# HELP {p}_circuit_state Host circuit breaker state (0 closed, 1 half-open, 2 open).",
+                f"# TYPE {p}_circuit_state gauge",
+            ]
+            hosts = sorted(self._breakers.items())
+            lines += [f'{p}_circuit_state{{host="{host}"}} {states[breaker.state]}'
+                      for host, breaker in hosts]
+            lines += [
+                f"# HELP {p}_circuit_trips_total Times a host's circuit breaker opened.",
+                f"# TYPE {p}_circuit_trips_total counter",
+            ]
+            lines += [f'{p}_circuit_trips_total{{host="{host}"}} {breaker.trips}'
+                      for host, breaker in hosts]
+            lines += [
+                f"# HELP {p}_circuit_wait_seconds_total Time attempts waited for open circuit breakers.",
+                f"# TYPE {p}_circuit_wait_seconds_total counter",
+                f"{p}_circuit_wait_seconds_total {self._breaker_wait:.3f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _sleep(seconds, should_stop=None):
+    """Sleep in short steps; False if should_stop() became true."""
+    deadline = time.monotonic() + seconds
+    while True:
+        if should_stop is not None and should_stop():
+            return False
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return True
+        time.sleep(min(left, _POLL_INTERVAL))
+
+
+# Global engine (shared by extraction, downloads and every worker thread)
+retry_engine = RetryEngine()
+metrics_recorder.add_collector(retry_engine.prometheus_text)
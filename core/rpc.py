@@ -0,0 +1,223 @@
+"""
+Local JSON-RPC API for the YouTube Downloader application.
+
+A running instance (GUI or daemon) listens on localhost so scripts and
+later launches can enqueue URLs, query and cancel jobs and stream
+progress without starting another copy of the application.
+"""
+
+import json
+import sys
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import RPC_HOST, RPC_PORT
+
+
+# Host names a loopback server answers to; anything else is a DNS rebinding attempt
+LOOPBACK_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+class RpcError(Exception):
+    """Error returned to the client as a JSON-RPC error object."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _host_name(value):
+    """Host name of a Host header ("localhost:47813", "[::1]:47813") or origin URL."""
+    if "://" not in value:
+        value = "//" + value
+    try:
+        return (urllib.parse.urlsplit(value).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def _make_handler(methods, event_stream, metrics_text, allowed_hosts):
+    class RpcHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _host_allowed(self):
+            """Refuse requests addressed to another host name (DNS rebinding) or sent by web pages."""
+            if allowed_hosts is None:
+                return True
+            if _host_name(self.headers.get("Host", "")) not in allowed_hosts:
+                return False
+            origin = self.headers.get("Origin")
+            return origin is None or _host_name(origin) in allowed_hosts
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self, request):
+            request_id = request.get("id") if isinstance(request, dict) else None
+            try:
+                if not isinstance(request, dict) or "method" not in request:
+                    raise RpcError(-32600, "Invalid request")
+                method = methods.get(request["method"])
+                if method is None:
+                    raise RpcError(-32601, f"Method not found: {request['method']}")
+                params = request.get("params") or {}
+                result = method(*params) if isinstance(params, list) else method(**params)
+                return {"jsonrpc": "2.0", "id": request_id, "result": result}
+            except RpcError as e:
+                error = {"code": e.code, "message": e.message}
+            except TypeError as e:
+                error = {"code": -32602, "message": str(e)}
+            except Exception as e:
+                error = {"code": -32000, "message": str(e)}
+            return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+        def do_POST(self):
+            if not self._host_allowed():
+                self._send_json(403, {"error": "Forbidden host"})
+                return
+            # Requiring a JSON content type forces a CORS preflight, so web
+            # pages cannot drive the local API with simple cross-site POSTs
+            if self.headers.get("Content-Type", "").split(";")[0].strip() != "application/json":
+                self._send_json(415, {"error": "Content-Type must be application/json"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"null")
+            except (ValueError, json.JSONDecodeError):
+                self._send_json(400, {"jsonrpc": "2.0", "id": None,
+                                      "error": {"code": -32700, "message": "Parse error"}})
+                return
+
+            if isinstance(request, list):
+                self._send_json(200, [self._dispatch(r) for r in request])
+            else:
+                self._send_json(200, self._dispatch(request))
+
+        def do_GET(self):
+            if not self._host_allowed():
+                self._send_json(403, {"error": "Forbidden host"})
+                return
+            # Prometheus scrape endpoint: GET /metrics
+            if self.path.split("?", 1)[0] == "/metrics" and metrics_text is not None:
+                body = metrics_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            # Newline-delimited JSON progress stream: GET /events?since=<seq>
+            if not self.path.startswith("/events") or event_stream is None:
+                self._send_json(404, {"error": "Not found"})
+                return
+            since = 0
+            if "since=" in self.path:
+                try:
+                    since = int(self.path.split("since=", 1)[1].split("&", 1)[0])
+                except ValueError:
+                    pass
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            try:
+                for event in event_stream(since):
+                    self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+    return RpcHandler
+
+
+def start_server(methods, event_stream=None, host=RPC_HOST, port=RPC_PORT, metrics_text=None):
+    """
+    Start the JSON-RPC server on a background thread.
+
+    Args:
+        methods: Mapping of method name to callable
+        event_stream: Optional callable(since) yielding event dicts for GET /events
+        metrics_text: Optional callable returning Prometheus text for GET /metrics
+
+    A server on a loopback address only answers requests addressed to
+    127.0.0.1/localhost; one bound to a specific address also accepts that
+    address, and one bound to all interfaces does not check the Host header.
+
+    Returns:
+        The running server, or None if another instance already owns the port
+    """
+    if host in ("", "0.0.0.0", "::"):
+        allowed_hosts = None
+    elif host in LOOPBACK_HOSTS or host.startswith("127."):
+        allowed_hosts = LOOPBACK_HOSTS | {host}
+    else:
+        allowed_hosts = {host.lower()}
+    try:
+        server = ThreadingHTTPServer((host, port), _make_handler(methods, event_stream, metrics_text, allowed_hosts))
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def call(method, params=None, host=RPC_HOST, port=RPC_PORT, timeout=5):
+    """
+    Call a method on the running instance.
+
+    Raises:
+        RpcError for JSON-RPC errors, OSError if no instance is listening
+    """
+    payload = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}).encode("utf-8")
+    request = urllib.request.Request(
+        f"http://{host}:{port}/",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            reply = json.loads(response.read().decode("utf-8"))
+    except urllib.error.URLError as e:
+        raise OSError(str(e.reason))
+    if "error" in reply:
+        raise RpcError(reply["error"].get("code"), reply["error"].get("message"))
+    return reply.get("result")
+
+
+def hand_off(urls, host=RPC_HOST, port=RPC_PORT):
+    """
+    Send URLs to an already running instance.
+
+    Returns:
+        True if an instance accepted them, False if none is running
+    """
+    try:
+        call("ping", host=host, port=port, timeout=1)
+    except (OSError, RpcError):
+        return False
+    for url in urls:
+        try:
+            call("enqueue", {"url": url}, host=host, port=port)
+        except (OSError, RpcError) as e:
+            if sys.stdout is not None:  # None in windowed (no console) builds
+                print(f"[ERROR] Could not queue {url}: {getattr(e, 'message', e)}")
+    if not urls:
+        try:
+            call("show", host=host, port=port, timeout=1)
+        except (OSError, RpcError):
+            pass
+    return True
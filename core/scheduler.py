@@ -0,0 +1,301 @@
+"""
+Download scheduling and disk space admission for the YouTube Downloader application.
+"""
+
+import itertools
+import os
+import shutil
+import threading
+import time
+
+from core.download_config import download_config
+from core.throughput import throughput_tracker
+
+
+class DownloadJob:
+    """
+    A queued download with its size estimate and control flags.
+
+    Cancel and pause are cooperative: the download checks should_stop()
+    from its progress and post-processor hooks and unwinds on its own.
+    A running job can also defer() itself: it goes back on the queue,
+    freeing its worker, until a retry delay has passed.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, target, output_dir, estimated_size=None):
+        self.id = next(self._ids)
+        self.target = target
+        self.output_dir = output_dir
+        self.estimated_size = estimated_size
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.not_before = 0.0       # Monotonic time a deferred job may run again
+        self.retry_attempts = 0     # Attempts made before the last defer()
+        self.scheduled = False      # Run by a DownloadScheduler (defer() works)
+        self.device = None
+        self.file_bytes = {}
+        self.files = set()
+        self.pending_move = None    # Future of the move out of staging (core.staging)
+        self.state = "queued"
+        self._cancel_event = threading.Event()
+        self._pause_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def paused(self):
+        return self._pause_event.is_set()
+
+    def request_cancel(self):
+        """Flag the job as cancelled without touching any scheduler queue."""
+        self._cancel_event.set()
+
+    def should_stop(self):
+        """Whether the running download should unwind at the next hook."""
+        return self._cancel_event.is_set() or self._pause_event.is_set()
+
+    def defer(self, delay, attempts):
+        """
+        Give the worker back and run again after delay seconds (a retry wait).
+
+        Raises:
+            Exception("deferred"), which the target lets propagate
+        """
+        self.not_before = time.monotonic() + delay
+        self.retry_attempts = attempts
+        raise Exception("deferred")
+
+    def record_file(self, path):
+        """Remember a file the download wrote, for cleanup on cancel."""
+        if path:
+            self.files.add(path)
+
+    def record_progress(self, filename, downloaded_bytes, total_bytes=None):
+        """Record bytes written so far (and the file's total, if known) for one of the job's files."""
+        self.file_bytes[filename] = downloaded_bytes
+        self.record_file(filename)
+        throughput_tracker.on_progress(self, filename, downloaded_bytes, total_bytes)
+
+    def remaining_reservation(self):
+        """Bytes still reserved: the estimate minus what is already on disk."""
+        if not self.estimated_size:
+            return 0
+        return max(0, self.estimated_size - sum(self.file_bytes.values()))
+
+
+class DownloadScheduler:
+    """
+    Runs downloads on a fixed number of worker threads.
+
+    Jobs are admitted only if the output directory has room for their
+    estimated size on top of what queued and running jobs have reserved.
+    The queue is served either first-in-first-out or shortest-job-first,
+    with waiting time aging large jobs forward so they are not starved.
+    """
+
+    def __init__(self, max_workers=None, policy=None):
+        self.max_workers = max_workers
+        self.policy = policy
+        self._cond = threading.Condition()
+        self._pending = []
+        self._reserved = {}
+        self._workers = []
+
+    def _get_max_workers(self):
+        return self.max_workers or download_config.get_config()["max_concurrent_downloads"]
+
+    def _get_policy(self):
+        return self.policy or download_config.get_config()["queue_policy"]
+
+    def set_policy(self, policy):
+        """Set the queue policy ("fifo" or "sjf")."""
+        with self._cond:
+            self.policy = policy
+
+    def _ensure_workers(self):
+        while len(self._workers) < self._get_max_workers():
+            worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _device_of(self, path):
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            return path
+
+    def get_free_space(self, output_dir):
+        """Free bytes on the output directory's filesystem, minus active reservations."""
+        try:
+            free = shutil.disk_usage(output_dir).free
+        except OSError:
+            return None
+        device = self._device_of(output_dir)
+        with self._cond:
+            reserved = sum(
+                job.remaining_reservation() for job in self._reserved.values() if job.device == device
+            )
+        return free - reserved
+
+    def submit(self, target, output_dir, estimated_size=None):
+        """
+        Queue a download.
+
+        Args:
+            target: Callable run on a worker thread with the job as argument;
+                it should raise if the download did not complete
+            output_dir: Directory the download writes to
+            estimated_size: Estimated bytes on disk, if known
+
+        Returns:
+            The queued DownloadJob
+
+        Raises:
+            Exception("insufficient_space") if the job does not fit
+        """
+        config = download_config.get_config()
+        job = DownloadJob(target, output_dir, estimated_size)
+        job.device = self._device_of(output_dir)
+        job.scheduled = True
+
+        with self._cond:
+            if estimated_size:
+                free = self.get_free_space(output_dir)
+                needed = estimated_size * config["free_space_margin"] + config["min_free_space"]
+                if free is not None and free < needed:
+                    raise Exception("insufficient_space")
+                self._reserved[job.id] = job
+            # Tracked before a worker can pick it up (and untrack it)
+            throughput_tracker.track(job)
+            self._pending.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+        return job
+
+    def cancel(self, job):
+        """
+        Cancel a job.
+
+        Returns:
+            True if the job is running and will unwind (and clean up) on its
+            own, False if it was dropped here or had already ended
+        """
+        with self._cond:
+            if job.state in ("finished", "failed", "cancelled"):
+                return False
+            job.request_cancel()
+            if job.state == "running":
+                return True
+            if job in self._pending:
+                self._pending.remove(job)
+            self._reserved.pop(job.id, None)
+            job.state = "cancelled"
+        throughput_tracker.untrack(job)
+        return False
+
+    def pause(self, job):
+        """Pause a job, giving its worker slot back to the queue."""
+        with self._cond:
+            job._pause_event.set()
+            if job in self._pending:
+                self._pending.remove(job)
+                job.state = "paused"
+
+    def resume(self, job):
+        """Put a paused job back on the queue; its partial files are reused."""
+        with self._cond:
+            if job.cancelled:
+                return
+            if job.state == "running":
+                # Pause not acted on yet: the download just carries on (one
+                # that is already unwinding stays paused until resumed again)
+                job._pause_event.clear()
+                return
+            if job.state != "paused":
+                return
+            job._pause_event.clear()
+            job.state = "queued"
+            job.submitted_at = time.monotonic()
+            self._pending.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+
+    def _priority(self, job, now, policy, aging, unknown_size):
+        if policy != "sjf":
+            return job.submitted_at
+        # Waiting time ages jobs forward, including those of unknown size
+        size = job.estimated_size if job.estimated_size else unknown_size
+        return size / (1.0 + (now - job.submitted_at) / aging)
+
+    def _unknown_size(self):
+        """Size assumed for jobs without an estimate: the median of the known ones."""
+        sizes = sorted(job.estimated_size for job in self._pending if job.estimated_size)
+        if not sizes:
+            return 1.0
+        return float(sizes[len(sizes) // 2])
+
+    def _next_job(self, ready, now):
+        policy = self._get_policy()
+        aging = download_config.get_config()["sjf_aging_seconds"]
+        unknown_size = self._unknown_size() if policy == "sjf" else None
+        job = min(ready, key=lambda j: (self._priority(j, now, policy, aging, unknown_size), j.id))
+        self._pending.remove(job)
+        return job
+
+    def _wait_for_ready(self):
+        """Jobs that may run now, waiting while the queue is empty or only holds deferred jobs."""
+        while True:
+            now = time.monotonic()
+            ready = [job for job in self._pending if job.not_before <= now]
+            if ready:
+                return ready, now
+            due = min((job.not_before for job in self._pending), default=None)
+            self._cond.wait(None if due is None else due - now)
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = self._next_job(*self._wait_for_ready())
+                job.state = "running"
+            job.started_at = time.monotonic()
+            try:
+                job.target(job)
+                state = "finished"
+            except Exception as e:
+                # Targets re-raise after reporting so the outcome is known here
+                if job.cancelled:
+                    state = "cancelled"
+                elif job.paused or str(e) == "paused":
+                    state = "paused"
+                elif str(e) == "deferred":
+                    state = "deferred"
+                else:
+                    state = "failed"
+            with self._cond:
+                # A job resumed while it was unwinding still ends up paused:
+                # its target has already reported the pause, and resume()
+                # requeues it from there
+                if state == "deferred":
+                    # Waits for its retry on the queue, keeping its place by age
+                    state = "queued"
+                    self._pending.append(job)
+                    self._cond.notify()
+                job.state = state
+                # A paused job keeps its reservation; its partial files stay on disk
+                if state not in ("paused", "queued"):
+                    self._reserved.pop(job.id, None)
+            if state not in ("paused", "queued"):
+                throughput_tracker.untrack(job)
+
+    def pending_count(self):
+        """Number of jobs waiting for a worker."""
+        with self._cond:
+            return len(self._pending)
+
+
+# Global scheduler instance
+download_scheduler = DownloadScheduler()
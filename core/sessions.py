@@ -0,0 +1,137 @@
+"""
+Reusable yt-dlp sessions for the YouTube Downloader application.
+
+Building a ``YoutubeDL`` used to set up new HTTP handlers and a cookie
+jar for every info fetch and download, redoing TLS handshakes each time.
+The pool keeps those long-lived and hands every call a fresh YoutubeDL
+built from its own options that shares them, so yt-dlp's own option
+handling and per-run state stay untouched. A session is used by one
+thread at a time, and every worker process has its own pool.
+"""
+
+import contextlib
+import json
+import threading
+
+
+# Options the HTTP stack and cookie jar are built from. Sessions are only
+# reused between calls that agree on them.
+SESSION_OPTIONS = (
+    "http_headers", "cookiefile", "cookiesfrombrowser", "proxy", "source_address",
+    "socket_timeout", "nocheckcertificate", "legacyserverconnect", "impersonate", "compat_opts",
+)
+
+# Idle sessions kept per pool; extra ones are closed when released
+MAX_IDLE_SESSIONS = 8
+
+
+def session_key(opts):
+    """Key identifying which sessions can serve a set of options."""
+    return json.dumps({k: opts[k] for k in SESSION_OPTIONS if k in opts}, sort_keys=True, default=str)
+
+
+def _params(opts, keys=None):
+    """Copy of opts to build a YoutubeDL from (it fills in defaults in place)."""
+    params = {k: v for k, v in opts.items() if keys is None or k in keys}
+    if "http_headers" in params:
+        params["http_headers"] = dict(params["http_headers"])
+    return params
+
+
+class Session:
+    """Request director and cookie jar shared by the YoutubeDLs built for one key."""
+
+    def __init__(self, opts):
+        import yt_dlp
+
+        self.key = session_key(opts)
+        # Owns the shared objects; only used to build and close them
+        self._owner = yt_dlp.YoutubeDL(_params(opts, SESSION_OPTIONS))
+        self.cookiejar = self._owner.cookiejar
+        self.request_director = self._owner._request_director
+
+    def attach(self, opts):
+        """Build a YoutubeDL for opts that uses this session's connections and cookies."""
+        import yt_dlp
+
+        ydl = yt_dlp.YoutubeDL(_params(opts))
+        # Both are cached properties that are only built on first use
+        # (the director early when impersonation is checked)
+        if "_request_director" in ydl.__dict__:
+            ydl._request_director.close()
+        ydl.cookiejar = self.cookiejar
+        ydl._request_director = self.request_director
+        ydl._pooled_session = self
+        return ydl
+
+    def detach(self, ydl):
+        """Close a YoutubeDL from attach() without closing the shared connections."""
+        ydl.__dict__.pop("_request_director", None)
+        ydl.__dict__.pop("_pooled_session", None)
+        # Saves cookies and runs the close hooks its extractors registered
+        ydl.close()
+
+    def close(self):
+        """Save cookies and close the shared connections."""
+        self._owner.close()
+
+
+class SessionPool:
+    """Pool of long-lived sessions, each handed out to one caller at a time."""
+
+    def __init__(self, max_idle=MAX_IDLE_SESSIONS):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, opts):
+        """
+        Get a YoutubeDL configured with opts, on an idle session if possible.
+
+        The caller owns it until release(); don't use it as a context
+        manager, since leaving the block closes the shared connections.
+        """
+        key = session_key(opts)
+        session = None
+        with self._lock:
+            for index, candidate in enumerate(self._idle):
+                if candidate.key == key:
+                    session = self._idle.pop(index)
+                    break
+
+        if session is None:
+            session = Session(opts)
+        return session.attach(opts)
+
+    def release(self, ydl):
+        """Return a YoutubeDL's session to the pool (closing it if the pool is full)."""
+        session = ydl._pooled_session
+        session.detach(ydl)
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(session)
+                return
+        session.close()
+
+    @contextlib.contextmanager
+    def session(self, opts):
+        """Acquire a configured YoutubeDL for a with-block and release it afterwards."""
+        ydl = self.acquire(opts)
+        try:
+            yield ydl
+        finally:
+            self.release(ydl)
+
+    def close(self):
+        """Close all idle sessions (saving cookies and closing connections)."""
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+# Global session pool (sessions are created on first use)
+session_pool = SessionPool()
@@ -0,0 +1,277 @@
+"""
+Scratch staging and write tuning for the YouTube Downloader application.
+
+With a ``staging_dir`` set, every download runs in its own directory on
+that (fast, local) disk: ``.part`` and fragment files, ffmpeg merges and
+in-place tagging never touch the output folder. Once the attempt has
+finished, its files are handed to a small pool of mover threads that
+rename them into the output folder when both are on the same filesystem
+and copy them otherwise, so a cross-device copy to a network share never
+holds a download slot.
+
+Scratch usage is bounded by ``staging_max_bytes``: a job reserves its
+estimated size until its files have been moved out. A paused job keeps
+its directory and its reservation until it resumes or is cancelled, so
+its partial files stay accounted for. A job that does not fit waits for
+pending moves to free space, and writes straight to the output folder if
+nothing is left to wait for.
+
+Independently of staging, the yt-dlp write options (``buffersize``,
+``noresizebuffer``, ``http_chunk_size``) are picked per target from
+``write_tuning``, depending on whether the directory a download writes to
+is on a local or a network filesystem.
+"""
+
+import ctypes
+import functools
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.download_config import download_config
+
+
+# Filesystem types (Linux /proc/mounts) treated as network storage
+NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afpfs", "9p", "ceph",
+    "glusterfs", "fuse.sshfs", "fuse.rclone", "fuse.glusterfs", "davfs", "fuse.davfs2",
+}
+
+# Suffix of a file being copied into the output folder
+MOVING_SUFFIX = ".moving"
+
+
+def _linux_fstype(path):
+    best, fstype = "", None
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace("\\040", " ")
+                if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+                    best, fstype = mount_point, fields[2]
+    except OSError:
+        pass
+    return fstype
+
+
+@functools.lru_cache(maxsize=64)
+def storage_kind(path):
+    """"network" if path is on a network share, else "local"."""
+    path = os.path.abspath(path)
+    if path.startswith(("\\\\", "//")):
+        return "network"
+    if os.name == "nt":
+        drive = os.path.splitdrive(path)[0]
+        DRIVE_REMOTE = 4
+        if drive and ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE:
+            return "network"
+    elif sys.platform.startswith("linux"):
+        if _linux_fstype(os.path.realpath(path)) in NETWORK_FILESYSTEMS:
+            return "network"
+    return "local"
+
+
+def write_options(directory):
+    """yt-dlp buffer and chunk options for downloads written to directory."""
+    tuning = download_config.get_config()["write_tuning"].get(storage_kind(directory), {})
+    return {key: value for key, value in tuning.items() if value is not None}
+
+
+def _device_of(path):
+    while path and not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+class StagedJob:
+    """A download attempt running in its own scratch directory."""
+
+    def __init__(self, directory, output_dir, reserved, job_id=None):
+        self.directory = directory
+        self.output_dir = output_dir
+        self.reserved = reserved
+        self.job_id = job_id
+
+    def final_path(self, path):
+        """Where a file of the scratch directory ends up in the output folder."""
+        relative = os.path.relpath(path, self.directory)
+        if relative.startswith(os.pardir):
+            return path
+        return os.path.join(self.output_dir, relative)
+
+
+class StagingArea:
+    """Hands out scratch directories and moves finished files to their output folder."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._reserved = 0          # Estimated bytes of running staged jobs
+        self._moving = 0            # Bytes waiting to be moved out
+        self._parked = {}           # job id -> StagedJob of a paused job
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            workers = download_config.get_config()["staging_move_workers"]
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mover")
+        return self._executor
+
+    def acquire(self, entry, output_dir, job=None):
+        """
+        Scratch directory for a download attempt, or None to write to output_dir.
+
+        The directory is derived from the URL, the output folder and the
+        selected options, so jobs fetching the same URL in different formats
+        never share one. A paused job gets its own directory back, with its
+        partial files and its reservation.
+        """
+        if job is not None:
+            with self._cond:
+                parked = self._parked.pop(job.id, None)
+            if parked is not None:
+                os.makedirs(parked.directory, exist_ok=True)
+                return parked
+
+        config = download_config.get_config()
+        root = config["staging_dir"]
+        if not root:
+            return None
+        estimate = getattr(job, "estimated_size", None) or 0
+        reserve = int(estimate * config["free_space_margin"])
+        limit = config["staging_max_bytes"]
+
+        with self._cond:
+            # Pending moves free scratch space; running jobs may not for a while
+            while self._reserved + self._moving + reserve > limit and self._moving:
+                self._cond.wait()
+            if self._reserved + self._moving + reserve > limit:
+                return None
+            try:
+                os.makedirs(root, exist_ok=True)
+                free = shutil.disk_usage(root).free
+            except OSError:
+                return None
+            if free < reserve + config["min_free_space"]:
+                return None
+            self._reserved += reserve
+
+        selections = json.dumps(getattr(entry, "selections", None), sort_keys=True, default=str)
+        identity = f"{os.path.abspath(output_dir)}\0{entry.url}\0{selections}"
+        directory = os.path.join(root, hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16])
+        os.makedirs(directory, exist_ok=True)
+        return StagedJob(directory, output_dir, reserve, getattr(job, "id", None))
+
+    def release(self, staged, keep_files=False):
+        """
+        End an attempt that did not finish.
+
+        A paused one (keep_files) is parked with its partial files and its
+        reservation until acquire() hands it back or discard() drops it.
+        """
+        if keep_files and staged.job_id is not None:
+            with self._cond:
+                self._parked[staged.job_id] = staged
+            return
+        with self._cond:
+            self._reserved -= staged.reserved
+            staged.reserved = 0
+            self._cond.notify_all()
+        if not keep_files:
+            shutil.rmtree(staged.directory, ignore_errors=True)
+
+    def discard(self, job):
+        """Delete a paused job's scratch directory and free its reservation (on cancel)."""
+        with self._cond:
+            staged = self._parked.pop(job.id, None)
+        if staged is not None:
+            self.release(staged)
+
+    def commit(self, staged):
+        """
+        Move the finished attempt's files to the output folder in the background.
+
+        Returns:
+            Future that completes once the files have been moved
+        """
+        files = []
+        for folder, _, names in os.walk(staged.directory):
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    files.append((path, os.path.getsize(path)))
+                except OSError:
+                    pass
+        with self._cond:
+            self._reserved -= staged.reserved
+            staged.reserved = 0
+            self._moving += sum(size for _, size in files)
+            self._cond.notify_all()
+        return self._get_executor().submit(self._move_job, staged, files)
+
+    def _move_job(self, staged, files):
+        same_device = _device_of(staged.directory) == _device_of(staged.output_dir)
+        for path, size in files:
+            try:
+                _move(path, staged.final_path(path), same_device)
+            except OSError as e:
+                if sys.stderr is not None:
+                    print(f"[WARN] Could not move {path} to {staged.output_dir}: {e}", file=sys.stderr)
+            finally:
+                with self._cond:
+                    self._moving -= size
+                    self._cond.notify_all()
+        # Only empty directories go; files that could not be moved stay in scratch
+        for folder, _, _ in sorted(os.walk(staged.directory), reverse=True):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+
+    def pending_bytes(self):
+        """Bytes waiting to be moved to their output folder."""
+        with self._cond:
+            return self._moving
+
+    def drain(self):
+        """Wait until every finished file has been moved out."""
+        with self._cond:
+            while self._moving:
+                self._cond.wait()
+
+
+def _move(source, destination, same_device):
+    """Rename source to destination, or copy it across devices and delete the source."""
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    if same_device:
+        os.replace(source, destination)
+        return
+    # Copied under a temporary name so the output folder never shows a partial file
+    partial = destination + MOVING_SUFFIX
+    try:
+        shutil.copyfile(source, partial)
+        shutil.copystat(source, partial)
+        os.replace(partial, destination)
+    except OSError:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    os.remove(source)
+
+
+# Global staging area (used by core.workers.run_download)
+staging_area = StagingArea()
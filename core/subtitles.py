@@ -0,0 +1,286 @@
+"""
+In-process subtitle conversion for the YouTube Downloader application.
+
+Converts WebVTT/SRT subtitle files into the formats listed in
+``get_supported_formats()["subtitle"]`` without spawning ffmpeg.
+"""
+
+import html
+import os
+import re
+from typing import Iterable, Iterator, List, Optional
+
+
+# Formats we can read and write
+INPUT_FORMATS = ("vtt", "srt")
+OUTPUT_FORMATS = ("srt", "vtt", "ass", "ssa")
+
+_TIMING_RE = re.compile(
+    r"^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})"
+)
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z]+|\d[\d:.]*)([^>]*)>")
+_INLINE_TIMESTAMP_RE = re.compile(r"<\d[\d:.]*>")
+
+# Cues shorter than this that only repeat text already on screen are
+# the "hold" cues YouTube inserts between rolling caption lines
+_HOLD_CUE_MAX_MS = 50
+
+_ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 384
+PlayResY: 288
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,0
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+_SSA_HEADER = """[Script Info]
+ScriptType: v4.00
+
+[V4 Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, TertiaryColour, BackColour, Bold, Italic, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, AlphaLevel, Encoding
+Style: Default,Arial,16,16777215,16777215,16777215,0,0,0,1,1,0,2,10,10,10,0,0
+
+[Events]
+Format: Marked, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+class Cue:
+    """A single subtitle cue with times in milliseconds."""
+
+    __slots__ = ("start", "end", "lines")
+
+    def __init__(self, start: int, end: int, lines: List[str]):
+        self.start = start
+        self.end = end
+        self.lines = lines
+
+
+def can_convert(source_ext: str, target_format: str) -> bool:
+    """Check whether a subtitle file can be converted without ffmpeg."""
+    return source_ext in INPUT_FORMATS and target_format in OUTPUT_FORMATS
+
+
+def parse_timestamp(value: str) -> int:
+    """Parse a VTT/SRT timestamp (``[hh:]mm:ss.ttt``) into milliseconds."""
+    value = value.replace(",", ".")
+    clock, _, fraction = value.partition(".")
+    parts = [int(p) for p in clock.split(":")]
+    while len(parts) < 3:
+        parts.insert(0, 0)
+    hours, minutes, seconds = parts
+    millis = int((fraction + "00")[:3]) if fraction else 0
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + millis
+
+
+def _split_ms(ms: int):
+    ms = max(ms, 0)
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return hours, minutes, seconds, ms
+
+
+def format_timestamp(ms: int, target_format: str) -> str:
+    """Format milliseconds as a timestamp for the given subtitle format."""
+    hours, minutes, seconds, millis = _split_ms(ms)
+    if target_format == "srt":
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+    if target_format in ("ass", "ssa"):
+        return f"{hours:d}:{minutes:02d}:{seconds:02d}.{millis // 10:02d}"
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+
+
+def _read_blocks(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Group input lines into blank-line separated blocks.
+
+    Whitespace-only lines do not end a block: YouTube puts a single
+    space line inside its auto-caption cues.
+    """
+    block = []
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        if line:
+            block.append(line)
+        elif block:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def iter_cues(lines: Iterable[str]) -> Iterator[Cue]:
+    """
+    Parse WebVTT or SRT lines into cues, one block at a time.
+
+    Cue payload keeps its inline tags; header, NOTE, STYLE and REGION
+    blocks are skipped.
+    """
+    for block in _read_blocks(lines):
+        timing_index = None
+        for i, line in enumerate(block[:2]):
+            if "-->" in line:
+                timing_index = i
+                break
+        if timing_index is None:
+            continue
+        match = _TIMING_RE.match(block[timing_index])
+        if not match:
+            continue
+        start = parse_timestamp(match.group(1))
+        end = parse_timestamp(match.group(2))
+        yield Cue(start, end, [line for line in block[timing_index + 1:] if line.strip()])
+
+
+def _plain_text(line: str) -> str:
+    """Strip all tags and entities from a cue line."""
+    return html.unescape(_TAG_RE.sub("", line)).strip()
+
+
+def _carried_over(shown: List[str], lines: List[str]) -> int:
+    """Number of leading lines that repeat the last lines of the previous cue."""
+    for count in range(min(len(shown), len(lines)), 0, -1):
+        if lines[:count] == shown[-count:]:
+            return count
+    return 0
+
+
+def dedupe_rolling_cues(cues: Iterable[Cue]) -> Iterator[Cue]:
+    """
+    Collapse YouTube's rolling auto-caption duplication.
+
+    Auto-generated captions repeat the previous line at the top of every
+    cue and insert near-zero length "hold" cues between them. Lines
+    already on screen are dropped and repeated cues extend the previous
+    one instead of producing a new entry. A line only counts as already
+    on screen when it continues the previous cue's lines, in order, and
+    the cue starts within the previous cue's time window, so a line
+    genuinely said twice is kept.
+    """
+    pending = None
+    shown = []
+    shown_end = None
+    for cue in cues:
+        lines = [line for line in cue.lines if _plain_text(line)]
+        plain = [_plain_text(line) for line in lines]
+        current = list(plain)
+
+        # Drop leading lines that are still on screen from the last cue
+        if shown and cue.start <= shown_end + _HOLD_CUE_MAX_MS:
+            overlap = _carried_over(shown, plain)
+            del plain[:overlap]
+            del lines[:overlap]
+
+        if not lines:
+            # Everything is still on screen: it stays there until this cue ends
+            if shown:
+                shown_end = max(shown_end, cue.end)
+            if pending is not None and cue.end - cue.start <= _HOLD_CUE_MAX_MS:
+                continue
+            if pending is not None and cue.start <= pending.end + _HOLD_CUE_MAX_MS:
+                pending.end = max(pending.end, cue.end)
+            continue
+
+        shown = current
+        shown_end = cue.end
+        if pending is not None:
+            if pending.end > cue.start:
+                pending.end = cue.start
+            yield pending
+        pending = Cue(cue.start, cue.end, lines)
+
+    if pending is not None:
+        yield pending
+
+
+def _render_srt_line(line: str) -> str:
+    def replace(match):
+        closing, name, _ = match.groups()
+        name = name.lower()
+        if name in ("b", "i", "u"):
+            return f"<{closing}{name}>"
+        return ""
+    return html.unescape(_TAG_RE.sub(replace, line))
+
+
+def _render_vtt_line(line: str) -> str:
+    return _INLINE_TIMESTAMP_RE.sub("", line)
+
+
+def _render_ass_line(line: str, target_format: str) -> str:
+    allowed = ("b", "i", "u") if target_format == "ass" else ("b", "i")
+
+    def replace(match):
+        closing, name, _ = match.groups()
+        name = name.lower()
+        if name in allowed:
+            return "{\\%s%d}" % (name, 0 if closing else 1)
+        return ""
+    return html.unescape(_TAG_RE.sub(replace, line))
+
+
+def write_cues(cues: Iterable[Cue], out, target_format: str):
+    """Write cues to an open text file in the target format."""
+    if target_format == "vtt":
+        out.write("WEBVTT\n\n")
+    elif target_format == "ass":
+        out.write(_ASS_HEADER)
+    elif target_format == "ssa":
+        out.write(_SSA_HEADER)
+
+    for index, cue in enumerate(cues, start=1):
+        start = format_timestamp(cue.start, target_format)
+        end = format_timestamp(cue.end, target_format)
+        if target_format == "srt":
+            text = "\n".join(_render_srt_line(line) for line in cue.lines)
+            out.write(f"{index}\n{start} --> {end}\n{text}\n\n")
+        elif target_format == "vtt":
+            text = "\n".join(_render_vtt_line(line) for line in cue.lines)
+            out.write(f"{start} --> {end}\n{text}\n\n")
+        else:
+            text = "\\N".join(_render_ass_line(line, target_format) for line in cue.lines)
+            prefix = "Dialogue: 0" if target_format == "ass" else "Dialogue: Marked=0"
+            out.write(f"{prefix},{start},{end},Default,,0,0,0,,{text}\n")
+
+
+def _is_rolling(path: str) -> bool:
+    """Detect YouTube-style rolling captions (inline word timestamps)."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for i, line in enumerate(f):
+            if _INLINE_TIMESTAMP_RE.search(line):
+                return True
+            if i > 200:
+                break
+    return False
+
+
+def convert_subtitle_file(source_path: str, target_path: str, target_format: str, dedupe: Optional[bool] = None):
+    """
+    Convert a VTT/SRT subtitle file to another subtitle format.
+
+    Args:
+        source_path: Path of the VTT or SRT file to read
+        target_path: Path of the file to write
+        target_format: One of OUTPUT_FORMATS
+        dedupe: Collapse rolling auto-captions; detected automatically when None
+    """
+    if target_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported subtitle format: {target_format}")
+
+    if dedupe is None:
+        dedupe = _is_rolling(source_path)
+
+    tmp_path = target_path + ".tmp"
+    with open(source_path, "r", encoding="utf-8", errors="replace") as src, \
+            open(tmp_path, "w", encoding="utf-8", newline="\n") as dst:
+        cues = iter_cues(src)
+        if dedupe:
+            cues = dedupe_rolling_cues(cues)
+        write_cues(cues, dst, target_format)
+    os.replace(tmp_path, target_path)
@@ -0,0 +1,262 @@
+"""
+Queue-level throughput and ETA for the YouTube Downloader application.
+
+Jobs submitted to the scheduler are tracked from their progress events
+(bytes written and yt-dlp's total per file). Each job keeps a fixed-size
+ring buffer of (time, bytes) samples for its current speed, and a global
+ring buffer of per-tick byte counts feeds an exponentially weighted
+moving average (EWMA) of the aggregate throughput, so memory stays
+constant per job however long a batch runs.
+
+A background thread turns this into a summary once per interval (total
+remaining bytes, aggregate speed, batch ETA) and hands it to listeners,
+so nothing is computed on the UI thread. Paused jobs are counted apart
+and left out of the remaining bytes and ETA until they resume.
+"""
+
+import array
+import math
+import threading
+import time
+
+
+# Seconds between summaries
+SUMMARY_INTERVAL = 1.0
+
+# Samples per job ring buffer, and minimum seconds between two samples
+JOB_WINDOW = 16
+JOB_SAMPLE_INTERVAL = 0.25
+
+# Ticks kept in the global ring buffer
+GLOBAL_WINDOW = 60
+
+# Time constant (seconds) of the aggregate speed EWMA
+EWMA_SECONDS = 10.0
+
+
+class RingBuffer:
+    """Fixed-size ring of (time, value) pairs stored in two float arrays."""
+
+    __slots__ = ("times", "values", "head", "count")
+
+    def __init__(self, size):
+        self.times = array.array("d", bytes(8 * size))
+        self.values = array.array("d", bytes(8 * size))
+        self.head = 0       # Index of the newest sample
+        self.count = 0
+
+    def push(self, when, value):
+        if self.count:
+            self.head = (self.head + 1) % len(self.times)
+        self.times[self.head] = when
+        self.values[self.head] = value
+        self.count = min(self.count + 1, len(self.times))
+
+    def replace_newest(self, when, value):
+        self.times[self.head] = when
+        self.values[self.head] = value
+
+    def newest(self):
+        return self.times[self.head], self.values[self.head]
+
+    def oldest(self):
+        index = (self.head - self.count + 1) % len(self.times)
+        return self.times[index], self.values[index]
+
+    def rate(self):
+        """Change of value per second between the oldest and newest samples."""
+        if self.count < 2:
+            return None
+        (t0, v0), (t1, v1) = self.oldest(), self.newest()
+        return (v1 - v0) / (t1 - t0) if t1 > t0 else None
+
+
+class _JobProgress:
+    """Byte counts and recent speed samples of one tracked job."""
+
+    __slots__ = ("job", "files", "downloaded", "samples", "last_push")
+
+    def __init__(self, job):
+        self.job = job
+        self.files = {}         # filename -> [downloaded, total]
+        self.downloaded = 0
+        self.samples = RingBuffer(JOB_WINDOW)
+        self.last_push = 0.0
+
+    def expected_size(self):
+        """Best guess of the job's total bytes: yt-dlp's totals or the pre-download estimate."""
+        reported = sum(total or downloaded for downloaded, total in self.files.values())
+        return max(reported, self.job.estimated_size or 0) or None
+
+
+class ThroughputTracker:
+    """Aggregates progress of the scheduler's jobs into batch speed and ETA."""
+
+    def __init__(self, interval=SUMMARY_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._jobs = {}             # job id -> _JobProgress
+        self._listeners = []
+        self._wake = threading.Event()
+        self._thread = None
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self._done = 0
+        self._failed = 0
+        self._total_bytes = 0       # Every byte received this batch (monotonic)
+        self._ticks = RingBuffer(GLOBAL_WINDOW)
+        self._ewma = None
+        self._summary = None
+
+    def add_listener(self, listener):
+        """Call listener(summary) from the tracker thread after every summary."""
+        self._listeners.append(listener)
+
+    # --- Events (any thread) ------------------------------------------------
+
+    def track(self, job):
+        """Start tracking a submitted job; starts a new batch if the last one ended."""
+        with self._lock:
+            if not self._jobs:
+                self._reset_batch()
+            self._jobs[job.id] = _JobProgress(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="throughput", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def on_progress(self, job, filename, downloaded_bytes, total_bytes=None):
+        """Record a progress event; jobs that were never tracked are ignored."""
+        now = time.monotonic()
+        with self._lock:
+            progress = self._jobs.get(job.id)
+            if progress is None:
+                return
+            counts = progress.files.get(filename)
+            if counts is None:
+                counts = progress.files[filename] = [0, None]
+            # A file restarted from scratch reports fewer bytes; count only growth
+            delta = max(0, downloaded_bytes - counts[0])
+            counts[0] = downloaded_bytes
+            if total_bytes:
+                counts[1] = total_bytes
+            progress.downloaded += delta
+            self._total_bytes += delta
+
+            # Events closer than the sample interval update the newest sample in place
+            samples = progress.samples
+            if samples.count >= 2 and now - progress.last_push < JOB_SAMPLE_INTERVAL:
+                samples.replace_newest(now, progress.downloaded)
+            else:
+                samples.push(now, progress.downloaded)
+                progress.last_push = now
+
+    def untrack(self, job):
+        """Stop tracking a job that finished, failed or was cancelled."""
+        with self._lock:
+            progress = self._jobs.pop(job.id, None)
+            if progress is None:
+                return
+            if job.state == "finished":
+                self._done += 1
+            else:
+                self._failed += 1
+
+    # --- Summaries (tracker thread) -----------------------------------------
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            summary = self.summarize()
+            for listener in self._listeners:
+                try:
+                    listener(summary)
+                except Exception:
+                    pass  # A broken listener must not stop the others
+            with self._lock:
+                if not self._jobs:
+                    self._wake.clear()  # Idle until the next batch
+            time.sleep(self.interval)
+
+    def summarize(self):
+        """Compute and return the batch summary (called by the tracker thread)."""
+        now = time.monotonic()
+        with self._lock:
+            ticks = self._ticks
+            if ticks.count:
+                last_time, last_total = ticks.newest()
+                elapsed = now - last_time
+                if elapsed > 0:
+                    instant = (self._total_bytes - last_total) / elapsed
+                    alpha = 1.0 - math.exp(-elapsed / EWMA_SECONDS)
+                    self._ewma = instant if self._ewma is None else self._ewma + alpha * (instant - self._ewma)
+            ticks.push(now, self._total_bytes)
+
+            remaining = 0
+            unknown = 0
+            running = 0
+            paused = 0
+            job_speeds = []
+            for progress in self._jobs.values():
+                # Paused jobs stay tracked for their resume but are not part of the batch left
+                if progress.job.state == "paused":
+                    paused += 1
+                    continue
+                expected = progress.expected_size()
+                if expected is None:
+                    unknown += 1
+                else:
+                    remaining += max(0, expected - progress.downloaded)
+                if progress.job.state == "running":
+                    running += 1
+                    samples = progress.samples
+                    # Stale samples mean the job stopped receiving data
+                    rate = samples.rate() if samples.count and now - samples.newest()[0] < 5.0 else 0.0
+                    job_speeds.append(rate or 0.0)
+
+            speed = self._ewma or 0.0
+            summary = {
+                "jobs": len(self._jobs) + self._done + self._failed,
+                "done": self._done,
+                "failed": self._failed,
+                "running": running,
+                "queued": len(self._jobs) - running - paused,
+                "paused": paused,
+                "downloaded_bytes": self._total_bytes,
+                "remaining_bytes": remaining,
+                "unknown_size_jobs": unknown,
+                "speed": speed,
+                "window_speed": ticks.rate() or 0.0,
+                "job_speed": sum(job_speeds) / len(job_speeds) if job_speeds else None,
+                "eta_s": remaining / speed if speed > 1 and len(self._jobs) > paused else None,
+            }
+            self._summary = summary
+        return summary
+
+    def last_summary(self):
+        """The most recent summary, or None before the first one."""
+        with self._lock:
+            return self._summary
+
+
+def format_bytes(value):
+    """Human-readable byte count (binary units)."""
+    value = float(value or 0)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def format_duration(seconds):
+    """h:mm:ss or m:ss for an ETA."""
+    seconds = int(seconds + 0.5)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+# Global tracker (fed by core.scheduler)
+throughput_tracker = ThroughputTracker()
@@ -2,6 +2,7 @@
 Utility functions for the YouTube Downloader application.
 """
 
+import functools
 import json
 import os
 import sys
@@ -22,8 +23,9 @@ def _get_resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 
+@functools.lru_cache(maxsize=None)
 def load_language_names():
-    """Load language names from the JSON file."""
+    """Load language names from the JSON file (read once; don't modify the result)."""
     try:
         file_path = _get_resource_path(LANGUAGE_FILE)
         with open(file_path, "r", encoding="utf-8") as f:
@@ -32,8 +34,9 @@ def load_language_names():
         return {}
 
 
+@functools.lru_cache(maxsize=None)
 def load_audio_locale_names():
-    """Load display names for locales (locale -> "Language (Country)") from LOCALES_FILE."""
+    """Load display names for locales (locale -> "Language (Country)") from LOCALES_FILE (read once)."""
     try:
         file_path = _get_resource_path(LOCALES_FILE)
         with open(file_path, "r", encoding="utf-8") as f:
@@ -73,6 +76,16 @@ def get_language_display_name(lang_or_locale_code: str) -> str:
 ## locale-specific display helper removed; use get_language_display_name
 
 
+@functools.lru_cache(maxsize=None)
+def _codes_by_name():
+    """Reverse index of both name files: display name -> code, first match wins."""
+    codes = {}
+    for names in (load_language_names(), load_audio_locale_names()):
+        for code, name in names.items():
+            codes.setdefault(name, code)
+    return codes
+
+
 def find_language_code_by_name(display_name: str) -> str:
     """Find a code for a display name.
 
@@ -81,17 +94,7 @@ def find_language_code_by_name(display_name: str) -> str:
     2) Match name in LOCALES_FILE values -> return locale code (e.g., "English (United States)" -> "en-US")
     3) Fallback: return the original display_name
     """
-    language_names = load_language_names()
-    for code, name in language_names.items():
-        if name == display_name:
-            return code
-
-    locale_names = load_audio_locale_names()
-    for code, name in locale_names.items():
-        if name == display_name:
-            return code
-
-    return display_name
+    return _codes_by_name().get(display_name, display_name)
 
 
 ## locale-specific reverse lookup removed; use find_language_code_by_name
@@ -102,6 +105,28 @@ def sanitize_filename(filename):
     return re.sub(r'[<>:"/\\|?*]', '_', filename)
 
 
+def resolve_inside(root, path):
+    """
+    Resolve a client-supplied folder that must stay inside root.
+
+    Args:
+        root: Folder the client is confined to
+        path: Absolute folder, or one relative to root; empty means root
+
+    Returns:
+        The resolved folder, or None if it lies outside root
+    """
+    if not path:
+        return root
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, path))
+    try:
+        inside = os.path.commonpath([root, path]) == root
+    except ValueError:  # Another drive on Windows
+        inside = False
+    return path if inside else None
+
+
 def is_valid_url(url):
     """
     Check if the provided string is a valid URL.
@@ -2,15 +2,17 @@
 Video information fetching and processing for the YouTube Downloader application.
 """
 
-import yt_dlp
 from core.utils import get_language_display_name
 from core.localization import localization
 
 
 def fetch_video_info(url):
     """Fetch video information from YouTube URL with enhanced configuration."""
-    # Import here to avoid circular imports
+    # Import here to avoid circular imports; yt-dlp loads on first use
+    import yt_dlp
     from core.downloader import get_ffmpeg_path
+    from core.retry import classify_error, retry_engine
+    from core.sessions import session_pool
     
     ffmpeg_path, ffprobe_path = get_ffmpeg_path()
     
@@ -20,27 +22,30 @@ def fetch_video_info(url):
         "ffmpeg_location": ffmpeg_path,
         "socket_timeout": 30,
         "retries": 3,
+        "retry_sleep_functions": {
+            "http": retry_engine.sleep_function(url),
+            "extractor": retry_engine.sleep_function(url),
+        },
         "http_headers": {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
     }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        try:
-            info = ydl.extract_info(url, download=False)
-            return info
-        except yt_dlp.utils.DownloadError as e:
-            error_msg = str(e).lower()
-            if "video unavailable" in error_msg or "private video" in error_msg:
-                raise Exception("video_not_found")
-            elif "access denied" in error_msg or "sign in" in error_msg:
-                raise Exception("access_denied")
-            elif "network" in error_msg or "connection" in error_msg:
-                raise Exception("network_error")
-            else:
+    
+    def attempt():
+        with session_pool.session(ydl_opts) as ydl:
+            try:
+                return ydl.extract_info(url, download=False)
+            except yt_dlp.utils.DownloadError as e:
+                raise Exception(classify_error(e, default="video_not_found"))
+            except Exception as e:
+                # The host's breaker opened during yt-dlp's own retries
+                if str(e) == "throttled":
+                    raise
+                # Re-raise with a generic error message
                 raise Exception("video_not_found")
-        except Exception as e:
-            # Re-raise with a generic error message
-            raise Exception("video_not_found")
+    
+    # Throttling and network errors are retried; the host's breaker is waited out
+    return retry_engine.call(url, attempt)
 
 
 def extract_resolution_options(formats):
@@ -126,7 +131,14 @@ def extract_subtitle_options(info):
 
 
 def extract_format_options(formats):
-    """Extract available video container format options from video formats."""
+    """Extract available output format options from video formats.
+    
+    Video containers come first; audio-only targets are appended when the
+    video offers audio-only streams so they can be downloaded without video.
+    """
+    from core.downloader import get_supported_formats
+    from core.ffmpeg import supports_audio_format
+    
     # Define valid video container formats
     valid_video_formats = {"mp4", "webm", "mkv", "avi", "mov", "flv", "3gp", "ogv"}
     
@@ -146,4 +158,13 @@ def extract_format_options(formats):
     if not format_list:
         format_list = ["mp4", "webm", "mkv"]
     
+    # Offer audio-only targets when there is an audio-only stream to pick
+    # and the local ffmpeg can write them
+    has_audio_only = any(
+        f.get("acodec") not in (None, "none") and f.get("vcodec") == "none"
+        for f in formats
+    )
+    if has_audio_only:
+        format_list.extend(f for f in get_supported_formats()["audio"] if supports_audio_format(f))
+    
     return format_list
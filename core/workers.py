@@ -0,0 +1,313 @@
+"""
+Process-isolated download workers for the YouTube Downloader application.
+
+In "process" worker mode each scheduler slot drives a long-lived child
+process over a pipe, so extraction and post-processing run outside the
+GUI process (no GIL contention with the Tk main loop) and a crashing
+download cannot take the application down.
+"""
+
+import multiprocessing
+import threading
+import time
+
+from core.download_config import download_config
+
+
+# Minimum seconds between byte-count events sent back to the parent
+_BYTES_EVENT_INTERVAL = 0.25
+
+
+class _RemoteJob:
+    """Child-side stand-in for a DownloadJob, backed by the parent pipe."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._control = None
+        self._last_bytes_event = 0.0
+        self.files = set()
+        self.file_bytes = {}
+
+    def _poll_control(self):
+        while self._control is None and self._conn.poll():
+            message = self._conn.recv()
+            if message[0] in ("cancel", "pause"):
+                self._control = message[0]
+
+    @property
+    def cancelled(self):
+        self._poll_control()
+        return self._control == "cancel"
+
+    @property
+    def paused(self):
+        self._poll_control()
+        return self._control == "pause"
+
+    def should_stop(self):
+        self._poll_control()
+        return self._control is not None
+
+    def record_file(self, path):
+        if path and path not in self.files:
+            self.files.add(path)
+            self._conn.send(("file", path))
+
+    def record_progress(self, filename, downloaded_bytes, total_bytes=None):
+        self.record_file(filename)
+        self.file_bytes[filename] = downloaded_bytes
+        now = time.monotonic()
+        # A file's last count always goes through so the parent's totals are exact
+        complete = total_bytes and downloaded_bytes >= total_bytes
+        if complete or now - self._last_bytes_event >= _BYTES_EVENT_INTERVAL:
+            self._last_bytes_event = now
+            self._conn.send(("bytes", filename, downloaded_bytes, total_bytes))
+
+
+def _worker_main(conn):
+    """Child process loop: run one download at a time and stream events back."""
+    from core.downloader import download_video
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == "stop":
+            return
+        if message[0] != "run":
+            continue
+
+        _, entry, output_dir, config = message
+        # Settings changed in the parent after this process was spawned
+        download_config.update_config(config)
+        job = _RemoteJob(conn)
+        last_percent = [None]
+
+        def progress_callback(percent, status_text):
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                conn.send(("progress", percent, status_text))
+
+        def status_callback(status_text):
+            conn.send(("status", status_text))
+
+        try:
+            download_video(
+                entry,
+                output_dir,
+                progress_callback=progress_callback,
+                status_callback=status_callback,
+                job=job
+            )
+            conn.send(("metrics", entry.metrics.download_stats()))
+            conn.send(("done",))
+        except Exception as e:
+            conn.send(("metrics", entry.metrics.download_stats()))
+            conn.send(("error", str(e)))
+
+
+class ProcessWorker:
+    """A child process that runs downloads sent over a pipe."""
+
+    def __init__(self, context):
+        self._context = context
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def run(self, entry, output_dir, job, progress_callback=None, status_callback=None):
+        """
+        Run one download in the child process, relaying its events.
+
+        Blocks the calling (scheduler worker) thread until the child reports
+        completion. Cancel/pause requests on the job are forwarded to the child.
+
+        Raises:
+            Exception with the child's error code, or "worker_crashed"
+        """
+        self._conn.send(("run", entry, output_dir, download_config.get_config()))
+        control_sent = False
+
+        while True:
+            if not control_sent and job is not None and job.should_stop():
+                self._conn.send(("cancel" if job.cancelled else "pause",))
+                control_sent = True
+
+            try:
+                if not self._conn.poll(0.1):
+                    if not self.process.is_alive():
+                        raise EOFError()
+                    continue
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                raise Exception("worker_crashed")
+
+            kind = message[0]
+            if kind == "progress":
+                if progress_callback:
+                    progress_callback(message[1], message[2])
+            elif kind == "status":
+                if status_callback:
+                    status_callback(message[1])
+            elif kind == "file":
+                if job is not None:
+                    job.record_file(message[1])
+            elif kind == "bytes":
+                if job is not None:
+                    job.record_progress(message[1], message[2], message[3])
+            elif kind == "metrics":
+                entry.metrics.merge_download_stats(message[1])
+            elif kind == "done":
+                return
+            elif kind == "error":
+                raise Exception(message[1])
+
+    def stop(self):
+        """Ask the child to exit."""
+        try:
+            self._conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+
+
+class ProcessWorkerPool:
+    """Pool of long-lived download worker processes, one per scheduler slot."""
+
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+        return ProcessWorker(self._context)
+
+    def _release(self, worker):
+        if worker.is_alive():
+            with self._lock:
+                self._idle.append(worker)
+
+    def run(self, entry, output_dir, job, progress_callback=None, status_callback=None):
+        """Run a download on an idle worker process (spawning one if needed)."""
+        worker = self._acquire()
+        try:
+            worker.run(entry, output_dir, job, progress_callback, status_callback)
+        finally:
+            self._release(worker)
+
+    def shutdown(self):
+        """Stop all idle worker processes."""
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop()
+
+
+# Global process pool (processes are spawned on first use)
+process_pool = ProcessWorkerPool()
+
+
+def _run_attempt(entry, target_dir, progress_callback, status_callback, job, staged):
+    """One download attempt in the configured worker mode, recorded in the metrics."""
+    from core.metrics import metrics_recorder
+    
+    metrics = entry.metrics
+    try:
+        if download_config.get_config()["worker_mode"] != "process":
+            from core.downloader import download_video
+            download_video(
+                entry,
+                target_dir,
+                progress_callback=progress_callback,
+                status_callback=status_callback,
+                job=job
+            )
+        else:
+            metrics.start_attempt(job)
+            process_pool.run(entry, target_dir, job, progress_callback, status_callback)
+    except Exception as e:
+        outcome = str(e) if str(e) in ("cancelled", "paused") else "failed"
+        metrics.finish_attempt(outcome, None if outcome != "failed" else str(e), job.files if job else ())
+        metrics_recorder.record(metrics)
+        raise
+    metrics.finish_attempt("finished", files=job.files if job else ())
+    if staged:
+        metrics.relocate(staged.final_path)
+    metrics_recorder.record(metrics)
+
+
+def run_download(entry, output_dir, progress_callback=None, status_callback=None, job=None):
+    """
+    Run a download in the configured worker mode, retrying per core.retry.
+
+    In "thread" mode download_video runs on the calling thread; in "process"
+    mode it runs in a pooled child process. Only the URL, the snapshotted
+    selections and the current settings cross the process boundary (the
+    child's transfer figures and digests come back with its result).
+    
+    Failed attempts are retried according to their error code, after a
+    jittered backoff and once the host's circuit breaker lets them through;
+    permanent errors fail at once. A scheduled job waits for long backoffs
+    and open breakers back on the queue (Exception("deferred")), without
+    holding its worker. With staging enabled (core.staging) the
+    download writes to a scratch directory and its files are moved to
+    output_dir in the background once it has finished. Every attempt,
+    whatever its outcome, is handed to the metrics recorder.
+    """
+    from core.localization import localization
+    from core.retry import retry_engine
+    from core.staging import staging_area
+    from core.throughput import format_duration
+    
+    def on_retry(code, delay):
+        if status_callback:
+            status_callback(f"{localization.status('retrying')} ({format_duration(delay)})")
+    
+    def on_wait(delay):
+        if status_callback:
+            status_callback(localization.status("throttled"))
+    
+    # Downloads and post-processing run in scratch when staging is enabled
+    staged = staging_area.acquire(entry, output_dir, job)
+    target_dir = staged.directory if staged else output_dir
+    scheduled = job is not None and job.scheduled
+    try:
+        retry_engine.call(
+            entry.url,
+            lambda: _run_attempt(entry, target_dir, progress_callback, status_callback, job, staged),
+            should_stop=job.should_stop if job is not None else None,
+            on_retry=on_retry,
+            on_wait=on_wait,
+            defer=job.defer if scheduled else None,
+            attempts=job.retry_attempts if scheduled else 0,
+        )
+    except Exception as e:
+        error = str(e)
+        if error == "stopped" or (error == "deferred" and job.cancelled):
+            # Cancelled or paused while waiting to retry
+            error = "cancelled" if job.cancelled else "paused"
+            if error == "cancelled":
+                from core.downloader import cleanup_job_files
+                cleanup_job_files(job)
+        if staged:
+            # A deferred job resumes from its partial files like a paused one
+            staging_area.release(staged, keep_files=error in ("paused", "deferred"))
+        if error != str(e):
+            raise Exception(error)
+        raise
+    if staged:
+        if job is not None:
+            # Results and callers see where the files end up, not the scratch copies
+            job.files = {staged.final_path(path) for path in job.files}
+            job.pending_move = staging_area.commit(staged)
+        else:
+            staging_area.commit(staged)
@@ -2,16 +2,191 @@
 YouTube Downloader - Main Entry Point
 
 A modern YouTube video downloader with a clean GUI interface.
+
+Usage:
+    python main.py [URL ...]                 Open the GUI (or hand URLs to the running instance)
+    python main.py --daemon [--output DIR]   Run headless with the local JSON-RPC API
+    python main.py --queue Q URL ...         Add URLs to a shared queue (SQLite path or http://host:port)
+    python main.py --queue Q --worker        Drain a shared queue on this node
+    python main.py --queue Q --status        Print the shared queue's aggregated results
+    python main.py --queue Q --serve-queue HOST:PORT
+                                             Serve a SQLite queue to nodes without shared storage
+
+    --metrics-log PATH / --metrics-textfile PATH record per-job timings as JSONL
+    and Prometheus text; running instances also serve them at GET /metrics.
+    --profile [DIR] writes speedscope, pstats and tracemalloc profiles per job.
+    --digests sha256[,xxh64] hashes files while they download (sidecars + metrics).
+    --staging DIR downloads and post-processes on local scratch, moving files out afterwards.
 """
 
-from ui.main_window import MainWindow
+import argparse
+import json
+import multiprocessing
+import signal
+import sys
+import threading
+
+from config import DEFAULT_OUTPUT_DIR
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(prog="0xDownloader")
+    parser.add_argument("urls", nargs="*", help="URLs to add to the download queue")
+    parser.add_argument("--daemon", action="store_true", help="run headless with the local JSON-RPC API")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="destination folder for headless downloads")
+    parser.add_argument("--queue", help="shared queue: SQLite file on shared storage or http://host:port")
+    parser.add_argument("--worker", action="store_true", help="claim and download jobs from --queue")
+    parser.add_argument("--concurrency", type=int, default=2, help="parallel downloads for --worker on this node")
+    parser.add_argument("--lease", type=int, default=60, help="seconds a claimed job stays leased without a heartbeat")
+    parser.add_argument("--status", action="store_true", help="print --queue state counts and per-node results")
+    parser.add_argument("--serve-queue", metavar="HOST:PORT", help="serve the --queue SQLite file to other nodes (HOST defaults to 127.0.0.1)")
+    parser.add_argument("--metrics-log", metavar="PATH", help="append a JSON line per download attempt to PATH")
+    parser.add_argument("--metrics-textfile", metavar="PATH",
+                        help="keep Prometheus metrics in PATH (for node_exporter's textfile collector)")
+    parser.add_argument("--digests", metavar="ALGOS",
+                        help="comma-separated digests computed while files download, e.g. sha256,xxh64")
+    parser.add_argument("--no-digest-sidecars", action="store_true",
+                        help="keep --digests in the metrics record only, without <file>.<algorithm> files")
+    parser.add_argument("--staging", metavar="DIR",
+                        help="download and post-process in DIR (fast local disk), then move files to the output folder")
+    parser.add_argument("--staging-max-gb", type=float, default=20,
+                        help="scratch space --staging may use for running and not yet moved downloads")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="profile jobs and the UI (default DIR: a folder next to --output)")
+    parser.add_argument("--profile-mode", choices=("sample", "cprofile"), default="sample",
+                        help="stack sampling only, or also cProfile per job phase")
+    parser.add_argument("--exit-when-shown", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def run_queue_command(args):
+    """Handle the shared queue commands (--queue)."""
+    from core.jobqueue import QueueWorker, open_queue
+    
+    queue = open_queue(args.queue, lease_seconds=args.lease)
+    
+    if args.serve_queue:
+        from core.rpc import start_server
+        host, _, port = args.serve_queue.rpartition(":")
+        # Loopback unless a host is given: the queue API is unauthenticated
+        host = host or "127.0.0.1"
+        server = start_server(queue.get_methods(), host=host, port=int(port))
+        if server is None:
+            print(f"[ERROR] Could not listen on {host}:{port}")
+            return 1
+        print(f"Serving queue {args.queue} on http://{host}:{port}/")
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *a: stop.set())
+        signal.signal(signal.SIGTERM, lambda *a: stop.set())
+        while not stop.is_set():
+            stop.wait(1)
+        server.shutdown()
+        return 0
+    
+    for url in args.urls:
+        print(f"Queued job {queue.add(url)}: {url}")
+    
+    if args.status:
+        print(json.dumps(queue.summary(), indent=2))
+    
+    if args.worker:
+        worker = QueueWorker(queue, args.output, concurrency=args.concurrency, lease_seconds=args.lease)
+        signal.signal(signal.SIGINT, lambda *a: worker.stop())
+        signal.signal(signal.SIGTERM, lambda *a: worker.stop())
+        print(f"Worker {worker.worker_id} draining {args.queue} ({args.concurrency} at a time)")
+        worker.run()
+    return 0
+
+
+def run(args):
+    """Run the mode selected on the command line."""
+    if args.queue:
+        return run_queue_command(args)
+    
+    # Hand URLs to an already running instance instead of starting another one
+    from core.rpc import hand_off
+    if not args.exit_when_shown and hand_off(args.urls):
+        return 0
+    
+    if args.daemon:
+        from core.daemon import run_daemon
+        return run_daemon(args.output, args.urls)
+    
+    from core import profiling
+    from ui.main_window import MainWindow
+    profiling.tag_main_thread()
+    app = MainWindow(initial_urls=args.urls)
+    app.run(exit_when_shown=args.exit_when_shown)
+    return 0
 
 
 def main():
     """Main entry point for the application."""
-    app = MainWindow()
-    app.run()
+    args = parse_args()
+    
+    if args.metrics_log or args.metrics_textfile:
+        from core.download_config import download_config
+        download_config.update_config({
+            "metrics_log": args.metrics_log,
+            "metrics_textfile": args.metrics_textfile,
+        })
+    
+    if args.digests:
+        from core.download_config import download_config
+        from core.integrity import validate_algorithms
+        algorithms = [name.strip().lower() for name in args.digests.split(",") if name.strip()]
+        errors = validate_algorithms(algorithms)
+        if errors:
+            print(f"[ERROR] {'; '.join(errors)}")
+            return 2
+        download_config.update_config({
+            "integrity_digests": algorithms,
+            "integrity_sidecars": not args.no_digest_sidecars,
+        })
+        config = download_config.get_config()
+        if (config["write_metadata"] or config["embed_thumbnails"]) and sys.stdout is not None:
+            print("[INFO] Tagging and cover art rewrite files after download, so --digests "
+                  "hashes them once more afterwards instead of while they download")
+    
+    if args.staging:
+        from core.download_config import download_config
+        download_config.update_config({
+            "staging_dir": args.staging,
+            "staging_max_bytes": int(args.staging_max_gb * 1024 ** 3),
+        })
+    
+    try:
+        if args.profile is None:
+            return run(args)
+        
+        from core import profiling
+        from core.download_config import download_config
+        # The sampler only sees this process, so downloads stay on threads
+        download_config.update_config({"worker_mode": "thread"})
+        profiling.start(args.profile or profiling.default_directory(args.output), mode=args.profile_mode)
+        try:
+            return run(args)
+        finally:
+            directory = profiling.stop()
+            if sys.stdout is not None:
+                print(f"Profiles written to {directory}")
+    finally:
+        if args.staging:
+            wait_for_moves()
+
+
+def wait_for_moves():
+    """Block until staged files have been moved to their output folders."""
+    from core.staging import staging_area
+    from core.throughput import format_bytes
+    pending = staging_area.pending_bytes()
+    if pending and sys.stdout is not None:
+        print(f"Moving {format_bytes(pending)} of finished downloads out of the staging directory...")
+    staging_area.drain()
 
 
 if __name__ == "__main__":
-    main()
+    # Required for process worker mode in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -2,8 +2,12 @@
 Main window and layout for the YouTube Downloader application.
 """
 
+import collections
+import importlib
 import os
 import sys
+import threading
+import time
 import ctypes
 import tkinter as tk
 import customtkinter as ctk
@@ -13,23 +17,63 @@ import webbrowser
 from config import (
     APP_GEOMETRY, APPEARANCE_MODE, COLOR_THEME,
     DEFAULT_OUTPUT_DIR, VIDEO_LIST_WIDTH, VIDEO_LIST_HEIGHT,
-    OSCAR_WEBSITE, KO_FI_LINK
+    OSCAR_WEBSITE, KO_FI_LINK,
+    ROW_FRAME_BUDGET_MS, ROW_FRAME_INTERVAL_MS, IMPORT_CHUNK, RPC_HOST, RPC_PORT
 )
 from core.localization import localization
 from core.utils import is_valid_url
+from core.downloader import cancel_download
+from core.metrics import metrics_recorder
+from core.rpc import RpcError, start_server
+from core.throughput import format_bytes, format_duration, throughput_tracker
 from ui.video_entry import VideoEntry
+from ui.watchdog import ui_watchdog
+
+
+# Heavy modules imported lazily elsewhere; loaded in the background once the
+# window is up so the first fetch/download doesn't pay for them
+WARM_UP_MODULES = ("yt_dlp", "core.postprocessors", "requests", "PIL.Image")
+
+# Characters trimmed from pasted/imported tokens (quotes, list punctuation)
+URL_TRIM_CHARS = "\"'<>()[],;"
+
+
+def _create_root():
+    """
+    Create the CTk root window, able to receive dropped files and text when
+    tkinterdnd2 is installed.
+
+    Returns:
+        (root, drop_enabled)
+    """
+    try:
+        from tkinterdnd2 import TkinterDnD
+    except ImportError:
+        return ctk.CTk(), False
+    
+    class DropRoot(ctk.CTk, TkinterDnD.DnDWrapper):
+        def __init__(self):
+            super().__init__()
+            try:
+                self.TkdndVersion = TkinterDnD._require(self)
+                self.drop_enabled = True
+            except (RuntimeError, tk.TclError):
+                self.drop_enabled = False  # No tkdnd library for this platform
+    
+    root = DropRoot()
+    return root, root.drop_enabled
 
 
 class MainWindow:
     """Main application window."""
     
-    def __init__(self):
+    def __init__(self, initial_urls=None):
         # Initialize CustomTkinter
         ctk.set_appearance_mode(APPEARANCE_MODE)
         ctk.set_default_color_theme(COLOR_THEME)
         
         # Create main window
-        self.root = ctk.CTk()
+        self.root, drop_enabled = _create_root()
         self.root.title(localization.get("app.title", "YouTube Downloader"))
         self.root.geometry(APP_GEOMETRY)
         
@@ -57,6 +101,10 @@ class MainWindow:
         self.output_dir = DEFAULT_OUTPUT_DIR
         self.download_queue = []
         
+        # Imported URLs waiting for their row, created a few per frame
+        self._pending_rows = collections.deque()
+        self._row_job = None
+        
         # Create UI components
         self._create_top_frame()
         self._create_button_frame()
@@ -65,6 +113,27 @@ class MainWindow:
         
         # Set initial folder value
         self._update_folder_display()
+        
+        # Accept URLs from later launches and scripts through the local API
+        self.rpc_server = start_server({
+            "ping": lambda: {"mode": "gui"},
+            "enqueue": self._enqueue_remote,
+            "show": lambda: self.root.after(0, self._bring_to_front),
+        }, metrics_text=metrics_recorder.prometheus_text)
+        if self.rpc_server is None and sys.stderr is not None:  # None in windowed (no console) builds
+            print(f"[WARN] {RPC_HOST}:{RPC_PORT} is in use by another program; "
+                  "links from later launches and scripts won't reach this window", file=sys.stderr)
+        
+        # Batch speed and ETA, computed on the tracker's thread
+        throughput_tracker.add_listener(self._on_throughput)
+        
+        if drop_enabled:
+            from tkinterdnd2 import DND_FILES, DND_TEXT
+            self.root.drop_target_register(DND_FILES, DND_TEXT)
+            self.root.dnd_bind("<<Drop>>", self._on_drop)
+        
+        if initial_urls:
+            self._import_text("\n".join(initial_urls))
     
     def _create_top_frame(self):
         """Create the top frame with URL input and add button."""
@@ -75,10 +144,22 @@ class MainWindow:
         self.url_entry = ctk.CTkEntry(self.top_frame, placeholder_text=localization.get("app.url_placeholder", "YouTube Link"))
         self.url_entry.pack(side="left", fill="x", expand=True, padx=(0, 5))
         
+        # Several links pasted at once are imported instead of filling the entry
+        self.url_entry.bind("<<Paste>>", self._on_paste)
+        
         # Add button
         self.add_button = ctk.CTkButton(self.top_frame, text=localization.get("app.add_button", "Add"), command=self._add_video)
         self.add_button.pack(side="left")
         
+        # Import links from a text file
+        self.import_button = ctk.CTkButton(
+            self.top_frame,
+            text=f"📄 {localization.get('app.import_button', 'Import')}",
+            command=self._choose_import_file,
+            width=90
+        )
+        self.import_button.pack(side="left", padx=(5, 0))
+        
         # Error message label (always present to reserve space)
         self.error_label = ctk.CTkLabel(
             self.root, 
@@ -110,6 +191,10 @@ class MainWindow:
         )
         self.clear_button.pack(side="left", padx=5)
         
+        # Batch progress (remaining bytes, aggregate speed, ETA)
+        self.batch_label = ctk.CTkLabel(self.btn_frame, text="", anchor="w")
+        self.batch_label.pack(side="left", padx=10)
+        
         # Folder selection
         self._create_folder_selection()
     
@@ -185,6 +270,11 @@ class MainWindow:
             self._show_error_message(localization.get("app.empty_url_message", "Please enter a URL"))
             return
         
+        if len(url.split()) > 1:
+            self.url_entry.delete(0, tk.END)
+            self._import_text(url)
+            return
+        
         if not is_valid_url(url):
             self._show_error_message(localization.get("app.invalid_url_message", "Please enter a valid URL"))
             return
@@ -192,24 +282,169 @@ class MainWindow:
         # Clear the URL entry
         self.url_entry.delete(0, tk.END)
         
-        # Create new video entry
-        VideoEntry(self.video_list_frame, url, self.output_dir, self.download_queue, self)
+        self._add_url(url)
+    
+    def _add_url(self, url):
+        """Create a new video entry for an already validated URL."""
+        VideoEntry(self.video_list_frame, url.strip(), self.output_dir, self.download_queue, self)
+    
+    def _enqueue_remote(self, url, **options):
+        """Handle an enqueue call from another launch or a script (RPC thread)."""
+        if options:
+            # Rows take their settings from the window, not from the caller
+            raise RpcError(-32602, "The GUI only accepts url; use --daemon for download options")
+        if not is_valid_url(url):
+            raise ValueError("invalid_url")
+        ui_watchdog.schedule(self.root, "enqueue", self._queue_rows, [url.strip()])
+        self.root.after(0, self._bring_to_front)
+    
+    def _on_paste(self, event):
+        """Import a multi-link paste instead of inserting it into the entry."""
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            return None
+        if len(text.split()) < 2:
+            return None  # Default paste
+        self._hide_error_message()
+        self._import_text(text)
+        return "break"
+    
+    def _on_drop(self, event):
+        """Import dropped text files or dropped text (tkinterdnd2)."""
+        # Files arrive as a Tcl list of paths, text as the text itself
+        try:
+            items = self.root.tk.splitlist(event.data)
+        except tk.TclError:
+            items = ()
+        if items and all(os.path.isfile(item) for item in items):
+            self._start_import(files=items)
+        else:
+            self._import_text(event.data)
+        return event.action
+    
+    def _choose_import_file(self):
+        """Pick a text file of links to import."""
+        path = filedialog.askopenfilename(
+            filetypes=[(localization.get("app.text_files", "Text files"), "*.txt"), ("*", "*")]
+        )
+        if path:
+            self._start_import(files=[path])
+    
+    def _import_text(self, text):
+        """Import every link in a block of text."""
+        self._start_import(texts=[text])
+    
+    def _start_import(self, texts=(), files=()):
+        """
+        Validate and deduplicate links on a background thread.
+
+        Valid links are handed back in chunks and get their rows a few per
+        frame (see _create_rows), so the window stays responsive.
+        """
+        # Snapshot on the main thread; the import thread only reads it
+        known = {entry.url for entry in self.download_queue}
+        known.update(self._pending_rows)
+        
+        def task():
+            chunk = []
+            skipped = 0
+            unreadable = []
+            sources = list(texts)
+            for path in files:
+                try:
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        sources.append(f.read())
+                except OSError:
+                    unreadable.append(os.path.basename(path))
+            for text in sources:
+                for token in text.split():
+                    url = token.strip(URL_TRIM_CHARS)
+                    if url in known or not is_valid_url(url):
+                        skipped += 1
+                        continue
+                    known.add(url)
+                    chunk.append(url)
+                    if len(chunk) >= IMPORT_CHUNK:
+                        ui_watchdog.schedule(self.root, "import", self._queue_rows, chunk)
+                        chunk = []
+            if chunk:
+                ui_watchdog.schedule(self.root, "import", self._queue_rows, chunk)
+            if unreadable:
+                message = localization.get("app.import_failed", "Could not read {files}").format(
+                    files=", ".join(unreadable))
+                ui_watchdog.schedule(self.root, "import", self._show_error_message, message)
+            elif skipped:
+                message = localization.get("app.import_skipped", "Skipped {count} invalid or duplicate links").format(
+                    count=skipped)
+                ui_watchdog.schedule(self.root, "import", self._show_error_message, message)
+        
+        threading.Thread(target=task, daemon=True).start()
+    
+    def _queue_rows(self, urls):
+        """Queue validated links for row creation (main thread)."""
+        self._pending_rows.extend(urls)
+        if self._row_job is None:
+            self._row_job = self.root.after(0, self._create_rows)
+    
+    def _create_rows(self):
+        """Create queued rows until this frame's time budget is spent, then yield to Tk."""
+        deadline = time.perf_counter() + ROW_FRAME_BUDGET_MS / 1000
+        while self._pending_rows:
+            self._add_url(self._pending_rows.popleft())
+            if time.perf_counter() >= deadline:
+                break
+        if self._pending_rows:
+            self._row_job = self.root.after(ROW_FRAME_INTERVAL_MS, self._create_rows)
+        else:
+            self._row_job = None
+    
+    def _bring_to_front(self):
+        """Restore and raise the main window."""
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
     
     def _download_all(self):
         """Download all videos in the queue."""
         for entry in self.download_queue:
-            if entry["download_btn"] and entry["download_btn"].cget("state") == "normal":
-                entry["download_btn"].invoke()
+            if entry.download_btn and entry.download_btn.cget("state") == "normal":
+                entry.download_btn.invoke()
     
     def _clear_list(self):
-        """Clear all videos from the download queue."""
+        """Clear all videos from the download queue, cancelling their downloads."""
+        self._pending_rows.clear()
         for entry in self.download_queue[:]:  # Copy list to avoid modification during iteration
+            if entry.record.job is not None:
+                cancel_download(entry.record.job)
             try:
-                entry["frame"].destroy()
+                entry.frame.destroy()
             except Exception:
                 pass
         self.download_queue.clear()
     
+    def _on_throughput(self, summary):
+        """Show a batch summary from the throughput tracker (tracker thread)."""
+        if summary["running"] or summary["queued"]:
+            eta = format_duration(summary["eta_s"]) if summary["eta_s"] is not None else "-"
+            text = localization.get(
+                "app.batch_progress", "{done}/{jobs} done · {remaining} left · {speed}/s · ETA {eta}"
+            ).format(
+                done=summary["done"],
+                jobs=summary["jobs"],
+                remaining=format_bytes(summary["remaining_bytes"]),
+                speed=format_bytes(summary["speed"]),
+                eta=eta,
+            )
+        else:
+            text = localization.get("app.batch_done", "{done}/{jobs} done").format(
+                done=summary["done"], jobs=summary["jobs"]
+            )
+        try:
+            ui_watchdog.schedule(self.batch_label, "throughput", lambda: self.batch_label.configure(text=text))
+        except Exception:
+            pass  # Window closed
+    
     def _choose_folder(self):
         """Open folder selection dialog."""
         folder = filedialog.askdirectory()
@@ -240,6 +475,38 @@ class MainWindow:
         """Hide error message."""
         self.error_label.configure(text="")
     
-    def run(self):
-        """Start the application main loop."""
-        self.root.mainloop()
+    def _warm_up(self):
+        """Import the deferred heavy modules and probe ffmpeg on a background thread."""
+        def task():
+            for name in WARM_UP_MODULES:
+                try:
+                    importlib.import_module(name)
+                except Exception:
+                    pass  # Reported properly when the module is actually used
+            from core.ffmpeg import probe_ffmpeg
+            probe_ffmpeg()
+        
+        threading.Thread(target=task, daemon=True).start()
+    
+    def run(self, exit_when_shown=False):
+        """
+        Start the application main loop.
+        
+        Args:
+            exit_when_shown: Print "ready" and quit once the window has been
+                drawn (used to measure startup time)
+        """
+        if exit_when_shown:
+            def ready():
+                self.root.update_idletasks()
+                if sys.stdout is not None:  # None in windowed (no console) builds
+                    print("ready", flush=True)
+                self.root.destroy()
+            self.root.after_idle(ready)
+        else:
+            self.root.after(500, self._warm_up)
+        ui_watchdog.start(self.root)
+        try:
+            self.root.mainloop()
+        finally:
+            ui_watchdog.stop()
@@ -2,25 +2,25 @@
 Video entry component for the YouTube Downloader application.
 """
 
-import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 import customtkinter as ctk
 from customtkinter import CTkImage
-from PIL import Image
-import requests
 from io import BytesIO
 
-from core.video_info import (
-    fetch_video_info, 
-    extract_resolution_options, 
-    extract_audio_language_options,
-    extract_subtitle_options,
-    extract_format_options
-)
-from core.downloader import download_video
+from core.video_info import fetch_video_info
+from core.models import EntryRecord
+from core.downloader import cancel_download, estimate_download_size
+from core.scheduler import download_scheduler
+from core.workers import run_download
 from core.utils import sanitize_filename
 from core.localization import localization
-from config import THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH
+from ui.watchdog import ui_watchdog
+from config import INFO_FETCH_WORKERS, THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH
+
+
+# Info fetches run a few at a time; a bulk import queues the rest here
+_info_executor = ThreadPoolExecutor(max_workers=INFO_FETCH_WORKERS, thread_name_prefix="info-fetch")
 
 
 class VideoEntry:
@@ -42,24 +42,21 @@ class VideoEntry:
         self._create_content_area()
         self._create_progress_area()
         
-        # Initialize entry data
-        self.entry_data = {
-            "url": url,
-            "frame": self.frame,
-            "thumb_label": self.thumb_label,
-            "title_label": self.title_label,
-            "progress": self.progress,
-            "progress_label": self.progress_label,
-            "status_label": self.status_label,
-            "download_btn": None,
-            "res_var": None,
-            "format_var": None,
-            "audio_var": None,
-            "subs_var": None
-        }
+        # Model state (kept apart from the widgets below)
+        self.record = EntryRecord(url)
+        
+        # Option widgets, created once the video info has loaded
+        self.res_var = None
+        self.format_var = None
+        self.audio_var = None
+        self.subs_var = None
+        self.sections_entry = None
+        self.download_btn = None
+        self.pause_btn = None
+        self.cancel_btn = None
         
         # Add to download queue
-        self.download_queue.append(self.entry_data)
+        self.download_queue.append(self)
         
         # Start loading video info
         self._load_video_info()
@@ -107,38 +104,44 @@ class VideoEntry:
         self.progress.set(0)
         self.progress.pack(fill="x", expand=True, pady=(0, 10))  # Add padding below progress bar
 
-        # Set initial indeterminate state while loading
+        # Indeterminate while loading; animated once the fetch actually starts
         self.progress.configure(mode="indeterminate")
-        self.progress.start()
     
     def _load_video_info(self):
-        """Load video information in a separate thread."""
+        """Load video information on the shared info fetch pool."""
         def task():
+            # Removed or cleared while waiting for a fetch slot
+            if self not in self.download_queue:
+                return
+            self._schedule("status", self.progress.start)
             try:
-                info = fetch_video_info(self.url)
-                formats = info.get("formats", [])
+                with self.record.metrics.extraction():
+                    info = fetch_video_info(self.url)
                 
-                # Extract options
-                resolution_options = extract_resolution_options(formats)
-                format_options = extract_format_options(formats)
-                audio_options = extract_audio_language_options(formats, info)
-                subs_options = extract_subtitle_options(info)
+                # Keep only the summaries and options; the raw info (often
+                # megabytes) is released here
+                self.record.load_info(info)
+                del info
                 
                 # Load thumbnail
-                self._load_thumbnail(info)
+                self._load_thumbnail()
                 
                 # Update UI
-                self._update_ui(info, resolution_options, format_options, audio_options, subs_options)
+                self._update_ui()
                 
             except Exception as e:
                 self._handle_error(str(e))
         
-        threading.Thread(target=task, daemon=True).start()
+        _info_executor.submit(task)
     
-    def _load_thumbnail(self, info):
+    def _load_thumbnail(self):
         """Load and display the video thumbnail."""
         try:
-            resp = requests.get(info.get("thumbnail", ""), timeout=5)
+            # Deferred so these don't load before the window is shown
+            import requests
+            from PIL import Image
+            
+            resp = requests.get(self.record.thumbnail or "", timeout=5)
             img_data = resp.content
             img = Image.open(BytesIO(img_data)).resize((THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
             ctk_img = CTkImage(light_image=img, dark_image=img, size=(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
@@ -148,15 +151,17 @@ class VideoEntry:
                 self.thumb_label.image = ctk_img
             
             # Schedule UI update on main thread
-            self.frame.after(0, update_thumb)
+            self._schedule("thumbnail", update_thumb)
         except:
             pass  # Thumbnail loading is optional
     
-    def _update_ui(self, info, resolution_options, format_options, audio_options, subs_options):
+    def _update_ui(self):
         """Update the UI with video information and options."""
         def update():
+            options = self.record.options
+            
             # Update title
-            self.title_label.configure(text=info.get("title", localization.get("video.error_loading", "Error loading metadata")))
+            self.title_label.configure(text=self.record.title or localization.get("video.error_loading", "Error loading metadata"))
             
             # Stop indeterminate progress and set to normal mode
             self.progress.stop()
@@ -166,64 +171,160 @@ class VideoEntry:
             self.status_label.configure(text=localization.get("video.ready", "Ready"))
             
             # Create variables
-            self.entry_data["res_var"] = tk.StringVar(value=resolution_options[0])
-            self.entry_data["format_var"] = tk.StringVar(value=format_options[0])
-            self.entry_data["audio_var"] = tk.StringVar(value=audio_options[0])
-            self.entry_data["subs_var"] = tk.StringVar(value=subs_options[0])
+            self.res_var = tk.StringVar(value=options["resolution"][0])
+            self.format_var = tk.StringVar(value=options["format"][0])
+            self.audio_var = tk.StringVar(value=options["audio"][0])
+            self.subs_var = tk.StringVar(value=options["subtitles"][0])
             
             # Create selectors and buttons
-            self._create_controls(resolution_options, format_options, audio_options, subs_options)
+            self._create_controls(options)
         
         # Schedule UI update on main thread
-        self.frame.after(0, update)
+        self._schedule("controls", update)
     
-    def _create_controls(self, resolution_options, format_options, audio_options, subs_options):
+    def _create_controls(self, options):
         """Create the control selectors and buttons."""
         option_frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
         option_frame.pack(fill="x", pady=2)
         
         # Selectors
-        ctk.CTkOptionMenu(option_frame, values=resolution_options, variable=self.entry_data["res_var"], width=120).pack(side="left", padx=2)
-        ctk.CTkOptionMenu(option_frame, values=format_options, variable=self.entry_data["format_var"], width=100).pack(side="left", padx=2)
-        ctk.CTkOptionMenu(option_frame, values=audio_options, variable=self.entry_data["audio_var"], width=120).pack(side="left", padx=2)
-        ctk.CTkOptionMenu(option_frame, values=subs_options, variable=self.entry_data["subs_var"], width=120).pack(side="left", padx=2)
+        ctk.CTkOptionMenu(option_frame, values=options["resolution"], variable=self.res_var, width=120).pack(side="left", padx=2)
+        ctk.CTkOptionMenu(option_frame, values=options["format"], variable=self.format_var, width=100).pack(side="left", padx=2)
+        ctk.CTkOptionMenu(option_frame, values=options["audio"], variable=self.audio_var, width=120).pack(side="left", padx=2)
+        ctk.CTkOptionMenu(option_frame, values=options["subtitles"], variable=self.subs_var, width=120).pack(side="left", padx=2)
+        
+        # Optional clip/chapter selection (empty downloads the full video)
+        self.sections_entry = ctk.CTkEntry(
+            option_frame,
+            placeholder_text=localization.get("video.clip_placeholder", "Clip: 1:00-3:00 or chapter"),
+            width=170
+        )
+        self.sections_entry.pack(side="left", padx=2)
         
         # Buttons
-        self.entry_data["download_btn"] = ctk.CTkButton(
+        self.download_btn = ctk.CTkButton(
             option_frame, 
             text=f"⬇ {localization.get('video.download', 'Download')}",
             command=self._start_download,
             state="disabled"
         )
-        self.entry_data["download_btn"].pack(side="left", padx=2)
+        self.download_btn.pack(side="left", padx=2)
+        
+        self.pause_btn = ctk.CTkButton(
+            option_frame,
+            text=f"⏸ {localization.get('video.pause', 'Pause')}",
+            command=self._toggle_pause,
+            state="disabled",
+            width=90
+        )
+        self.pause_btn.pack(side="left", padx=2)
+        
+        self.cancel_btn = ctk.CTkButton(
+            option_frame,
+            text=f"✖ {localization.get('video.cancel', 'Cancel')}",
+            command=self._cancel_download,
+            state="disabled",
+            width=90
+        )
+        self.cancel_btn.pack(side="left", padx=2)
         
         ctk.CTkButton(option_frame, text=f"🗑 {localization.get('video.remove', 'Remove')}", command=self._remove_entry).pack(side="left", padx=2)
         
         # Enable the download button after UI is ready
-        self.entry_data["download_btn"].configure(state="normal")
+        self.download_btn.configure(state="normal")
+    
+    def _read_selections(self):
+        """Read the user's selections from the option widgets into plain values."""
+        return {
+            "resolution": self.res_var.get(),
+            "format": self.format_var.get(),
+            "audio": self.audio_var.get(),
+            "subtitles": self.subs_var.get(),
+            "sections": self.sections_entry.get() if self.sections_entry else "",
+        }
     
     def _start_download(self):
-        """Start the download process."""
-        def download_task():
+        """Queue the download on the shared scheduler."""
+        def download_task(job):
+            downloading_text = localization.status("downloading")
+            self._update_progress(0, downloading_text)
             try:
-                download_video(
-                    self.entry_data,
+                run_download(
+                    self.record,
                     self.output_dir,
                     progress_callback=self._update_progress,
                     status_callback=self._update_status,
-                    completion_callback=self._download_complete
+                    job=job
                 )
             except Exception as e:
-                self._handle_download_error(str(e))
+                if str(e) == "paused":
+                    self._download_paused()
+                elif str(e) == "cancelled":
+                    self._download_cancelled()
+                elif str(e) == "deferred":
+                    pass  # Back on the queue until its retry is due; the status says so
+                else:
+                    self._handle_download_error(str(e))
+                raise
+            self._download_complete()
         
-        # Disable download button
-        self.entry_data["download_btn"].configure(state="disabled")
-        downloading_text = f"⏳ {localization.get('video.downloading', 'Downloading...')}"
-        self._update_status(downloading_text)
-        self._update_progress(0, downloading_text)
+        # Snapshot the selections so later edits don't affect the queued job
+        selections = self._read_selections()
+        self.record.selections = selections
+        estimated_size = estimate_download_size(self.record, selections)
+        
+        try:
+            self.record.job = download_scheduler.submit(download_task, self.output_dir, estimated_size)
+        except Exception as e:
+            self._handle_download_error(str(e))
+            return
         
-        # Start download in separate thread
-        threading.Thread(target=download_task, daemon=True).start()
+        # Disable download button while the job is active
+        self.download_btn.configure(state="disabled")
+        self._set_job_controls(active=True)
+        self._update_status(localization.status("queued"))
+    
+    def _set_job_controls(self, active, paused=False):
+        """Enable or disable the pause/resume and cancel buttons."""
+        if paused:
+            pause_text = f"▶ {localization.get('video.resume', 'Resume')}"
+        else:
+            pause_text = f"⏸ {localization.get('video.pause', 'Pause')}"
+        state = "normal" if active else "disabled"
+        self.pause_btn.configure(text=pause_text, state=state)
+        self.cancel_btn.configure(state=state)
+    
+    def _toggle_pause(self):
+        """Pause a queued/running download, or resume a paused one."""
+        job = self.record.job
+        if job is None:
+            return
+        if job.state == "paused":
+            download_scheduler.resume(job)
+            self._set_job_controls(active=True)
+            self._update_status(localization.status("queued"))
+        else:
+            download_scheduler.pause(job)
+            if job.state == "paused":
+                self._download_paused()
+            else:
+                # Wait for the running download to unwind before allowing resume
+                self.pause_btn.configure(state="disabled")
+    
+    def _cancel_download(self):
+        """Cancel the download and delete its partial files."""
+        job = self.record.job
+        if job is None:
+            return
+        cancel_download(job)
+        if job.state == "cancelled":
+            self._download_cancelled()
+        else:
+            self._set_job_controls(active=False)
+    
+    def _schedule(self, origin, fn):
+        """Run fn on the Tk main loop, timed by the UI watchdog under origin."""
+        ui_watchdog.schedule(self.frame, origin, fn)
     
     def _update_progress(self, percent, status_text):
         """Update progress bar and status."""
@@ -232,21 +333,41 @@ class VideoEntry:
             self.progress_label.configure(text=f"{percent}%")
             self.status_label.configure(text=status_text)
         
-        self.frame.after(0, update)
+        self._schedule("progress", update)
     
     def _update_status(self, status_text):
         """Update status text."""
         def update():
             self.status_label.configure(text=status_text)
         
-        self.frame.after(0, update)
+        self._schedule("status", update)
     
     def _download_complete(self):
         """Handle download completion."""
         def update():
-            self.entry_data["download_btn"].configure(state="normal")
+            self.download_btn.configure(state="normal")
+            self._set_job_controls(active=False)
+        
+        self._schedule("state", update)
+    
+    def _download_paused(self):
+        """Show the paused state once the download has released its slot."""
+        def update():
+            self.status_label.configure(text=localization.status("paused"))
+            self._set_job_controls(active=True, paused=True)
         
-        self.frame.after(0, update)
+        self._schedule("state", update)
+    
+    def _download_cancelled(self):
+        """Reset the entry after its download was cancelled."""
+        def update():
+            self.progress.set(0)
+            self.progress_label.configure(text="0%")
+            self.status_label.configure(text=localization.get("video.cancelled", "Cancelled"))
+            self.download_btn.configure(state="normal")
+            self._set_job_controls(active=False)
+        
+        self._schedule("state", update)
     
     def _handle_error(self, error_message):
         """Handle video info loading error."""
@@ -258,6 +379,8 @@ class VideoEntry:
                 error_text = localization.get("video.access_denied", "Access denied - video may be private or restricted")
             elif error_message == "network_error":
                 error_text = localization.get("video.network_error", "Network error - check your connection")
+            elif error_message == "throttled":
+                error_text = localization.get("video.throttled", "Too many requests - try again later")
             else:
                 error_text = localization.get("video.error_loading", "Error loading metadata")
             
@@ -266,8 +389,8 @@ class VideoEntry:
                 self.main_window._show_error_message(error_text)
             
             # Remove this entry from the download queue
-            if self.entry_data in self.download_queue:
-                self.download_queue.remove(self.entry_data)
+            if self in self.download_queue:
+                self.download_queue.remove(self)
             
             # Destroy the frame
             try:
@@ -275,23 +398,32 @@ class VideoEntry:
             except Exception:
                 pass
         
-        self.frame.after(0, update)
+        self._schedule("error", update)
     
     def _handle_download_error(self, error_message):
         """Handle download error."""
         def update():
-            error_text = f"❌ {localization.get('video.error', 'Error')}"
+            if error_message == "invalid_sections":
+                error_text = localization.status("invalid_sections")
+            elif error_message == "insufficient_space":
+                error_text = localization.status("insufficient_space")
+            else:
+                error_text = localization.status("error")
             self.status_label.configure(text=error_text)
-            self.entry_data["download_btn"].configure(state="normal")
+            self.download_btn.configure(state="normal")
+            self._set_job_controls(active=False)
         
-        self.frame.after(0, update)
+        self._schedule("error", update)
     
     def _remove_entry(self):
-        """Remove this entry from the download queue."""
+        """Remove this entry from the download queue, cancelling its download."""
+        if self.record.job is not None:
+            cancel_download(self.record.job)
+        
         try:
             self.frame.destroy()
         except Exception:
             pass
         
-        if self.entry_data in self.download_queue:
-            self.download_queue.remove(self.entry_data)
+        if self in self.download_queue:
+            self.download_queue.remove(self)
@@ -0,0 +1,249 @@
+"""
+Tk main-loop watchdog for the YouTube Downloader application.
+
+Worker threads hand every UI update to the main loop with ``after(0, ...)``.
+Under big batches those callbacks pile up and the window stutters, so the
+watchdog measures:
+
+* tick lag: a timer re-armed every ``interval`` seconds records how late
+  it fires, which is how long the main loop was busy;
+* pending callbacks: updates scheduled through ``schedule()`` that have
+  not run yet (current and highest depth);
+* per origin (progress, status, thumbnail, controls...): how long the
+  callbacks wait in the queue and how long they run, slowest included.
+
+A tick later than ``stall_threshold`` is a stall: it is counted, kept in
+``recent_stalls`` and reported on stderr together with the slowest
+callback that ran since the previous tick. The numbers are added to the
+Prometheus output of core.metrics (GET /metrics and --metrics-textfile).
+"""
+
+import collections
+import sys
+import threading
+import time
+
+from core.metrics import METRIC_PREFIX, metrics_recorder
+
+
+# Seconds between ticks
+DEFAULT_INTERVAL = 0.05
+
+# Tick lag (seconds) reported as a stall
+DEFAULT_STALL_THRESHOLD = 0.25
+
+# Upper bounds (seconds) of the tick lag histogram
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Stalls kept for inspection
+RECENT_STALLS = 20
+
+
+class _OriginStats:
+    """Queue delay and run time of the callbacks of one origin."""
+
+    __slots__ = ("count", "delay_sum", "delay_max", "run_sum", "run_max")
+
+    def __init__(self):
+        self.count = 0
+        self.delay_sum = 0.0
+        self.delay_max = 0.0
+        self.run_sum = 0.0
+        self.run_max = 0.0
+
+
+class UiWatchdog:
+    """Measures main-loop latency and the callbacks worker threads schedule on it."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, stall_threshold=DEFAULT_STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._lock = threading.Lock()
+        self._root = None
+        self._expected = None
+        self._lag_buckets = [0] * len(LAG_BUCKETS)
+        self._lag_sum = 0.0
+        self._lag_count = 0
+        self._lag_max = 0.0
+        self._pending = 0
+        self._pending_max = 0
+        self._origins = {}
+        self._slowest = None        # (seconds, origin) since the last tick
+        self._stalls = 0
+        self.recent_stalls = collections.deque(maxlen=RECENT_STALLS)
+
+    def start(self, root):
+        """Start ticking on root's main loop (call from the main thread)."""
+        self._root = root
+        self._expected = time.perf_counter() + self.interval
+        root.after(int(self.interval * 1000), self._tick)
+
+    def stop(self):
+        self._root = None
+
+    def _tick(self):
+        root = self._root
+        if root is None:
+            return
+        now = time.perf_counter()
+        lag = max(0.0, now - self._expected)
+        with self._lock:
+            self._lag_sum += lag
+            self._lag_count += 1
+            self._lag_max = max(self._lag_max, lag)
+            for index, bound in enumerate(LAG_BUCKETS):
+                if lag <= bound:
+                    self._lag_buckets[index] += 1
+                    break
+            slowest, self._slowest = self._slowest, None
+            pending = self._pending
+            if lag >= self.stall_threshold:
+                self._stalls += 1
+                stall = {"time": time.time(), "lag_s": round(lag, 3), "pending": pending}
+                if slowest:
+                    stall["slowest_origin"], stall["slowest_s"] = slowest[1], round(slowest[0], 3)
+                self.recent_stalls.append(stall)
+            else:
+                stall = None
+        if stall is not None and sys.stderr is not None:  # None in windowed (no console) builds
+            culprit = f", slowest callback: {stall['slowest_origin']} {stall['slowest_s']} s" if slowest else ""
+            print(f"[WARN] UI main loop stalled for {stall['lag_s']} s ({pending} updates pending{culprit})",
+                  file=sys.stderr)
+
+        self._expected = time.perf_counter() + self.interval
+        try:
+            root.after(int(self.interval * 1000), self._tick)
+        except Exception:
+            self._root = None  # Window destroyed
+
+    def schedule(self, widget, origin, fn, *args):
+        """
+        Run fn(*args) on the main loop, like widget.after(0, fn, *args), and time it.
+
+        Safe to call from any thread. The callback is queued on the root
+        window and skipped if widget has been destroyed by then, so it is
+        always accounted for (Tk drops callbacks queued on a destroyed widget).
+
+        Args:
+            widget: Widget the update is for
+            origin: Label the callback is accounted under (e.g. "progress")
+        """
+        scheduled = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                if _exists(widget):
+                    fn(*args)
+            finally:
+                self._record(origin, started - scheduled, time.perf_counter() - started)
+
+        with self._lock:
+            self._pending += 1
+            self._pending_max = max(self._pending_max, self._pending)
+        try:
+            (self._root or widget).after(0, run)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def _record(self, origin, delay, elapsed):
+        with self._lock:
+            self._pending -= 1
+            stats = self._origins.get(origin)
+            if stats is None:
+                stats = self._origins[origin] = _OriginStats()
+            stats.count += 1
+            stats.delay_sum += delay
+            stats.delay_max = max(stats.delay_max, delay)
+            stats.run_sum += elapsed
+            stats.run_max = max(stats.run_max, elapsed)
+            if self._slowest is None or elapsed > self._slowest[0]:
+                self._slowest = (elapsed, origin)
+
+    def snapshot(self):
+        """Current figures as a JSON-serialisable dict."""
+        with self._lock:
+            return {
+                "ticks": self._lag_count,
+                "tick_lag_mean_s": self._lag_sum / self._lag_count if self._lag_count else None,
+                "tick_lag_max_s": self._lag_max,
+                "tick_lag_buckets": dict(zip(LAG_BUCKETS, self._lag_buckets)),
+                "pending": self._pending,
+                "pending_max": self._pending_max,
+                "stalls": self._stalls,
+                "recent_stalls": list(self.recent_stalls),
+                "callbacks": {
+                    origin: {
+                        "count": stats.count,
+                        "delay_mean_s": stats.delay_sum / stats.count,
+                        "delay_max_s": stats.delay_max,
+                        "run_mean_s": stats.run_sum / stats.count,
+                        "run_max_s": stats.run_max,
+                    }
+                    for origin, stats in self._origins.items() if stats.count
+                },
+            }
+
+    def prometheus_text(self):
+        """UI latency metrics in the Prometheus text exposition format."""
+        p = METRIC_PREFIX
+        with self._lock:
+            lines = [
+                f"# HELP {p}_ui_tick_lag_seconds How late the main-loop watchdog tick fired.",
+                f"# TYPE {p}_ui_tick_lag_seconds histogram",
+            ]
+            cumulative = 0
+            for bound, count in zip(LAG_BUCKETS, self._lag_buckets):
+                cumulative += count
+                lines.append(f'{p}_ui_tick_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+            lines += [
+                f'{p}_ui_tick_lag_seconds_bucket{{le="+Inf"}} {self._lag_count}',
+                f"{p}_ui_tick_lag_seconds_sum {self._lag_sum:.6f}",
+                f"{p}_ui_tick_lag_seconds_count {self._lag_count}",
+                f"# HELP {p}_ui_tick_lag_max_seconds Longest main-loop stall seen.",
+                f"# TYPE {p}_ui_tick_lag_max_seconds gauge",
+                f"{p}_ui_tick_lag_max_seconds {self._lag_max:.6f}",
+                f"# HELP {p}_ui_stalls_total Ticks later than the stall threshold.",
+                f"# TYPE {p}_ui_stalls_total counter",
+                f"{p}_ui_stalls_total {self._stalls}",
+                f"# HELP {p}_ui_pending_callbacks UI updates scheduled but not run yet.",
+                f"# TYPE {p}_ui_pending_callbacks gauge",
+                f"{p}_ui_pending_callbacks {self._pending}",
+                f"# HELP {p}_ui_pending_callbacks_max Most UI updates pending at once.",
+                f"# TYPE {p}_ui_pending_callbacks_max gauge",
+                f"{p}_ui_pending_callbacks_max {self._pending_max}",
+            ]
+
+            origins = sorted(self._origins.items())
+            for name, help_text, total, largest in (
+                ("delay", "Time UI updates waited for the main loop.", "delay_sum", "delay_max"),
+                ("run", "Time UI updates ran on the main loop.", "run_sum", "run_max"),
+            ):
+                lines += [
+                    f"# HELP {p}_ui_callback_{name}_seconds {help_text}",
+                    f"# TYPE {p}_ui_callback_{name}_seconds summary",
+                ]
+                for origin, stats in origins:
+                    lines.append(f'{p}_ui_callback_{name}_seconds_sum{{origin="{origin}"}} {getattr(stats, total):.6f}')
+                    lines.append(f'{p}_ui_callback_{name}_seconds_count{{origin="{origin}"}} {stats.count}')
+                lines += [
+                    f"# HELP {p}_ui_callback_{name}_max_seconds Slowest UI update by origin ({name}).",
+                    f"# TYPE {p}_ui_callback_{name}_max_seconds gauge",
+                ]
+                lines += [f'{p}_ui_callback_{name}_max_seconds{{origin="{origin}"}} {getattr(stats, largest):.6f}'
+                          for origin, stats in origins]
+        return "\n".join(lines) + "\n"
+
+
+def _exists(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except Exception:
+        return False
+
+
+# Global watchdog (started by MainWindow.run)
+ui_watchdog = UiWatchdog()
+metrics_recorder.add_collector(ui_watchdog.prometheus_text)